@@ -10,17 +10,27 @@ dotenv.load_dotenv(CONFIG_DIR / ".env")
 
 
 # 数据库
+class DBReplicaCfg(BaseModel):
+    host: str
+    port: int
+
+
 class DBCfg(BaseModel):
     host: str
     port: int
     user: str
     password: str
     database: str
+    replicas: list[DBReplicaCfg]
 
 
 class DBCfgs(BaseModel):
     app: DBCfg
+    app_shards: list[DBCfg]
     auth: DBCfg
+    sticky_seconds: float
+    max_replica_lag_seconds: float
+    lag_check_interval_seconds: float
 
 
 # 日志
@@ -45,6 +55,25 @@ class AuthCfg(BaseModel):
     refresh_token_expire_days: int
 
 
+# 密码哈希
+class PasswordCfg(BaseModel):
+    workers: int
+    max_pending: int
+    time_cost: int
+    memory_cost: int
+    parallelism: int
+
+
+# 登录和注册限流
+class ThrottleCfg(BaseModel):
+    enabled: bool
+    ip_capacity: int
+    ip_refill_per_minute: float
+    email_capacity: int
+    email_refill_per_minute: float
+    max_bytes: int
+
+
 class COSCfg(BaseModel):
     bucket: str
     secret_id: str
@@ -54,13 +83,90 @@ class COSCfg(BaseModel):
     scheme: str
 
 
+# 缓存
+class CacheCfg(BaseModel):
+    backend: str
+    redis_url: str | None
+    history_max_bytes: int
+    refresh_token_max_bytes: int
+    refresh_token_ttl: int
+    access_token_max_bytes: int
+    cos_exists_max_bytes: int
+
+
+# 消息存储
+class MessageCfg(BaseModel):
+    compress_threshold: int
+    compress_level: int
+    index_prefix_bytes: int
+
+
+# 归档
+class ArchiveCfg(BaseModel):
+    enabled: bool
+    idle_days: int
+    batch_size: int
+    interval_seconds: int
+
+
+# 删除清理
+class PurgeCfg(BaseModel):
+    chunk_size: int
+    chunk_interval_ms: int
+    batch_size: int
+    interval_seconds: int
+    image_grace_seconds: int
+
+
+# 对话计数器修复
+class CountersCfg(BaseModel):
+    enabled: bool
+    interval_seconds: int
+    batch_size: int
+    batch_interval_ms: int
+
+
+# 刷新令牌清理
+class TokenReaperCfg(BaseModel):
+    enabled: bool
+    chunk_size: int
+    chunk_interval_ms: int
+    interval_seconds: int
+
+
+# 消息表分区维护
+class PartitionCfg(BaseModel):
+    enabled: bool
+    months_ahead: int
+    retention_months: int
+    lock_timeout_seconds: int
+    interval_seconds: int
+
+
+# 导入导出
+class TransferCfg(BaseModel):
+    batch_size: int
+    max_import_bytes: int
+
+
 class Cfg(BaseModel):
     db: DBCfgs
     log: LogCfgs
     auth: AuthCfg
+    password: PasswordCfg
+    throttle: ThrottleCfg
     cos: COSCfg
+    cache: CacheCfg
+    message: MessageCfg
+    archive: ArchiveCfg
+    purge: PurgeCfg
+    counters: CountersCfg
+    partition: PartitionCfg
+    token_reaper: TokenReaperCfg
+    transfer: TransferCfg
     encryption_key: str
     cors_origins: list[str]
+    trusted_proxies: list[str]
     port: int
 
 
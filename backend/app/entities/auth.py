@@ -9,6 +9,14 @@ class Base(DeclarativeBase):
     pass
 
 
+class AclVersion(Base):
+    __tablename__ = 'acl_version'
+    __table_args__ = {'comment': '组和权限范围的版本号，相关表变更时由触发器递增，用于失效进程内缓存'}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, comment='固定为 1')
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("'0'"), comment='版本号')
+
+
 class Group(Base):
     __tablename__ = 'group'
     __table_args__ = {'comment': '组'}
@@ -81,6 +89,7 @@ class RefreshToken(Base):
     __table_args__ = (
         ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE', name='refresh_token_ibfk_1'),
         Index('idx_refresh_token_user_id', 'user_id'),
+        Index('idx_refresh_token_yn_expires_at', 'yn', 'expires_at'),
         {'comment': '刷新令牌'}
     )
 
@@ -1,7 +1,8 @@
 from typing import Optional
 import datetime
 
-from sqlalchemy import BigInteger, DateTime, ForeignKeyConstraint, Index, JSON, String, Text, text
+from sqlalchemy import BigInteger, DateTime, ForeignKeyConstraint, Index, Integer, JSON, String, Text, text
+from sqlalchemy.dialects.mysql import MEDIUMBLOB, MEDIUMTEXT, TINYINT
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 class Base(DeclarativeBase):
@@ -32,27 +33,35 @@ class Conversation(Base):
     __tablename__ = 'conversation'
     __table_args__ = (
         ForeignKeyConstraint(['model_config_id'], ['model_config.id'], name='conversation_ibfk_1'),
-        Index('idx_conversation_user_id', 'user_id'),
+        Index('ft_conversation_title', 'title', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+        Index('idx_conversation_deleted_at', 'deleted_at'),
+        Index('idx_conversation_last_message_at', 'last_message_at'),
+        Index('idx_conversation_user_id_deleted_at_last_message_at', 'user_id', 'deleted_at', 'last_message_at'),
         Index('model_config_id', 'model_config_id'),
         {'comment': '对话'}
     )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, comment='对话ID')
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment='用户ID')
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("'0'"), comment='消息数量')
+    total_prompt_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("'0'"), comment='累计输入 token 数')
+    total_completion_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("'0'"), comment='累计输出 token 数')
+    last_message_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=text('CURRENT_TIMESTAMP'), comment='最后一条消息时间')
     create_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=text('CURRENT_TIMESTAMP'), comment='创建时间')
     update_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'), comment='更新时间')
     title: Mapped[Optional[str]] = mapped_column(String(200), comment='对话标题')
     model_config_id: Mapped[Optional[int]] = mapped_column(BigInteger, comment='模型配置ID')
+    last_message_preview: Mapped[Optional[str]] = mapped_column(String(200), comment='最后一条消息预览')
+    archived_key: Mapped[Optional[str]] = mapped_column(String(200), comment='归档对象 cos_key，非空表示消息已归档')
+    deleted_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, comment='删除时间，非空表示已删除等待后台清理')
 
     model_config: Mapped[Optional['ModelConfig']] = relationship('ModelConfig', back_populates='conversation')
-    message: Mapped[list['Message']] = relationship('Message', back_populates='conversation')
 
 
 class Message(Base):
     __tablename__ = 'message'
     __table_args__ = (
-        ForeignKeyConstraint(['conversation_id'], ['conversation.id'], ondelete='CASCADE', name='message_ibfk_1'),
-        Index('idx_message_conversation_id', 'conversation_id'),
+        Index('idx_message_conversation_id_id', 'conversation_id', 'id'),
         {'comment': '消息'}
     )
 
@@ -60,7 +69,37 @@ class Message(Base):
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment='用户ID')
     conversation_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment='对话ID')
     role: Mapped[str] = mapped_column(String(20), nullable=False, comment='发送者 (user/assistant)')
-    content: Mapped[str] = mapped_column(Text, nullable=False, comment='消息内容 (JSON 字符串)')
-    timestamp: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=text('CURRENT_TIMESTAMP'), comment='发送时间')
+    content: Mapped[str] = mapped_column(MEDIUMTEXT, nullable=False, comment='消息内容 (纯文本或 JSON 字符串，压缩时为检索用前缀)')
+    content_format: Mapped[int] = mapped_column(TINYINT, nullable=False, server_default=text("'1'"), comment='内容格式 (0:纯文本 1:JSON 2:压缩纯文本 3:压缩JSON)')
+    prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("'0'"), comment='生成该回复的输入 token 数')
+    completion_tokens: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("'0'"), comment='该回复的输出 token 数')
+    timestamp: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True, server_default=text('CURRENT_TIMESTAMP'), comment='发送时间')
+    content_compressed: Mapped[Optional[bytes]] = mapped_column(MEDIUMBLOB, comment='zlib 压缩后的消息内容')
 
-    conversation: Mapped['Conversation'] = relationship('Conversation', back_populates='message')
+
+class ImageRef(Base):
+    __tablename__ = 'image_ref'
+    __table_args__ = (
+        Index('idx_image_ref_conversation_id', 'conversation_id'),
+        Index('idx_image_ref_user_id', 'user_id'),
+        {'comment': '图片引用'}
+    )
+
+    cos_key: Mapped[str] = mapped_column(String(200), primary_key=True, comment='图片 cos_key')
+    conversation_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, comment='引用图片的对话ID')
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment='用户ID')
+    create_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=text('CURRENT_TIMESTAMP'), comment='创建时间')
+
+
+class MessageSearch(Base):
+    __tablename__ = 'message_search'
+    __table_args__ = (
+        Index('ft_message_search_content', 'content', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+        {'comment': '消息全文检索'}
+    )
+
+    message_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, comment='消息ID')
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment='用户ID')
+    conversation_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment='对话ID')
+    timestamp: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, comment='发送时间')
+    content: Mapped[str] = mapped_column(MEDIUMTEXT, nullable=False, comment='检索内容，与 message.content 相同')
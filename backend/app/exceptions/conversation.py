@@ -7,3 +7,8 @@ class ConversationError(Exception): ...
 class ConversationNotFoundError(ConversationError):
     def __init__(self, message: str = "对话不存在"):
         super().__init__(message)
+
+
+class InvalidImportDataError(ConversationError):
+    def __init__(self, message: str = "导入数据格式错误"):
+        super().__init__(message)
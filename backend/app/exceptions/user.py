@@ -37,3 +37,14 @@ class UserEmailSameError(UserError):
 class UserPasswordSameError(UserError):
     def __init__(self, message: str = "密码与原密码相同"):
         super().__init__(message)
+
+
+class PasswordHashBusyError(UserError):
+    def __init__(self, message: str = "服务繁忙，请稍后重试"):
+        super().__init__(message)
+
+
+class TooManyAttemptsError(UserError):
+    def __init__(self, retry_after: float, message: str = "请求过于频繁，请稍后重试"):
+        super().__init__(message)
+        self.retry_after = retry_after
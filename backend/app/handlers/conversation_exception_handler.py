@@ -1,7 +1,11 @@
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 
-from app.exceptions.conversation import ConversationError, ConversationNotFoundError
+from app.exceptions.conversation import (
+    ConversationError,
+    ConversationNotFoundError,
+    InvalidImportDataError,
+)
 from app.utils.log import app_logger
 
 
@@ -23,3 +27,13 @@ def register_conversation_exception_handlers(app):
             status_code=status.HTTP_404_NOT_FOUND,
             content={"detail": str(exc)},
         )
+
+    @app.exception_handler(InvalidImportDataError)
+    async def invalid_import_data_handler(
+        request: Request, exc: InvalidImportDataError
+    ):
+        app_logger.error(exc)
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": str(exc)},
+        )
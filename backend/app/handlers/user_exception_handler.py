@@ -1,9 +1,13 @@
+import math
+
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 
 from app.exceptions.user import (
     EmailAlreadyExistsError,
     InvalidCredentialsError,
+    PasswordHashBusyError,
+    TooManyAttemptsError,
     UserDisabledError,
     UserEmailSameError,
     UserError,
@@ -82,3 +86,21 @@ def register_user_exception_handlers(app):
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"detail": str(exc)},
         )
+
+    @app.exception_handler(PasswordHashBusyError)
+    async def password_hash_busy_handler(request: Request, exc: PasswordHashBusyError):
+        auth_logger.error(exc)
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": str(exc)},
+            headers={"Retry-After": "1"},
+        )
+
+    @app.exception_handler(TooManyAttemptsError)
+    async def too_many_attempts_handler(request: Request, exc: TooManyAttemptsError):
+        auth_logger.warning(exc)
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
@@ -5,8 +5,21 @@ from app.config import CFG
 from app.handlers import register_exception_handlers
 from app.middleware import log_middleware
 from app.routers.api import api
+from app.services.archive import run_archiver
+from app.services.auth import access_token_cache, refresh_token_cache
+from app.services.chat import history_cache
+from app.services.counters import run_counter_repair
 from app.services.database import db_manager
+from app.services.partition import run_partition_maintenance
+from app.services.purge import run_purger
+from app.services.reaper import reaper_stats, run_token_reaper
+from app.services.user import group_scope_cache
+from app.utils import background
+from app.utils.cache import cache_backend
+from app.utils.cos import ensure_bucket, exists_cache
 from app.utils.log import setup_logger
+from app.utils.password import password_hasher
+from app.utils.rate_limit import login_throttle
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -14,8 +27,49 @@ from fastapi.middleware.cors import CORSMiddleware
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logger()
+    await password_hasher.start()
+    await ensure_bucket()
+    for shard in db_manager.shard_names("app"):  # 每个分片各自执行后台任务
+        if CFG.archive.enabled:
+            background.start_periodic(
+                f"archiver:{shard}", CFG.archive.interval_seconds, run_archiver, shard
+            )
+        background.start_periodic(
+            f"purger:{shard}", CFG.purge.interval_seconds, run_purger, shard
+        )
+        if CFG.counters.enabled:
+            background.start_periodic(
+                f"counter_repair:{shard}",
+                CFG.counters.interval_seconds,
+                run_counter_repair,
+                shard,
+            )
+        if CFG.partition.enabled:
+            background.start_periodic(
+                f"partition:{shard}",
+                CFG.partition.interval_seconds,
+                run_partition_maintenance,
+                shard,
+            )
+    if CFG.token_reaper.enabled:
+        background.start_periodic(
+            "token_reaper",
+            CFG.token_reaper.interval_seconds,
+            run_token_reaper,
+            "auth",
+        )
+    if db_manager.has_replicas():
+        await db_manager.start()
+        background.start_interval(
+            "replica_lag",
+            CFG.db.lag_check_interval_seconds,
+            db_manager.check_replica_lag,
+        )
     yield
+    await background.stop_all()
+    password_hasher.shutdown()
     await db_manager.close_all()
+    await cache_backend.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -41,6 +95,21 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "history_cache": history_cache.stats(),
+        "cos_exists_cache": exists_cache.stats(),
+        "replica_lag": db_manager.replica_lag,
+        "password_hash": password_hasher.stats(),
+        "login_throttle": login_throttle.stats(),
+        "access_token_cache": access_token_cache.stats(),
+        "refresh_token_cache": refresh_token_cache.stats(),
+        "group_scope_cache": group_scope_cache.stats(),
+        "token_reaper": reaper_stats,
+    }
+
+
 app.include_router(api.router)
 
 if __name__ == "__main__":
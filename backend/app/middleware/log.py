@@ -1,9 +1,11 @@
 import time
 import uuid
+from ipaddress import ip_address, ip_network
 from typing import Callable
 
 from fastapi import Request, Response
 
+from app.config import CFG
 from app.utils.context import (
     client_ip_ctx,
     method_ctx,
@@ -15,13 +17,34 @@ from app.utils.context import (
 )
 from app.utils.log import app_logger
 
+TRUSTED_PROXIES = [ip_network(i) for i in CFG.trusted_proxies]
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
 
 def _get_client_ip(request: Request) -> str:
-    """获取 IP 地址"""
+    """
+    获取 IP 地址
+
+    直连地址是可信代理时，从右向左取 X-Forwarded-For 中第一个非可信代理的地址，
+    没有时取 X-Real-IP；否则请求头可被客户端伪造，只采用直连地址
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
     forwarded = request.headers.get("X-Forwarded-For")
     if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+        for hop in reversed(forwarded.split(",")):
+            hop = hop.strip()
+            if hop and not _is_trusted_proxy(hop):
+                return hop
+    return request.headers.get("X-Real-IP", host)
 
 
 async def log_middleware(request: Request, call_next: Callable) -> Response:
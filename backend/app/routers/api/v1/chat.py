@@ -2,7 +2,7 @@ import asyncio
 import json
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -10,7 +10,6 @@ from app.schemas.chat import (
     ConversationTitleResponse,
     GetUploadPresignedUrlRequest,
     GetUploadPresignedUrlResponse,
-    MessageItem,
     MessageListResponse,
     SendMessageRequest,
     WebSocketChatRequest,
@@ -23,8 +22,14 @@ from app.services.chat import (
     image_url_to_get_presigned_url,
     stream_response,
 )
-from app.services.database import get_app_db
-from app.utils.cos import generate_image_cos_key, get_upload_presigned_url
+from app.services.database import get_app_db, get_app_read_db
+from app.services.image_ref import reserve_image_refs
+from app.utils.cos import (
+    generate_content_cos_key,
+    generate_image_cos_key,
+    get_upload_presigned_url,
+    object_exists,
+)
 from app.utils.log import app_logger
 
 router = APIRouter(prefix="/chat", tags=["聊天"])
@@ -33,44 +38,61 @@ router = APIRouter(prefix="/chat", tags=["聊天"])
 @router.get("/{conversation_id}", response_model=MessageListResponse)
 async def api_get_messages(
     conversation_id: int,
-    db_session: Annotated[AsyncSession, Depends(get_app_db)],
+    db_session: Annotated[AsyncSession, Depends(get_app_read_db)],
     payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
+    before_id: Annotated[
+        int | None, Query(description="游标，返回该消息之前的消息")
+    ] = None,
+    limit: Annotated[int, Query(ge=1, le=200, description="每页消息数")] = 50,
 ) -> MessageListResponse:
     """获取消息记录"""
-    app_logger.info(f"User get messages: {conversation_id=}")
-    messages = await get_messages(db_session, conversation_id)
-    # 转换cos_url为预签名下载url
+    app_logger.info(f"User get messages: {conversation_id=}, {before_id=}, {limit=}")
+    messages, has_more = await get_messages(
+        db_session, conversation_id, before_id, limit
+    )
+    # 转换cos_url为预签名下载url（仅当前页）
     await image_url_to_get_presigned_url(messages)
     return MessageListResponse(
-        messages=[
-            MessageItem(
-                message_id=message.id,
-                role=message.role,
-                content=message.content,
-                timestamp=message.timestamp,
-            )
-            for message in messages
-        ]
+        messages=messages,
+        has_more=has_more,
+        next_before_id=messages[0].message_id if has_more else None,
     )
 
 
 @router.post("/get_upload_presigned_url", response_model=GetUploadPresignedUrlResponse)
 async def api_get_upload_presigned_url(
     request: GetUploadPresignedUrlRequest,
+    db_session: Annotated[AsyncSession, Depends(get_app_db)],
     payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
 ) -> GetUploadPresignedUrlResponse:
     """获取带预签名的上传url"""
     app_logger.info(
         f"User get upload presigned url: conversation_id={request.conversation_id}"
     )
-    cos_keys = [
-        generate_image_cos_key(payload.sub, request.conversation_id, suffix)
-        for suffix in request.suffixes
-    ]  # 生成cos_key
+    if request.hashes:  # 按内容寻址，相同图片复用同一对象
+        cos_keys = [
+            generate_content_cos_key(payload.sub, content_hash, suffix)
+            for content_hash, suffix in zip(request.hashes, request.suffixes)
+        ]
+        # 先记录引用再检查是否存在，避免清理任务删除即将复用的图片
+        await reserve_image_refs(
+            db_session, payload.sub, request.conversation_id, set(cos_keys)
+        )
+        exists = await asyncio.gather(*[object_exists(key) for key in cos_keys])
+    else:
+        cos_keys = [
+            generate_image_cos_key(payload.sub, request.conversation_id, suffix)
+            for suffix in request.suffixes
+        ]  # 生成cos_key
+        exists = [False] * len(cos_keys)
     upload_presigned_urls = await asyncio.gather(
         *[get_upload_presigned_url(key) for key in cos_keys]
     )  # 获取预签名上传url
-    return GetUploadPresignedUrlResponse(urls=upload_presigned_urls)
+    return GetUploadPresignedUrlResponse(
+        urls=upload_presigned_urls,
+        cos_urls=["cos://" + key for key in cos_keys],
+        exists=list(exists),
+    )
 
 
 @router.post("/generate_title", response_model=ConversationTitleResponse)
@@ -1,6 +1,8 @@
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.conversation import (
@@ -8,6 +10,8 @@ from app.schemas.conversation import (
     ConversationResponse,
     CreateConversationRequest,
     DeleteConversationRequest,
+    ImportConversationsResponse,
+    SearchResponse,
     UpdateConversationRequest,
 )
 from app.schemas.user import AccessTokenPayload
@@ -18,7 +22,9 @@ from app.services.conversation import (
     get_conversations,
     update_conversation_data,
 )
-from app.services.database import get_app_db
+from app.services.database import get_app_db, get_app_read_db
+from app.services.search import search_conversations, search_messages
+from app.services.transfer import export_conversations, import_conversations
 from app.utils.log import app_logger
 
 router = APIRouter(prefix="/conversation", tags=["对话管理"])
@@ -26,11 +32,16 @@ router = APIRouter(prefix="/conversation", tags=["对话管理"])
 
 @router.get("", response_model=ConversationListResponse)
 async def api_get_conversations(
-    db_session: Annotated[AsyncSession, Depends(get_app_db)],
+    db_session: Annotated[AsyncSession, Depends(get_app_read_db)],
     payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
+    before_at: Annotated[datetime | None, Query(description="游标时间")] = None,
+    before_id: Annotated[int | None, Query(description="游标ID")] = None,
+    limit: Annotated[int, Query(ge=1, le=200, description="每页对话数")] = 50,
 ) -> ConversationListResponse:
     """获取对话列表"""
-    conversations = await get_conversations(db_session, payload.sub)
+    conversations, has_more = await get_conversations(
+        db_session, payload.sub, before_at, before_id, limit
+    )
     app_logger.info(f"User get conversations: {[i.id for i in conversations]}")
     return ConversationListResponse(
         conversations=[
@@ -39,10 +50,77 @@ async def api_get_conversations(
                 title=i.title,
                 update_at=i.update_at,
                 model_config_id=i.model_config_id,
+                message_count=i.message_count,
+                total_prompt_tokens=i.total_prompt_tokens,
+                total_completion_tokens=i.total_completion_tokens,
+                last_message_at=i.last_message_at,
+                last_message_preview=i.last_message_preview,
             )
             for i in conversations
-        ]
+        ],
+        has_more=has_more,
+        next_before_at=conversations[-1].last_message_at if has_more else None,
+        next_before_id=conversations[-1].id if has_more else None,
+    )
+
+
+@router.get("/search", response_model=SearchResponse)
+async def api_search(
+    db_session: Annotated[AsyncSession, Depends(get_app_read_db)],
+    payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
+    q: Annotated[str, Query(min_length=1, max_length=100, description="检索词")],
+    before_id: Annotated[int | None, Query(description="消息游标ID")] = None,
+    limit: Annotated[int, Query(ge=1, le=100, description="每页消息数")] = 20,
+) -> SearchResponse:
+    """检索对话标题和消息内容"""
+    # 标题命中只在第一页返回
+    conversations = (
+        await search_conversations(db_session, payload.sub, q)
+        if before_id is None
+        else []
+    )
+    messages, has_more = await search_messages(
+        db_session, payload.sub, q, before_id, limit
+    )
+    app_logger.info(f"User search: q={q!r}, messages={len(messages)}")
+    return SearchResponse(
+        conversations=conversations,
+        messages=messages,
+        has_more=has_more,
+        next_before_id=messages[-1].message_id if has_more else None,
+    )
+
+
+@router.get("/export")
+async def api_export_conversations(
+    db_session: Annotated[AsyncSession, Depends(get_app_read_db)],
+    payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
+    compress: Annotated[bool, Query(description="是否 gzip 压缩")] = False,
+) -> StreamingResponse:
+    """以 NDJSON 流式导出所有对话"""
+    app_logger.info(f"User export conversations: {compress=}")
+    filename = "conversations.ndjson" + (".gz" if compress else "")
+    return StreamingResponse(
+        export_conversations(db_session, payload.sub, compress),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import", response_model=ImportConversationsResponse)
+async def api_import_conversations(
+    request: Request,
+    db_session: Annotated[AsyncSession, Depends(get_app_db)],
+    payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
+) -> ImportConversationsResponse:
+    """从 NDJSON（可 gzip 压缩）数据流导入对话"""
+    conversations, messages = await import_conversations(
+        db_session, payload.sub, request.stream()
+    )
+    app_logger.info(
+        f"User import conversations: conversations={conversations}, messages={messages}"
     )
+    return ImportConversationsResponse(conversations=conversations, messages=messages)
 
 
 @router.post(
@@ -63,6 +141,8 @@ async def api_create_conversation(
         title=None,
         update_at=conversation.update_at,
         model_config_id=conversation.model_config_id,
+        message_count=conversation.message_count,
+        last_message_at=conversation.last_message_at,
     )
 
 
@@ -94,4 +174,4 @@ async def api_delete_conversations(
 ):
     """删除对话"""
     app_logger.info(f"User delete conversations: {request.ids}")
-    await delete_conversations(db_session, request.ids)
+    await delete_conversations(db_session, payload.sub, request.ids)
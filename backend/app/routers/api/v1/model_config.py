@@ -14,7 +14,7 @@ from app.schemas.model_config import (
 )
 from app.schemas.user import AccessTokenPayload
 from app.services.auth import authenticate_access_token
-from app.services.database import get_app_db
+from app.services.database import get_app_db, get_app_read_db
 from app.services.model_config import (
     create_model_config,
     delete_model_configs,
@@ -29,7 +29,7 @@ router = APIRouter(prefix="/model_config", tags=["模型配置管理"])
 
 @router.get("", response_model=ModelConfigListResponse)
 async def api_get_model_configs(
-    db_session: Annotated[AsyncSession, Depends(get_app_db)],
+    db_session: Annotated[AsyncSession, Depends(get_app_read_db)],
     payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
 ) -> ModelConfigListResponse:
     """获取模型配置列表"""
@@ -120,4 +120,4 @@ async def api_delete_model_configs(
 ):
     """批量删除模型配置"""
     app_logger.info(f"User delete model configs: {request.ids}")
-    await delete_model_configs(db_session, request.ids)
+    await delete_model_configs(db_session, payload.sub, request.ids)
@@ -3,6 +3,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.exceptions.user import InvalidCredentialsError, UserNotFoundError
 from app.schemas.user import (
     AccessTokenPayload,
     LoginRequest,
@@ -17,16 +18,19 @@ from app.schemas.user import (
 from app.services.auth import (
     authenticate_access_token,
     authenticate_refresh_token,
+    authenticate_rotating_refresh_token,
     create_token,
     revoke_all_refresh_tokens,
     revoke_refresh_token,
+    rotate_refresh_token,
 )
-from app.services.database import get_auth_db
+from app.services.database import get_auth_db, get_auth_read_db
 from app.services.user import (
     add_user_in_db,
     get_default_group,
     get_user,
     login_by_user_id,
+    set_refresh_token_cookie,
     update_email,
     update_password,
     update_username,
@@ -35,6 +39,7 @@ from app.services.user import (
 )
 from app.utils.context import user_id_ctx
 from app.utils.log import auth_logger
+from app.utils.rate_limit import login_throttle
 
 router = APIRouter(prefix="/user", tags=["用户管理"])
 
@@ -46,6 +51,8 @@ async def api_register(
     response: Response,
 ) -> LoginResponse:
     """注册新用户"""
+    # 限流，在查询数据库和计算密码哈希之前拒绝
+    await login_throttle.check(request.email)
     # 验证邮箱是否已存在
     await verify_email_exists(db_session, request.email)
     # 获取默认组
@@ -69,10 +76,19 @@ async def api_login(
     response: Response,
 ) -> LoginResponse:
     """用户登录"""
-    # 通过邮箱获取用户信息，包含权限信息
-    user, _, scopes = await get_user(db_session, email=request.email, options="scope")
-    # 验证密码
-    verify_password(user, request.password)
+    # 限流，在查询数据库和计算密码哈希之前拒绝
+    await login_throttle.check(request.email)
+    try:
+        # 通过邮箱获取用户信息，包含权限信息
+        user, _, scopes = await get_user(
+            db_session, email=request.email, options="scope"
+        )
+        # 验证密码
+        await verify_password(db_session, user, request.password)
+    except (UserNotFoundError, InvalidCredentialsError):
+        # 只有凭据错误才计入邮箱的限额，正确的登录不会被他人的尝试锁定
+        await login_throttle.record_failure(request.email)
+        raise
     # 创建访问令牌和刷新令牌
     tokens = await create_token(db_session, user.id, scopes)
     # 在 Cookie 中设置 refresh_token
@@ -91,7 +107,7 @@ async def api_login(
 
 @router.get("/me", response_model=UserResponse)
 async def api_me(
-    db_session: Annotated[AsyncSession, Depends(get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(get_auth_read_db)],
     payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
 ) -> UserResponse:
     """获取当前用户信息"""
@@ -152,15 +168,18 @@ async def api_update_password(
 @router.post("/refresh", response_model=LoginResponse)
 async def api_refresh(
     db_session: Annotated[AsyncSession, Depends(get_auth_db)],
-    payload: Annotated[RefreshTokenPayload, Depends(authenticate_refresh_token)],
+    payload: Annotated[
+        RefreshTokenPayload, Depends(authenticate_rotating_refresh_token)
+    ],
     response: Response,
 ) -> LoginResponse:
     """刷新令牌"""
     auth_logger.info("User refresh token")
-    # 撤销旧的刷新令牌
-    await revoke_refresh_token(db_session, payload.jti, payload.sub)
-    # 登录
-    user, tokens = await login_by_user_id(db_session, payload.sub, response)
+    # 获取用户的权限范围，组和权限范围来自缓存
+    _, _, scopes = await get_user(db_session, payload.sub, options="scope")
+    # 在同一事务中撤销旧的刷新令牌并创建新令牌
+    tokens = await rotate_refresh_token(db_session, payload, scopes)
+    set_refresh_token_cookie(response, tokens["refresh_token"])
     return LoginResponse(**tokens)
 
 
@@ -172,4 +191,4 @@ async def api_logout(
     """用户登出"""
     auth_logger.info("User logout")
     # 撤销旧的刷新令牌
-    await revoke_refresh_token(db_session, payload.jti, payload.sub)
+    await revoke_refresh_token(db_session, payload.jti, payload.sub, payload.exp)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
 
 
 class MessageItem(BaseModel):
@@ -13,6 +13,23 @@ class MessageItem(BaseModel):
 class GetUploadPresignedUrlRequest(BaseModel):
     conversation_id: int
     suffixes: list[str]
+    hashes: list[str] | None = Field(
+        default=None, description="图片内容的 sha256 十六进制摘要，与 suffixes 一一对应"
+    )
+
+    @field_validator("hashes")
+    @classmethod
+    def validate_hashes(
+        cls, v: list[str] | None, info: ValidationInfo
+    ) -> list[str] | None:
+        if v is None:
+            return v
+        if len(v) != len(info.data.get("suffixes", [])):
+            raise ValueError("hashes 与 suffixes 数量不一致")
+        for h in v:
+            if len(h) != 64 or any(c not in "0123456789abcdefABCDEF" for c in h):
+                raise ValueError("hash 必须为 sha256 十六进制摘要")
+        return v
 
 
 class SendMessageRequest(BaseModel):
@@ -35,10 +52,18 @@ class WebSocketChatRequest(BaseModel):
 
 class GetUploadPresignedUrlResponse(BaseModel):
     urls: list[str]
+    cos_urls: list[str] = Field(default_factory=list, description="cos:// 引用")
+    exists: list[bool] = Field(
+        default_factory=list, description="对象是否已存在，已存在时可跳过上传"
+    )
 
 
 class MessageListResponse(BaseModel):
     messages: list[MessageItem]
+    has_more: bool = Field(default=False, description="是否还有更早的消息")
+    next_before_id: int | None = Field(
+        default=None, description="加载更早消息时使用的游标"
+    )
 
 
 class ConversationTitleResponse(BaseModel):
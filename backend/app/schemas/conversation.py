@@ -22,7 +22,47 @@ class ConversationResponse(BaseModel):
     title: str | None
     update_at: datetime
     model_config_id: int | None
+    message_count: int = 0
+    total_prompt_tokens: int = 0
+    total_completion_tokens: int = 0
+    last_message_at: datetime | None = None
+    last_message_preview: str | None = None
 
 
 class ConversationListResponse(BaseModel):
     conversations: list[ConversationResponse]
+    has_more: bool = Field(default=False, description="是否还有更多对话")
+    next_before_at: datetime | None = Field(default=None, description="下一页游标时间")
+    next_before_id: int | None = Field(default=None, description="下一页游标ID")
+
+
+class ConversationSearchHit(BaseModel):
+    conversation_id: int
+    title: str
+    highlights: list[tuple[int, int]] = Field(
+        default_factory=list, description="标题中命中位置 [start, end)"
+    )
+
+
+class MessageSearchHit(BaseModel):
+    message_id: int
+    conversation_id: int
+    conversation_title: str | None
+    role: str
+    snippet: str = Field(..., description="命中位置附近的摘要")
+    highlights: list[tuple[int, int]] = Field(
+        default_factory=list, description="摘要中命中位置 [start, end)"
+    )
+    timestamp: datetime
+
+
+class SearchResponse(BaseModel):
+    conversations: list[ConversationSearchHit]
+    messages: list[MessageSearchHit]
+    has_more: bool = Field(default=False, description="是否还有更多消息")
+    next_before_id: int | None = Field(default=None, description="下一页游标ID")
+
+
+class ImportConversationsResponse(BaseModel):
+    conversations: int = Field(..., description="导入的对话数")
+    messages: int = Field(..., description="导入的消息数")
@@ -0,0 +1,181 @@
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.entities.chat import Conversation, Message
+from app.utils.cos import delete_object, get_object, put_object
+from app.utils.log import app_logger
+from app.utils.message_codec import decode_content, encode_content
+
+
+def _archive_key(user_id: int, conversation_id: int) -> str:
+    """生成归档对象的 cos_key"""
+    return f"archive/{user_id}/{conversation_id}.ndjson.gz"
+
+
+async def _dump_messages(db_session: AsyncSession, conversation_id: int) -> bytes:
+    """将对话消息逐行写入 gzip 压缩的 NDJSON"""
+    buffer = io.BytesIO()
+    stmt = (
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.id.asc())
+        .execution_options(yield_per=500)
+    )
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as f:
+        async for message in await db_session.stream_scalars(stmt):
+            line = {
+                "id": message.id,
+                "user_id": message.user_id,
+                "role": message.role,
+                "content": decode_content(
+                    message.content,
+                    message.content_format,
+                    message.content_compressed,
+                ),
+                "timestamp": message.timestamp.isoformat(),
+                "prompt_tokens": message.prompt_tokens,
+                "completion_tokens": message.completion_tokens,
+            }
+            f.write(json.dumps(line, ensure_ascii=False).encode() + b"\n")
+    return buffer.getvalue()
+
+
+async def archive_conversation(
+    db_session: AsyncSession, conversation: Conversation
+) -> bool:
+    """
+    归档单个对话
+
+    消息写入对象存储后删除消息行，对话行保留 archived_key 作为存根，
+    归档期间对话有新消息时放弃本次归档
+    """
+    key = _archive_key(conversation.user_id, conversation.id)
+    last_message_at = conversation.last_message_at
+    body = await _dump_messages(db_session, conversation.id)
+    await db_session.commit()  # 结束读事务
+    await put_object(key, body)
+
+    try:
+        result = await db_session.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation.id,
+                Conversation.archived_key.is_(None),
+                Conversation.last_message_at == last_message_at,
+            )
+            .values(archived_key=key)
+        )
+        if result.rowcount != 1:  # 对话在归档期间发生变化
+            await db_session.rollback()
+            await delete_object(key)
+            return False
+        await db_session.execute(
+            delete(Message).where(Message.conversation_id == conversation.id)
+        )
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        raise
+    return True
+
+
+async def archive_idle_conversations(db_session: AsyncSession) -> int:
+    """归档长期未活跃的对话，返回归档数量"""
+    cutoff = datetime.now() - timedelta(days=CFG.archive.idle_days)
+    stmt = (
+        select(Conversation)
+        .where(
+            Conversation.archived_key.is_(None),
+            Conversation.deleted_at.is_(None),
+            Conversation.last_message_at < cutoff,
+            Conversation.message_count > 0,
+        )
+        .order_by(Conversation.last_message_at.asc())
+        .limit(CFG.archive.batch_size)
+    )
+    result = await db_session.execute(stmt)
+    conversations = result.scalars().all()
+    archived = 0
+    for conversation in conversations:
+        try:
+            if await archive_conversation(db_session, conversation):
+                archived += 1
+        except Exception as e:
+            app_logger.error(f"Archive conversation {conversation.id} failed: {e}")
+    app_logger.info(f"Archived conversations: {archived}/{len(conversations)}")
+    return archived
+
+
+async def run_archiver(db_session: AsyncSession) -> None:
+    """后台归档任务"""
+    await archive_idle_conversations(db_session)
+
+
+async def rehydrate_conversation(
+    db_session: AsyncSession, conversation_id: int
+) -> bool:
+    """
+    恢复已归档的对话
+
+    从对象存储读取消息并按原 id 写回消息表，对话未归档时返回 False
+    """
+    stmt = select(Conversation.archived_key).where(
+        Conversation.id == conversation_id, Conversation.deleted_at.is_(None)
+    )
+    key = (await db_session.execute(stmt)).scalar_one_or_none()
+    if key is None:
+        return False
+
+    body = await get_object(key)
+    rows = []
+    for line in gzip.decompress(body).splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        content, content_format, content_compressed = encode_content(item["content"])
+        rows.append(
+            {
+                "id": item["id"],
+                "user_id": item["user_id"],
+                "conversation_id": conversation_id,
+                "role": item["role"],
+                "content": content,
+                "content_format": content_format,
+                "content_compressed": content_compressed,
+                "timestamp": datetime.fromisoformat(item["timestamp"]),
+                "prompt_tokens": item.get("prompt_tokens", 0),
+                "completion_tokens": item.get("completion_tokens", 0),
+            }
+        )
+
+    try:
+        # 加锁并再次确认，避免并发恢复
+        stmt = (
+            select(Conversation.archived_key)
+            .where(Conversation.id == conversation_id)
+            .with_for_update()
+        )
+        if (await db_session.execute(stmt)).scalar_one_or_none() != key:
+            await db_session.rollback()
+            return False
+        for i in range(0, len(rows), 500):
+            await db_session.execute(insert(Message), rows[i : i + 500])
+        await db_session.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(archived_key=None)
+        )
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        raise
+
+    await delete_object(key)
+    app_logger.info(f"Rehydrated conversation {conversation_id}: {len(rows)} messages")
+    return True
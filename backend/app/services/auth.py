@@ -1,3 +1,4 @@
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
@@ -14,15 +15,31 @@ from app.exceptions.auth import (
 )
 from app.schemas.user import AccessTokenPayload, RefreshTokenPayload
 from app.services.database import get_auth_db
+from app.utils.cache import cache_backend
 from app.utils.context import user_id_ctx
+from app.utils.lru_cache import LRUCache
+from app.utils.token_cache import RefreshTokenCache
 from fastapi import Cookie, Depends, Header
 from fastapi.security import SecurityScopes
 from pydantic import ValidationError
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 BEIJING_TZ = timezone(timedelta(hours=8))  # 北京时间时区（UTC+8）
 
+ACCESS_TOKEN_ENTRY_BYTES = 1024  # 单个条目的估算内存占用(令牌字符串 + 解析结果)
+
+refresh_token_cache = RefreshTokenCache(cache_backend)
+# 解析通过的访问令牌，访问令牌不可撤销，缓存到令牌过期为止与每次解析等价
+access_token_cache: LRUCache[str, AccessTokenPayload] = LRUCache(
+    CFG.cache.access_token_max_bytes, lambda _: ACCESS_TOKEN_ENTRY_BYTES
+)
+
+
+def _as_beijing(value: datetime) -> datetime:
+    """数据库中的时间不带时区，按北京时间处理"""
+    return value.replace(tzinfo=BEIJING_TZ) if value.tzinfo is None else value
+
 
 def _generate_refresh_token(user_id: int, scopes: list[str]) -> dict:
     """生成刷新令牌"""
@@ -75,6 +92,7 @@ async def create_token(
     except Exception:
         await db_session.rollback()
         raise
+    refresh_token_cache.add_valid(jti, user_id, expire.timestamp())
 
     # 生成访问令牌
     a_token = _generate_access_token(jti, user_id, scopes)
@@ -86,10 +104,52 @@ async def create_token(
     }
 
 
+async def rotate_refresh_token(
+    db_session: AsyncSession, payload: RefreshTokenPayload, scopes: list[str]
+) -> dict:
+    """
+    轮换刷新令牌，返回新的刷新令牌和访问令牌
+
+    在同一事务中以条件更新撤销旧令牌并写入新令牌，条件更新同时校验旧令牌有效，
+    并发使用同一令牌刷新时只有一个请求成功
+    """
+    _rt = _generate_refresh_token(payload.sub, scopes)
+    jti, expire, r_token = _rt["jti"], _rt["expire"], _rt["token"]
+
+    try:
+        result = await db_session.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.jti == payload.jti,
+                RefreshToken.user_id == payload.sub,
+                RefreshToken.yn == 1,
+                RefreshToken.expires_at > func.now(),
+            )
+            .values(yn=0)
+        )
+        if result.rowcount != 1:
+            raise InvalidRefreshTokenError  # 刷新令牌不存在、已撤销或已过期
+        db_session.add(RefreshToken(jti=jti, user_id=payload.sub, expires_at=expire))
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        raise
+    await refresh_token_cache.revoke([(payload.jti, payload.exp)])
+    refresh_token_cache.add_valid(jti, payload.sub, expire.timestamp())
+
+    a_token = _generate_access_token(jti, payload.sub, scopes)
+
+    return {
+        "access_token": a_token,
+        "refresh_token": r_token,
+        "token_type": "bearer",
+    }
+
+
 async def revoke_refresh_token(
-    db_session: AsyncSession, jti: str, user_id: int
+    db_session: AsyncSession, jti: str, user_id: int, expires_at: float
 ) -> None:
-    """在数据库中撤销刷新令牌"""
+    """在数据库中撤销刷新令牌，并通知所有 worker 更新校验缓存"""
     try:
         stmt = (
             update(RefreshToken)
@@ -105,11 +165,19 @@ async def revoke_refresh_token(
     except Exception:
         await db_session.rollback()
         raise
+    await refresh_token_cache.revoke([(jti, expires_at)])
 
 
 async def revoke_all_refresh_tokens(db_session: AsyncSession, user_id: int) -> None:
-    """撤销用户所有刷新令牌"""
+    """撤销用户所有刷新令牌，并通知所有 worker 更新校验缓存"""
     try:
+        # 锁定用户的有效令牌，撤销期间新建的令牌等待提交后再写入
+        stmt = (
+            select(RefreshToken.jti, RefreshToken.expires_at)
+            .where(RefreshToken.user_id == user_id, RefreshToken.yn == 1)
+            .with_for_update()
+        )
+        tokens = (await db_session.execute(stmt)).all()
         stmt = (
             update(RefreshToken)
             .where(
@@ -123,6 +191,9 @@ async def revoke_all_refresh_tokens(db_session: AsyncSession, user_id: int) -> N
     except:
         await db_session.rollback()
         raise
+    await refresh_token_cache.revoke(
+        [(jti, _as_beijing(expires_at).timestamp()) for jti, expires_at in tokens]
+    )
 
 
 # --- 验证访问令牌 ---
@@ -140,11 +211,18 @@ def _get_access_token(
 def _decode_access_token(
     access_token: Annotated[str, Depends(_get_access_token)],
 ) -> AccessTokenPayload:
-    """解析访问令牌"""
+    """解析访问令牌，解析结果按令牌缓存，缓存的结果在请求间共享，不可修改"""
+    payload = access_token_cache.get(access_token)
+    if payload is not None:
+        if payload.exp > time.time():
+            return payload
+        access_token_cache.delete(access_token)
+        raise ExpiredAccessTokenError  # 访问令牌过期
     try:
         payload = jwt.decode(access_token, CFG.auth.secret_key, [CFG.auth.algorithm])
         payload["scope"] = payload["scope"].split()
         payload = AccessTokenPayload(**payload)
+        access_token_cache.set(access_token, payload)
         return payload
     except jwt.ExpiredSignatureError:
         raise ExpiredAccessTokenError  # 访问令牌过期
@@ -193,6 +271,13 @@ async def authenticate_refresh_token(
     # 设置 user_id 到 ContextVar
     user_id_ctx.set(str(payload.sub))
 
+    # 优先使用缓存校验
+    cached = await refresh_token_cache.check(payload.jti, payload.sub)
+    if cached is False:  # 刷新令牌已被撤销
+        raise InvalidRefreshTokenError
+    if cached:
+        return payload
+
     # 验证刷新令牌是否在数据库中且未被撤销
     stmt = select(RefreshToken.yn, RefreshToken.expires_at).where(
         RefreshToken.jti == payload.jti, RefreshToken.user_id == payload.sub
@@ -207,9 +292,25 @@ async def authenticate_refresh_token(
     if not yn:  # 刷新令牌已被撤销
         raise InvalidRefreshTokenError
 
-    if expires_at.tzinfo is None:  # 确保有时区信息并检查是否过期
-        expires_at = expires_at.replace(tzinfo=BEIJING_TZ)
+    expires_at = _as_beijing(expires_at)  # 确保有时区信息并检查是否过期
     if datetime.now(BEIJING_TZ) > expires_at:
         raise ExpiredRefreshTokenError  # 刷新令牌过期
 
+    refresh_token_cache.add_valid(payload.jti, payload.sub, expires_at.timestamp())
+    return payload
+
+
+async def authenticate_rotating_refresh_token(
+    payload: Annotated[RefreshTokenPayload, Depends(_decode_refresh_token)],
+) -> RefreshTokenPayload:
+    """
+    验证待轮换的刷新令牌
+
+    只用缓存排除已撤销的令牌，令牌是否有效由 rotate_refresh_token 的条件更新保证
+    """
+    # 设置 user_id 到 ContextVar
+    user_id_ctx.set(str(payload.sub))
+
+    if await refresh_token_cache.check(payload.jti, payload.sub) is False:
+        raise InvalidRefreshTokenError  # 刷新令牌已被撤销
     return payload
@@ -1,6 +1,8 @@
 import asyncio
 import json
 from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import timedelta
 
 from openai import (
     APIError as OpenAIError,
@@ -20,29 +22,219 @@ from openai import (
 from openai import (
     RateLimitError as OpenAIRateLimitError,
 )
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.entities.chat import Message
+from app.config import CFG
+from app.entities.chat import Conversation, Message
+from app.exceptions.conversation import ConversationNotFoundError
 from app.schemas.chat import MessageItem
+from app.services.archive import rehydrate_conversation
+from app.services.database import db_manager
+from app.services.image_ref import add_image_refs, content_image_keys
+from app.services.partition import message_partition_lock
+from app.utils.cache import TieredCache, cache_backend
 from app.utils.call_model import call_model, stream_model
 from app.utils.cos import extract_cos_key, get_get_presigned_url
 from app.utils.log import app_logger
+from app.utils.lru_cache import LRUCache
+from app.utils.message_codec import content_preview, decode_content, encode_content
 
+PARTITION_PRUNE_SLACK = timedelta(days=1)  # 按对话创建时间裁剪分区时的余量
+CONTEXT_PAGE_SIZE = 200  # 读取模型上下文时每页的消息数
 
-async def get_messages(
-    db_session: AsyncSession, conversation_id: int
-) -> Sequence[Message]:
-    """获取消息列表"""
-    stmt = (
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.timestamp.asc())
+
+@dataclass
+class HistoryCacheEntry:
+    """对话最近消息缓存"""
+
+    messages: list[MessageItem]  # 按 id 升序的最近消息
+    complete: bool  # 是否包含对话的第一条消息
+
+
+def _history_entry_size(entry: HistoryCacheEntry) -> int:
+    """估算缓存条目占用的字节数"""
+    size = 0
+    for message in entry.messages:
+        content = message.content
+        if isinstance(content, list):
+            size += sum(len(k) + len(v) for c in content for k, v in c.items())
+        else:
+            size += len(content)
+        size += 200  # 对象本身及其余字段的开销
+    return size
+
+
+def _encode_history_entry(entry: HistoryCacheEntry) -> dict:
+    return {
+        "messages": [m.model_dump(mode="json") for m in entry.messages],
+        "complete": entry.complete,
+    }
+
+
+def _decode_history_entry(data: dict) -> HistoryCacheEntry:
+    return HistoryCacheEntry(
+        messages=[MessageItem.model_validate(m) for m in data["messages"]],
+        complete=data["complete"],
+    )
+
+
+history_cache: TieredCache[HistoryCacheEntry] = TieredCache(
+    "history",
+    LRUCache(CFG.cache.history_max_bytes, _history_entry_size),
+    cache_backend,
+    _encode_history_entry,
+    _decode_history_entry,
+    ttl=24 * 3600,
+)
+
+
+async def _get_cached_messages(
+    conversation_id: int, limit: int
+) -> tuple[list[MessageItem], bool] | None:
+    """从缓存获取最近一页消息，缓存不足一页时返回 None"""
+    entry = await history_cache.get(conversation_id)
+    if entry is None:
+        return None
+    has_more = len(entry.messages) > limit
+    if not has_more and not entry.complete:  # 缓存的消息不够一页
+        return None
+    # 返回副本，避免预签名处理修改缓存中的 cos_url
+    return [m.model_copy(deep=True) for m in entry.messages[-limit:]], has_more
+
+
+async def _latest_message_id(conversation_id: int) -> int | None:
+    """从主库读取对话最新一条消息的 id"""
+    async with db_manager.get_session_maker("app")() as primary_session:
+        stmt = select(func.max(Message.id)).where(
+            Message.conversation_id == conversation_id
+        )
+        return (await primary_session.execute(stmt)).scalar_one()
+
+
+async def _fill_history_cache(
+    conversation_id: int, messages: list[MessageItem], has_more: bool
+) -> None:
+    """
+    缓存最近一页消息
+
+    写入消息后直接删除缓存，读取时回填；回填的数据可能在删除之前读出，
+    因此回填后按主库最新消息 id 校验，已有更新的消息时删除刚写入的条目
+    """
+    await history_cache.set(
+        conversation_id,
+        HistoryCacheEntry(
+            messages=[m.model_copy(deep=True) for m in messages],
+            complete=not has_more,
+        ),
+    )
+    version = messages[-1].message_id if messages else None
+    if await _latest_message_id(conversation_id) != version:
+        await history_cache.delete(conversation_id)
+
+
+async def _query_messages(
+    db_session: AsyncSession, conversation_id: int, before_id: int | None, limit: int
+) -> tuple[list[MessageItem], bool]:
+    """从数据库按 id 倒序读取一页消息"""
+    stmt = select(Conversation.create_at).where(
+        Conversation.id == conversation_id,
+        Conversation.deleted_at.is_(None),  # 已删除对话的消息不可见
+    )
+    create_at = (await db_session.execute(stmt)).scalar_one_or_none()
+    if create_at is None:
+        return [], False
+    stmt = select(Message).where(
+        Message.conversation_id == conversation_id,
+        # 消息时间不早于对话创建时间，以常量作为下界使消息表只扫描对话存续期间的分区，
+        # 留出余量容忍应用与数据库的时钟偏差
+        Message.timestamp >= create_at - PARTITION_PRUNE_SLACK,
     )
+    if before_id is not None:
+        stmt = stmt.where(Message.id < before_id)
+    stmt = stmt.order_by(Message.id.desc()).limit(limit + 1)  # 多取一条判断是否还有更多
     result = await db_session.execute(stmt)
-    messages = result.scalars().all()
-    for message in messages:  # 将json字符串转换为str或list[dict]
-        message.content = json.loads(message.content)
+    rows = list(result.scalars().all())
+    messages = [
+        MessageItem(
+            message_id=row.id,
+            role=row.role,
+            # 仅多模态消息需要解析json字符串
+            content=decode_content(
+                row.content, row.content_format, row.content_compressed
+            ),
+            timestamp=row.timestamp,
+        )
+        for row in reversed(rows[:limit])
+    ]
+    return messages, len(rows) > limit
+
+
+async def _is_archived(db_session: AsyncSession, conversation_id: int) -> bool:
+    stmt = select(Conversation.archived_key).where(Conversation.id == conversation_id)
+    return (await db_session.execute(stmt)).scalar_one_or_none() is not None
+
+
+async def get_messages(
+    db_session: AsyncSession,
+    conversation_id: int,
+    before_id: int | None = None,
+    limit: int = 50,
+) -> tuple[list[MessageItem], bool]:
+    """
+    按 id 游标分页获取消息列表
+
+    返回 id 小于 before_id 的最近 limit 条消息（按 id 升序）以及是否还有更早的消息，
+    最近一页优先从缓存读取，读到对话开头时恢复已归档的消息
+    """
+    if before_id is None:
+        cached = await _get_cached_messages(conversation_id, limit)
+        if cached is not None:
+            return cached
+
+    messages, has_more = await _query_messages(
+        db_session, conversation_id, before_id, limit
+    )
+    if not has_more and await _is_archived(db_session, conversation_id):
+        # 恢复归档需要写入，使用主库会话（db_session 可能是只读副本会话）
+        async with db_manager.get_session_maker("app")() as primary_session:
+            async with message_partition_lock(primary_session):
+                rehydrated = await rehydrate_conversation(
+                    primary_session, conversation_id
+                )
+            if rehydrated:
+                messages, has_more = await _query_messages(
+                    primary_session, conversation_id, before_id, limit
+                )
+
+    if before_id is None:  # 缓存最近一页
+        await _fill_history_cache(conversation_id, messages, has_more)
+    return messages, has_more
+
+
+async def _load_context(
+    db_session: AsyncSession, conversation_id: int, user_id: int
+) -> list[MessageItem]:
+    """
+    从数据库读取对话的全部消息作为模型上下文
+
+    客户端只持有最近一页消息，上下文以数据库为准，读到开头时恢复已归档的消息
+    """
+    stmt = select(Conversation.id).where(
+        Conversation.id == conversation_id,
+        Conversation.user_id == user_id,
+        Conversation.deleted_at.is_(None),
+    )
+    if (await db_session.execute(stmt)).scalar_one_or_none() is None:
+        raise ConversationNotFoundError
+    messages, has_more = await get_messages(
+        db_session, conversation_id, limit=CONTEXT_PAGE_SIZE
+    )
+    while has_more:
+        page, has_more = await get_messages(
+            db_session, conversation_id, messages[0].message_id, CONTEXT_PAGE_SIZE
+        )
+        messages = page + messages
     return messages
 
 
@@ -81,23 +273,57 @@ async def _save_message_in_db(
     last_message: MessageItem,
     user_id: int,
     conversation_id: int,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
 ) -> Message:
     """保存消息到数据库"""
+    content, content_format, content_compressed = encode_content(last_message.content)
+    # 发送时间是主键的一部分，需在插入前确定以便插入后按主键刷新；
+    # 取数据库时间，与会话时区和 CURRENT_TIMESTAMP 默认值一致，NOW() 只精确到秒
+    now = (await db_session.execute(select(func.now()))).scalar_one()
     message = Message(
         user_id=user_id,
         conversation_id=conversation_id,
         role=last_message.role,
-        content=json.dumps(
-            last_message.content, ensure_ascii=False
-        ),  # 将str或list[dict]转换为json字符串
+        content=content,
+        content_format=content_format,
+        content_compressed=content_compressed,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        timestamp=now,
     )
     db_session.add(message)
     try:
+        # 同一事务内更新对话的活跃信息
+        result = await db_session.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation_id, Conversation.deleted_at.is_(None)
+            )
+            .values(
+                message_count=Conversation.message_count + 1,
+                total_prompt_tokens=Conversation.total_prompt_tokens + prompt_tokens,
+                total_completion_tokens=Conversation.total_completion_tokens
+                + completion_tokens,
+                last_message_at=now,
+                last_message_preview=content_preview(last_message.content),
+            )
+        )
+        if result.rowcount != 1:
+            raise ConversationNotFoundError  # 对话不存在或已删除
+        await add_image_refs(
+            db_session,
+            user_id,
+            conversation_id,
+            content_image_keys(user_id, [last_message.content]),
+        )
         await db_session.commit()
         await db_session.refresh(message)
     except Exception:
         await db_session.rollback()
         raise
+    # 删除缓存，下次读取时回填，避免多个 worker 并发追加时互相覆盖
+    await history_cache.delete(conversation_id)
     return message
 
 
@@ -111,11 +337,15 @@ async def stream_response(
     params: dict | None,
     db_session: AsyncSession,
 ):
-    """流式返回AI回复"""
+    """
+    流式返回AI回复
+
+    只使用客户端消息列表中的最后一条用户消息，模型上下文从数据库读取完整的对话历史
+    """
     try:
         app_logger.info(f"Received messages ({len(messages)})")
         # 转换图片url为cos_url
-        await image_url_to_cos_url(messages)
+        await image_url_to_cos_url(messages[-1:])
         # 用户消息存入数据库
         user_message_id = messages[-1].message_id
         if not user_message_id:  # 如果没有消息id才存入数据库
@@ -123,7 +353,8 @@ async def stream_response(
                 db_session, messages[-1], user_id, conversation_id
             )
             user_message_id = user_message.id
-        # 转换cos_url为预签名下载url
+        # 读取完整的对话历史作为上下文，转换cos_url为预签名下载url
+        messages = await _load_context(db_session, conversation_id, user_id)
         await image_url_to_get_presigned_url(messages)
 
         # 返回用户消息id
@@ -135,8 +366,9 @@ async def stream_response(
 
         # 流式调用模型
         chunks: list[str] = []
+        usage: dict[str, int] = {}
         async for chunk in stream_model(
-            messages, base_url, model_name, api_key, params
+            messages, base_url, model_name, api_key, params, usage
         ):
             chunks.append(chunk)
             yield (
@@ -150,6 +382,8 @@ async def stream_response(
             MessageItem(role="assistant", content="".join(chunks)),
             user_id,
             conversation_id,
+            usage.get("prompt_tokens", 0),
+            usage.get("completion_tokens", 0),
         )
 
         # 发送完成信号，返回AI消息id
@@ -1,19 +1,44 @@
-from collections.abc import Sequence
+from datetime import datetime
 
-from sqlalchemy import delete, select
+from sqlalchemy import and_, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.entities.chat import Conversation, Message
+from app.entities.chat import Conversation
 from app.exceptions.conversation import ConversationNotFoundError
+from app.services.chat import history_cache
 
 
 async def get_conversations(
-    db_session: AsyncSession, user_id: int
-) -> Sequence[Conversation]:
-    """获取对话列表"""
-    stmt = select(Conversation).where(Conversation.user_id == user_id)
+    db_session: AsyncSession,
+    user_id: int,
+    before_at: datetime | None = None,
+    before_id: int | None = None,
+    limit: int = 50,
+) -> tuple[list[Conversation], bool]:
+    """
+    按最近活跃时间游标分页获取对话列表
+
+    游标为上一页最后一条对话的 (last_message_at, id)，返回对话列表以及是否还有更多
+    """
+    stmt = select(Conversation).where(
+        Conversation.user_id == user_id, Conversation.deleted_at.is_(None)
+    )
+    if before_at is not None and before_id is not None:
+        stmt = stmt.where(
+            or_(
+                Conversation.last_message_at < before_at,
+                and_(
+                    Conversation.last_message_at == before_at,
+                    Conversation.id < before_id,
+                ),
+            )
+        )
+    stmt = stmt.order_by(
+        Conversation.last_message_at.desc(), Conversation.id.desc()
+    ).limit(limit + 1)  # 多取一条判断是否还有更多
     result = await db_session.execute(stmt)
-    return result.scalars().all()
+    conversations = list(result.scalars().all())
+    return conversations[:limit], len(conversations) > limit
 
 
 async def create_conversation(
@@ -36,7 +61,9 @@ async def update_conversation_data(
 ) -> None:
     """更新对话标题或模型配置"""
     try:
-        stmt = select(Conversation).where(Conversation.id == conversation_id)
+        stmt = select(Conversation).where(
+            Conversation.id == conversation_id, Conversation.deleted_at.is_(None)
+        )
         result = await db_session.execute(stmt)
         conversation = result.scalar_one_or_none()
         if not conversation:
@@ -52,22 +79,29 @@ async def update_conversation_data(
         raise
 
 
-async def delete_conversations(db_session: AsyncSession, ids: list[int]) -> None:
-    """批量删除对话"""
+async def delete_conversations(
+    db_session: AsyncSession, user_id: int, ids: list[int]
+) -> None:
+    """
+    批量删除对话
+
+    只将属于该用户的对话标记为已删除，消息、图片和归档由后台清理任务删除
+    """
     try:
-        stmt = select(Conversation).where(Conversation.id.in_(ids))
-        result = await db_session.execute(stmt)
-        conversations = result.scalars().all()
-        if not conversations:
-            raise ConversationNotFoundError  # 对话不存在
-        # 删除关联的消息
-        await db_session.execute(
-            delete(Message).where(Message.conversation_id.in_(ids))
+        result = await db_session.execute(
+            update(Conversation)
+            .where(
+                Conversation.id.in_(ids),
+                Conversation.user_id == user_id,
+                Conversation.deleted_at.is_(None),
+            )
+            .values(deleted_at=func.now())
         )
-        # 删除对话
-        for conversation in conversations:
-            await db_session.delete(conversation)
+        if not result.rowcount:
+            raise ConversationNotFoundError  # 对话不存在
         await db_session.commit()
     except Exception:
         await db_session.rollback()
         raise
+    for conversation_id in ids:  # 清除缓存
+        await history_cache.delete(conversation_id)
@@ -0,0 +1,78 @@
+import asyncio
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.entities.chat import Conversation, Message
+from app.utils.log import app_logger
+
+
+def _aggregate(column):
+    """按对话聚合消息的关联子查询"""
+    return (
+        select(column)
+        .where(Message.conversation_id == Conversation.id)
+        .scalar_subquery()
+    )
+
+
+async def repair_conversation_counters(db_session: AsyncSession) -> int:
+    """
+    按批重新计算对话的计数器，返回处理的对话数
+
+    计数器在写入消息时同一事务内增量维护，该任务用于修复历史数据或异常导致的偏差；
+    每批在一条 UPDATE 中完成聚合和写入，不会覆盖并发写入的新消息，
+    已归档或已删除的对话消息不在消息表中，跳过
+    """
+    last_id = 0
+    total = 0
+    while True:
+        stmt = (
+            select(Conversation.id)
+            .where(
+                Conversation.id > last_id,
+                Conversation.archived_key.is_(None),
+                Conversation.deleted_at.is_(None),
+            )
+            .order_by(Conversation.id.asc())
+            .limit(CFG.counters.batch_size)
+        )
+        ids = (await db_session.execute(stmt)).scalars().all()
+        if not ids:
+            break
+        try:
+            await db_session.execute(
+                update(Conversation)
+                .where(Conversation.id.in_(ids))
+                .values(
+                    message_count=_aggregate(func.count()),
+                    total_prompt_tokens=_aggregate(
+                        func.coalesce(func.sum(Message.prompt_tokens), 0)
+                    ),
+                    total_completion_tokens=_aggregate(
+                        func.coalesce(func.sum(Message.completion_tokens), 0)
+                    ),
+                    last_message_at=func.coalesce(
+                        _aggregate(func.max(Message.timestamp)),
+                        Conversation.last_message_at,
+                    ),
+                    # 只修复计数器，保持更新时间不变
+                    update_at=Conversation.update_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db_session.commit()
+        except Exception:
+            await db_session.rollback()
+            raise
+        total += len(ids)
+        last_id = ids[-1]
+        await asyncio.sleep(CFG.counters.batch_interval_ms / 1000)
+    app_logger.info(f"Repaired conversation counters: {total}")
+    return total
+
+
+async def run_counter_repair(db_session: AsyncSession) -> None:
+    """后台计数器修复任务"""
+    await repair_conversation_counters(db_session)
@@ -1,41 +1,256 @@
+import asyncio
+import itertools
+import time
 from typing import AsyncGenerator
 
-from app.config import CFG
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.config import CFG, DBCfg
+from app.utils.cache import cache_backend
+from app.utils.context import user_id_ctx
+from app.utils.log import app_logger
+from app.utils.sharding import jump_hash
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+
+STICKY_CHANNEL = "db:sticky"
+
+
+class _PrimarySession(Session):
+    """
+    主库会话，提交写入后将当前用户的读请求短时间内路由到主库
+
+    分片的库首次执行语句时按当前用户选择分片，之后整个会话使用同一个引擎
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if "db_name" not in self.info:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        bind = self.info.get("bind")
+        if bind is None:
+            shard = db_manager.resolve(self.info["db_name"])
+            bind = db_manager.get_engine(shard).sync_engine
+            self.info["bind"] = bind
+        return bind
+
+
+@event.listens_for(_PrimarySession, "after_flush")
+def _on_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(_PrimarySession, "do_orm_execute")
+def _on_execute(orm_execute_state):
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(_PrimarySession, "after_commit")
+def _on_commit(session):
+    if session.info.pop("wrote", False):
+        db_manager.mark_written(user_id_ctx.get())
+
+
+@event.listens_for(_PrimarySession, "after_rollback")
+def _on_rollback(session):
+    session.info.pop("wrote", None)
+
+
+class _ReadSession(Session):
+    """只读会话，首次执行语句时选择引擎，之后整个会话使用同一个引擎"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        bind = self.info.get("bind")
+        if bind is None:
+            shard = db_manager.resolve(self.info["db_name"])
+            bind = db_manager.pick_read_engine(shard).sync_engine
+            self.info["bind"] = bind
+        return bind
+
+
+def _create_engine(cfg: DBCfg, host: str, port: int) -> AsyncEngine:
+    db_url = f"mysql+asyncmy://{cfg.user}:{cfg.password}@{host}:{port}/{cfg.database}"
+    return create_async_engine(
+        db_url,
+        echo=False,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_timeout=30,
+    )
 
 
 class DatabaseManager:
-    """数据库管理器"""
+    """
+    数据库管理器
+
+    - 分片: app 库可配置多个分片，按 user_id 的一致性哈希选择，引擎按需创建，
+      分片名为 app（分片 0）、app:1、app:2 ...
+    - 只读副本: 读多的接口使用只读会话，路由到延迟在阈值内的副本；
+      用户写入主库后的一段时间内，其读请求仍路由到主库，保证读到自己的写入
+    """
 
     def __init__(self):
         self.engines = {}
         self.session_makers = {}
+        self.replica_engines: dict[str, list[tuple[str, AsyncEngine]]] = {}
+        self.read_session_makers = {}
+        self.replica_lag: dict[str, float | None] = {}  # 副本延迟(秒)，None 表示不可用
+        self._round_robin: dict[str, itertools.count] = {}
+        self._sticky: dict[str, float] = {}  # user_id -> 读主库截止时间
+        self._publish_tasks: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _get_cfg(name: str) -> DBCfg:
+        base, _, index = name.partition(":")
+        if index:
+            return getattr(CFG.db, f"{base}_shards")[int(index) - 1]
+        return getattr(CFG.db, name)
+
+    @staticmethod
+    def shard_names(name: str) -> list[str]:
+        """获取库的所有分片名"""
+        if name != "app":
+            return [name]
+        return [name] + [f"{name}:{i}" for i in range(1, len(CFG.db.app_shards) + 1)]
+
+    def resolve(self, name: str, user_id: int | str | None = None) -> str:
+        """根据 user_id（默认取当前请求的用户）选择分片"""
+        shards = self.shard_names(name)
+        if len(shards) == 1:
+            return name
+        if user_id is None:
+            user_id = user_id_ctx.get()
+        if user_id is None:
+            raise RuntimeError(f"Cannot resolve shard of {name}: no user_id")
+        return shards[jump_hash(int(user_id), len(shards))]
 
     def get_engine(self, name: str):
         """获取或创建数据库引擎"""
         if name not in self.engines:
-            cfg = getattr(CFG.db, name)
-            db_url = f"mysql+asyncmy://{cfg.user}:{cfg.password}@{cfg.host}:{cfg.port}/{cfg.database}"
-            self.engines[name] = create_async_engine(
-                db_url,
-                echo=False,
-                pool_size=10,
-                max_overflow=20,
-                pool_pre_ping=True,
-                pool_recycle=1800,
-                pool_timeout=30,
-            )
+            cfg = self._get_cfg(name)
+            self.engines[name] = _create_engine(cfg, cfg.host, cfg.port)
         return self.engines[name]
 
+    def get_replica_engines(self, name: str) -> list[tuple[str, AsyncEngine]]:
+        """获取或创建副本引擎"""
+        if name not in self.replica_engines:
+            cfg = self._get_cfg(name)
+            self.replica_engines[name] = [
+                (f"{name}@{r.host}:{r.port}", _create_engine(cfg, r.host, r.port))
+                for r in cfg.replicas
+            ]
+            self._round_robin[name] = itertools.count()
+        return self.replica_engines[name]
+
     def get_session_maker(self, name: str):
-        """获取或创建会话工厂"""
+        """获取或创建会话工厂，分片的库按当前用户选择分片"""
         if name not in self.session_makers:
-            engine = self.get_engine(name)
-            self.session_makers[name] = async_sessionmaker(
-                engine, class_=AsyncSession, expire_on_commit=False
-            )
+            if len(self.shard_names(name)) > 1:
+                self.session_makers[name] = async_sessionmaker(
+                    class_=AsyncSession,
+                    sync_session_class=_PrimarySession,
+                    expire_on_commit=False,
+                    info={"db_name": name},
+                )
+            else:
+                self.session_makers[name] = async_sessionmaker(
+                    self.get_engine(name),
+                    class_=AsyncSession,
+                    sync_session_class=_PrimarySession,
+                    expire_on_commit=False,
+                )
         return self.session_makers[name]
 
+    def get_read_session_maker(self, name: str):
+        """获取或创建只读会话工厂，未配置副本时使用主库"""
+        if not any(self._get_cfg(i).replicas for i in self.shard_names(name)):
+            return self.get_session_maker(name)
+        if name not in self.read_session_makers:
+            self.read_session_makers[name] = async_sessionmaker(
+                class_=AsyncSession,
+                sync_session_class=_ReadSession,
+                expire_on_commit=False,
+                info={"db_name": name},
+            )
+        return self.read_session_makers[name]
+
+    def pick_read_engine(self, name: str) -> AsyncEngine:
+        """选择只读引擎，当前用户处于写后粘滞窗口或没有可用副本时返回主库"""
+        user_id = user_id_ctx.get()
+        if user_id is not None and self._sticky.get(user_id, 0) > time.monotonic():
+            return self.get_engine(name)
+        healthy = [
+            engine
+            for key, engine in self.get_replica_engines(name)
+            if (lag := self.replica_lag.get(key)) is not None
+            and lag <= CFG.db.max_replica_lag_seconds
+        ]
+        if not healthy:
+            return self.get_engine(name)
+        return healthy[next(self._round_robin[name]) % len(healthy)]
+
+    def mark_written(self, user_id: str | None) -> None:
+        """记录用户写入主库，并通知其他 worker"""
+        if user_id is None:
+            return
+        until = time.time() + CFG.db.sticky_seconds
+        self._set_sticky(user_id, until)
+        if cache_backend.shared:
+            task = asyncio.get_running_loop().create_task(
+                cache_backend.publish(STICKY_CHANNEL, f"{user_id}|{until}")
+            )
+            self._publish_tasks.add(task)
+            task.add_done_callback(self._publish_tasks.discard)
+
+    def _set_sticky(self, user_id: str, until: float) -> None:
+        # 广播使用墙上时间，本地转换为单调时间比较
+        deadline = time.monotonic() + (until - time.time())
+        if deadline > self._sticky.get(user_id, 0):
+            self._sticky[user_id] = deadline
+        if len(self._sticky) > 10000:  # 清理过期记录
+            now = time.monotonic()
+            self._sticky = {k: v for k, v in self._sticky.items() if v > now}
+
+    def _on_sticky(self, message: str) -> None:
+        user_id, _, until = message.partition("|")
+        self._set_sticky(user_id, float(until))
+
+    async def start(self) -> None:
+        """订阅其他 worker 的写入通知"""
+        if cache_backend.shared and self.has_replicas():
+            await cache_backend.subscribe(STICKY_CHANNEL, self._on_sticky)
+
+    def has_replicas(self) -> bool:
+        """是否配置了只读副本"""
+        names = self.shard_names("app") + self.shard_names("auth")
+        return any(self._get_cfg(name).replicas for name in names)
+
+    async def check_replica_lag(self) -> None:
+        """检查所有副本的复制延迟"""
+        for name in self.shard_names("app") + self.shard_names("auth"):
+            for key, engine in self.get_replica_engines(name):
+                try:
+                    async with engine.connect() as conn:
+                        result = await conn.execute(text("SHOW REPLICA STATUS"))
+                        row = result.mappings().first()
+                    lag = row["Seconds_Behind_Source"] if row else None
+                except Exception as e:
+                    app_logger.error(f"Check replica lag failed: {key}: {e}")
+                    lag = None
+                if lag is None or lag > CFG.db.max_replica_lag_seconds:
+                    app_logger.warning(f"Replica unavailable: {key}, lag={lag}")
+                self.replica_lag[key] = None if lag is None else float(lag)
+
     def get_db(self, name: str):
         """获取数据库会话依赖"""
 
@@ -49,13 +264,31 @@ class DatabaseManager:
 
         return _get_db
 
+    def get_read_db(self, name: str):
+        """获取只读数据库会话依赖"""
+
+        async def _get_read_db() -> AsyncGenerator[AsyncSession, None]:
+            session_maker = self.get_read_session_maker(name)
+            async with session_maker() as db_session:
+                try:
+                    yield db_session
+                finally:
+                    await db_session.close()
+
+        return _get_read_db
+
     async def close_all(self):
         """关闭所有数据库引擎"""
         for engine in self.engines.values():
             await engine.dispose()
+        for engines in self.replica_engines.values():
+            for _, engine in engines:
+                await engine.dispose()
 
 
 db_manager = DatabaseManager()
 
 get_app_db = db_manager.get_db("app")
 get_auth_db = db_manager.get_db("auth")
+get_app_read_db = db_manager.get_read_db("app")
+get_auth_read_db = db_manager.get_read_db("auth")
@@ -0,0 +1,119 @@
+"""
+按内容寻址的图片引用
+
+同一用户上传的相同图片在多个对话间共享同一对象，获取上传地址和保存消息时记录对话对图片的引用，
+清理对话时只删除不再被其他对话引用的图片；引用按对话记录，归档和恢复消息不影响引用
+"""
+
+from collections.abc import Iterable
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.entities.chat import Conversation, ImageRef
+from app.exceptions.conversation import ConversationNotFoundError
+from app.utils.cos import content_image_prefix, delete_object, extract_cos_key
+
+
+def content_image_keys(user_id: int, contents: Iterable[str | list[dict]]) -> set[str]:
+    """提取消息内容中属于该用户的按内容寻址图片的 cos_key"""
+    prefix = content_image_prefix(user_id)
+    keys = set()
+    for content in contents:
+        if not isinstance(content, list):
+            continue
+        for c_dict in content:
+            image_url = c_dict.get("image_url") if isinstance(c_dict, dict) else None
+            if isinstance(image_url, str):
+                cos_key = extract_cos_key(image_url)
+                if cos_key.startswith(prefix):
+                    keys.add(cos_key)
+    return keys
+
+
+async def add_image_refs(
+    db_session: AsyncSession, user_id: int, conversation_id: int, keys: set[str]
+) -> None:
+    """记录对话对图片的引用，随调用方的事务提交"""
+    if not keys:
+        return
+    await db_session.execute(
+        insert(ImageRef).prefix_with("IGNORE"),
+        [
+            {"cos_key": key, "conversation_id": conversation_id, "user_id": user_id}
+            for key in keys
+        ],
+    )
+
+
+async def reserve_image_refs(
+    db_session: AsyncSession, user_id: int, conversation_id: int, keys: set[str]
+) -> None:
+    """
+    获取上传地址时预先记录引用并刷新引用时间
+
+    客户端随后可能跳过上传或尚未发送消息，预先记录的引用使清理任务不会删除这些图片；
+    在检查对象是否存在之前提交，清理任务删除对象期间的新引用会等待删除完成
+    """
+    stmt = select(Conversation.id).where(
+        Conversation.id == conversation_id,
+        Conversation.user_id == user_id,
+        Conversation.deleted_at.is_(None),
+    )
+    if (await db_session.execute(stmt)).scalar_one_or_none() is None:
+        raise ConversationNotFoundError
+    stmt = mysql_insert(ImageRef).values(
+        [
+            {"cos_key": key, "conversation_id": conversation_id, "user_id": user_id}
+            for key in keys
+        ]
+    )
+    await db_session.execute(stmt.on_duplicate_key_update(create_at=func.now()))
+    await db_session.commit()
+
+
+async def delete_unreferenced_images(
+    db_session: AsyncSession, conversation_id: int
+) -> int:
+    """
+    删除只被该对话引用的图片对象，返回因处于宽限期而暂缓删除的数量
+
+    删除每个对象前锁定该图片的全部引用并重新检查，被其他对话引用时保留，
+    引用时间在宽限期内时暂缓，由调用方保留对话稍后重试；锁持有到对象删除完成，期间新增引用会等待。
+    引用行随对话一起删除，中途失败时引用仍保留，重新执行会再次删除相同的对象
+    """
+    stmt = select(ImageRef.cos_key).where(ImageRef.conversation_id == conversation_id)
+    keys = (await db_session.execute(stmt)).scalars().all()
+    await db_session.commit()  # 结束读事务
+    grace = timedelta(seconds=CFG.purge.image_grace_seconds)
+    deferred = 0
+    for key in keys:
+        try:
+            stmt = (
+                select(ImageRef.conversation_id, ImageRef.create_at)
+                .where(ImageRef.cos_key == key)
+                .with_for_update()
+            )
+            refs = (await db_session.execute(stmt)).all()
+            now = (await db_session.execute(select(func.now()))).scalar_one()
+            if any(ref.conversation_id != conversation_id for ref in refs):
+                pass  # 仍被其他对话引用
+            elif any(ref.create_at > now - grace for ref in refs):
+                deferred += 1
+            else:
+                await delete_object(key)
+            await db_session.commit()
+        except Exception:
+            await db_session.rollback()
+            raise
+    return deferred
+
+
+async def delete_image_refs(db_session: AsyncSession, conversation_id: int) -> None:
+    """删除对话的图片引用，随调用方的事务提交"""
+    await db_session.execute(
+        delete(ImageRef).where(ImageRef.conversation_id == conversation_id)
+    )
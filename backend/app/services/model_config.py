@@ -1,13 +1,20 @@
 from collections.abc import Sequence
+from functools import cache
 
-from faker import Faker
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.entities.chat import ModelConfig
+from app.config import CFG
+from app.entities.chat import Conversation, ModelConfig
 from app.exceptions.model_config import ModelConfigNotFoundError
 
-faker = Faker()
+
+@cache
+def _get_faker():
+    """生成默认配置名，faker 导入和初始化较慢，首次使用时再加载"""
+    from faker import Faker
+
+    return Faker()
 
 
 async def get_model_configs(
@@ -30,7 +37,7 @@ async def create_model_config(
 ) -> ModelConfig:
     """创建模型配置"""
     model_config = ModelConfig(
-        name=name or model_name or faker.word(),
+        name=name or model_name or _get_faker().word(),
         base_url=base_url,
         model_name=model_name,
         encrypted_api_key=encrypted_api_key,
@@ -74,16 +81,32 @@ async def update_model_config(
         raise
 
 
-async def delete_model_configs(db_session: AsyncSession, ids: list[int]) -> None:
-    """批量删除模型配置"""
-    stmt = select(ModelConfig).where(ModelConfig.id.in_(ids))
-    result = await db_session.execute(stmt)
-    model_configs = result.scalars().all()
-    if not model_configs:
-        raise ModelConfigNotFoundError  # 模型配置不存在
-    for model_config in model_configs:
-        await db_session.delete(model_config)
+async def delete_model_configs(
+    db_session: AsyncSession, user_id: int, ids: list[int]
+) -> None:
+    """批量删除模型配置，只删除属于该用户的配置"""
+    chunk_size = CFG.purge.chunk_size
+    deleted = 0
     try:
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i : i + chunk_size]
+            # 外键不级联，先解除对话(包括已删除待清理的对话)对配置的引用
+            await db_session.execute(
+                update(Conversation)
+                .where(
+                    Conversation.model_config_id.in_(chunk),
+                    Conversation.user_id == user_id,
+                )
+                .values(model_config_id=None)
+            )
+            result = await db_session.execute(
+                delete(ModelConfig).where(
+                    ModelConfig.id.in_(chunk), ModelConfig.user_id == user_id
+                )
+            )
+            deleted += result.rowcount
+        if not deleted:
+            raise ModelConfigNotFoundError  # 模型配置不存在
         await db_session.commit()
     except Exception:
         await db_session.rollback()
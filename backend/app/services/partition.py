@@ -0,0 +1,247 @@
+"""
+消息表分区维护
+
+消息表按发送时间每月一个分区，分区名为 pYYYYMM，另有 pmin 和 pmax 两个边界分区:
+- 预建: 从 pmax 中拆分出当前月及之后若干个月的分区，pmax 为空时拆分只修改元数据
+- 删除: 超过保留月数的分区先将其中未归档的对话归档到对象存储，再整体删除
+
+删除分区不触发触发器，删除前先清理 message_search 中对应的检索行；
+恢复归档和导入会写入历史时间的消息，写入期间持有分区锁，与删除分区互斥
+"""
+
+import asyncio
+import re
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import date
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config import CFG
+from app.entities.chat import Conversation, MessageSearch
+from app.services.archive import archive_conversation
+from app.utils.log import app_logger
+
+PARTITION_NAME = re.compile(r"^p(\d{4})(\d{2})$")
+# 锁名按库区分，多个分片共用一个 MySQL 实例时互不影响
+LOCK_NAME = "CONCAT(DATABASE(), ':message_partition')"
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    """获取 day 所在月份偏移 offset 个月后的第一天"""
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_month(name: str) -> date | None:
+    """解析分区对应的月份，边界分区返回 None"""
+    matched = PARTITION_NAME.match(name)
+    if not matched:
+        return None
+    return date(int(matched.group(1)), int(matched.group(2)), 1)
+
+
+async def _list_partitions(db_session: AsyncSession) -> list[str]:
+    """按顺序获取消息表的分区名，未分区时返回空列表"""
+    stmt = text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'message' "
+        "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+    )
+    return list((await db_session.execute(stmt)).scalars().all())
+
+
+@asynccontextmanager
+async def message_partition_lock(db_session: AsyncSession) -> AsyncIterator[None]:
+    """
+    写入历史时间的消息时持有分区锁，未启用分区删除时不加锁
+
+    锁在独立连接上获取，需在事务提交后再退出，保证删除分区前的检查能看到本次写入
+    """
+    if not CFG.partition.retention_months:
+        yield
+        return
+    engine = (await db_session.connection()).engine
+    async with engine.connect() as lock_conn:
+        acquired = await lock_conn.scalar(
+            text(f"SELECT GET_LOCK({LOCK_NAME}, :timeout)"),
+            {"timeout": CFG.partition.lock_timeout_seconds},
+        )
+        if not acquired:
+            raise TimeoutError("Acquire message partition lock timeout")
+        try:
+            yield
+        finally:
+            await lock_conn.execute(text(f"SELECT RELEASE_LOCK({LOCK_NAME})"))
+
+
+async def create_future_partitions(
+    db_session: AsyncSession, ddl_conn: AsyncConnection
+) -> list[str]:
+    """预建到之后 months_ahead 个月为止的分区，返回新建的分区名，DDL 在 ddl_conn 上执行"""
+    partitions = await _list_partitions(db_session)
+    if "pmax" not in partitions:
+        app_logger.warning("Table message is not partitioned, skip")
+        return []
+    months = [m for m in map(_partition_month, partitions) if m]
+    today = date.today()
+    # 从已有的最后一个月之后开始，任务中断过也不会跳过月份
+    start = _month_start(max(months), 1) if months else _month_start(today)
+    end = _month_start(today, CFG.partition.months_ahead)
+    new_months = []
+    while start <= end:
+        new_months.append(start)
+        start = _month_start(start, 1)
+    if not new_months:
+        return []
+
+    definitions = [
+        f"PARTITION p{m:%Y%m} VALUES LESS THAN ('{_month_start(m, 1)}')"
+        for m in new_months
+    ]
+    definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    await ddl_conn.execute(
+        text(
+            "ALTER TABLE message REORGANIZE PARTITION pmax "
+            f"INTO ({', '.join(definitions)})"
+        )
+    )
+    return [f"p{m:%Y%m}" for m in new_months]
+
+
+async def _archive_partition(db_session: AsyncSession, name: str) -> bool:
+    """归档分区中仍有消息的对话，全部归档成功时返回 True"""
+    last_id = 0
+    while True:
+        stmt = text(
+            f"SELECT DISTINCT conversation_id FROM message PARTITION ({name}) "
+            "WHERE conversation_id > :last_id ORDER BY conversation_id LIMIT :limit"
+        )
+        conversation_ids = (
+            (
+                await db_session.execute(
+                    stmt, {"last_id": last_id, "limit": CFG.archive.batch_size}
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not conversation_ids:
+            return True
+        last_id = conversation_ids[-1]
+        stmt = select(Conversation).where(
+            Conversation.id.in_(conversation_ids),
+            Conversation.archived_key.is_(None),
+            Conversation.deleted_at.is_(None),  # 已删除的对话由清理任务处理
+        )
+        conversations = (await db_session.execute(stmt)).scalars().all()
+        await db_session.commit()
+        for conversation in conversations:
+            try:
+                if not await archive_conversation(db_session, conversation):
+                    return False
+            except Exception as e:
+                app_logger.error(f"Archive conversation {conversation.id} failed: {e}")
+                return False
+
+
+async def _has_active_messages(conn: AsyncConnection, name: str) -> bool:
+    """分区中是否还有未归档且未删除的对话的消息"""
+    stmt = text(
+        f"SELECT 1 FROM message PARTITION ({name}) m "
+        "JOIN conversation c ON c.id = m.conversation_id "
+        "WHERE c.archived_key IS NULL AND c.deleted_at IS NULL LIMIT 1"
+    )
+    return (await conn.execute(stmt)).first() is not None
+
+
+async def _delete_search_rows(db_session: AsyncSession, name: str) -> None:
+    """分批删除分区中消息的检索行"""
+    chunk_size = CFG.purge.chunk_size
+    last_id = 0
+    while True:
+        stmt = text(
+            f"SELECT id FROM message PARTITION ({name}) "
+            "WHERE id > :last_id ORDER BY id LIMIT :limit"
+        )
+        message_ids = (
+            (await db_session.execute(stmt, {"last_id": last_id, "limit": chunk_size}))
+            .scalars()
+            .all()
+        )
+        if not message_ids:
+            return
+        last_id = message_ids[-1]
+        await db_session.execute(
+            delete(MessageSearch).where(MessageSearch.message_id.in_(message_ids))
+        )
+        await db_session.commit()
+        await asyncio.sleep(CFG.purge.chunk_interval_ms / 1000)
+
+
+async def drop_expired_partitions(
+    db_session: AsyncSession, ddl_conn: AsyncConnection
+) -> list[str]:
+    """
+    删除超过保留月数的分区，返回删除的分区名
+
+    加锁、再次检查、删除分区和释放锁都在 ddl_conn 上执行；会话提交后会换用连接池中的其他连接，
+    不能在会话上持有锁
+    """
+    if not CFG.partition.retention_months:
+        return []
+    cutoff = _month_start(date.today(), -CFG.partition.retention_months)
+    dropped = []
+    for name in await _list_partitions(db_session):
+        month = _partition_month(name)
+        if month is None:
+            continue
+        if _month_start(month, 1) > cutoff:  # 分区之后的都未过期
+            break
+        if not await _archive_partition(db_session, name):
+            app_logger.warning(f"Partition {name} has unarchived messages, skip")
+            break
+        # 剩余的消息都属于已删除的对话，检索行可以先删除
+        await _delete_search_rows(db_session, name)
+
+        acquired = await ddl_conn.scalar(
+            text(f"SELECT GET_LOCK({LOCK_NAME}, :timeout)"),
+            {"timeout": CFG.partition.lock_timeout_seconds},
+        )
+        if not acquired:
+            break
+        try:
+            # 持有锁后在新事务中再次检查，期间恢复或导入的消息已提交
+            await ddl_conn.commit()
+            if await _has_active_messages(ddl_conn, name):
+                app_logger.warning(f"Partition {name} has new messages, skip")
+                break
+            await ddl_conn.execute(text(f"ALTER TABLE message DROP PARTITION {name}"))
+            dropped.append(name)
+        finally:
+            await ddl_conn.execute(text(f"SELECT RELEASE_LOCK({LOCK_NAME})"))
+            await ddl_conn.commit()
+    return dropped
+
+
+async def run_partition_maintenance(db_session: AsyncSession) -> None:
+    """
+    后台分区维护任务
+
+    修改分区和分区锁使用独立连接，会话变量和锁不会遗留在连接池中被请求复用的连接上
+    """
+    engine = (await db_session.connection()).engine
+    async with engine.connect() as ddl_conn:
+        # 修改分区需要消息表的元数据锁，等待超时即放弃，避免长事务阻塞时后续查询排队
+        await ddl_conn.execute(
+            text("SET SESSION lock_wait_timeout = :timeout"),
+            {"timeout": CFG.partition.lock_timeout_seconds},
+        )
+        try:
+            created = await create_future_partitions(db_session, ddl_conn)
+            dropped = await drop_expired_partitions(db_session, ddl_conn)
+        finally:
+            await ddl_conn.execute(text("SET SESSION lock_wait_timeout = DEFAULT"))
+            await ddl_conn.commit()
+    app_logger.info(f"Message partitions created: {created}, dropped: {dropped}")
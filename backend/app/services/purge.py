@@ -0,0 +1,90 @@
+import asyncio
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.entities.chat import Conversation, Message
+from app.services.image_ref import delete_image_refs, delete_unreferenced_images
+from app.utils.cos import conversation_image_prefix, delete_object, delete_prefix
+from app.utils.log import app_logger
+
+
+async def delete_messages_in_chunks(
+    db_session: AsyncSession, conversation_id: int
+) -> int:
+    """分批删除消息，每批单独提交并间隔一段时间，避免长事务和突发的写入压力"""
+    chunk_size = CFG.purge.chunk_size
+    total = 0
+    while True:
+        result = await db_session.execute(
+            delete(Message)
+            .where(Message.conversation_id == conversation_id)
+            .with_dialect_options(mysql_limit=chunk_size)
+        )
+        await db_session.commit()
+        total += result.rowcount
+        if result.rowcount < chunk_size:
+            return total
+        await asyncio.sleep(CFG.purge.chunk_interval_ms / 1000)
+
+
+async def purge_conversation(
+    db_session: AsyncSession, conversation: Conversation
+) -> bool:
+    """
+    清理单个已删除的对话，返回是否清理完成
+
+    先删除对象存储中的图片和归档，再删除消息和对话行，
+    中途失败时对话仍保留删除标记，下一轮继续清理；
+    按内容寻址的图片只在不再被其他对话引用时删除，有图片处于宽限期时保留对话，下一轮重试
+    """
+    await delete_prefix(
+        conversation_image_prefix(conversation.user_id, conversation.id)
+    )
+    if await delete_unreferenced_images(db_session, conversation.id):
+        return False
+    if conversation.archived_key:
+        await delete_object(conversation.archived_key)
+    try:
+        await delete_messages_in_chunks(db_session, conversation.id)
+        await delete_image_refs(db_session, conversation.id)
+        await db_session.execute(
+            delete(Conversation).where(
+                Conversation.id == conversation.id,
+                Conversation.deleted_at.is_not(None),
+            )
+        )
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        raise
+    return True
+
+
+async def purge_deleted_conversations(db_session: AsyncSession) -> int:
+    """清理已删除的对话，返回清理数量"""
+    stmt = (
+        select(Conversation)
+        .where(Conversation.deleted_at.is_not(None))
+        .order_by(Conversation.deleted_at.asc())
+        .limit(CFG.purge.batch_size)
+    )
+    result = await db_session.execute(stmt)
+    conversations = result.scalars().all()
+    await db_session.commit()  # 结束读事务
+    purged = 0
+    for conversation in conversations:
+        try:
+            if await purge_conversation(db_session, conversation):
+                purged += 1
+        except Exception as e:
+            app_logger.error(f"Purge conversation {conversation.id} failed: {e}")
+    if conversations:
+        app_logger.info(f"Purged conversations: {purged}/{len(conversations)}")
+    return purged
+
+
+async def run_purger(db_session: AsyncSession) -> None:
+    """后台清理任务"""
+    await purge_deleted_conversations(db_session)
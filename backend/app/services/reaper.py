@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.entities.auth import RefreshToken
+from app.utils.log import auth_logger
+
+# 累计清理的行数，由 /metrics 展示（只统计当前 worker 执行的清理）
+reaper_stats = {"expired": 0, "revoked": 0, "last_run_at": None}
+
+
+async def _delete_in_chunks(db_session: AsyncSession, *conditions) -> int:
+    """分批删除满足条件的刷新令牌，每批单独提交并间隔一段时间，返回删除的行数"""
+    chunk_size = CFG.token_reaper.chunk_size
+    total = 0
+    while True:
+        result = await db_session.execute(
+            delete(RefreshToken)
+            .where(*conditions)
+            .with_dialect_options(mysql_limit=chunk_size)
+        )
+        await db_session.commit()
+        total += result.rowcount
+        if result.rowcount < chunk_size:
+            return total
+        await asyncio.sleep(CFG.token_reaper.chunk_interval_ms / 1000)
+
+
+async def reap_refresh_tokens(db_session: AsyncSession) -> tuple[int, int]:
+    """
+    删除已过期和已撤销的刷新令牌，返回删除的过期行数和撤销行数
+
+    两类行的校验结果与行不存在相同，删除后不影响令牌校验
+    """
+    expired = await _delete_in_chunks(
+        db_session, RefreshToken.yn == 1, RefreshToken.expires_at < func.now()
+    )
+    revoked = await _delete_in_chunks(db_session, RefreshToken.yn == 0)
+    return expired, revoked
+
+
+async def run_token_reaper(db_session: AsyncSession) -> None:
+    """后台刷新令牌清理任务"""
+    expired, revoked = await reap_refresh_tokens(db_session)
+    reaper_stats["expired"] += expired
+    reaper_stats["revoked"] += revoked
+    reaper_stats["last_run_at"] = datetime.now().isoformat(timespec="seconds")
+    auth_logger.info(f"Reaped refresh tokens: expired={expired}, revoked={revoked}")
@@ -0,0 +1,136 @@
+import re
+
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.entities.chat import Conversation, Message, MessageSearch
+from app.schemas.conversation import ConversationSearchHit, MessageSearchHit
+from app.utils.message_codec import decode_content
+
+SNIPPET_LENGTH = 120  # 摘要长度
+
+
+def _split_terms(query: str) -> list[str]:
+    """拆分检索词"""
+    return [t for t in query.split() if t]
+
+
+def _boolean_query(terms: list[str]) -> str:
+    """
+    构造 BOOLEAN MODE 检索式
+
+    每个检索词作为短语且必须出现，ngram 解析器会将短语切分为连续的 n-gram
+    """
+    return " ".join('+"{}"'.format(t.replace('"', " ")) for t in terms)
+
+
+def _plain_text(content: str | list[dict]) -> str:
+    """提取消息中的文本"""
+    if isinstance(content, list):
+        return " ".join(c.get("text", "") for c in content if "text" in c)
+    return content
+
+
+def _highlight(text: str, terms: list[str]) -> tuple[str, list[tuple[int, int]]]:
+    """截取命中位置附近的摘要，并返回检索词在摘要中的位置"""
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    first = pattern.search(text)
+    start = 0
+    if first and first.start() > SNIPPET_LENGTH // 3:
+        start = first.start() - SNIPPET_LENGTH // 3
+    snippet = text[start : start + SNIPPET_LENGTH]
+    highlights = [(m.start(), m.end()) for m in pattern.finditer(snippet)]
+    return snippet, highlights
+
+
+async def search_conversations(
+    db_session: AsyncSession, user_id: int, query: str, limit: int = 20
+) -> list[ConversationSearchHit]:
+    """按标题检索对话"""
+    terms = _split_terms(query)
+    if not terms:
+        return []
+    stmt = (
+        select(Conversation.id, Conversation.title)
+        .where(
+            Conversation.user_id == user_id,
+            Conversation.deleted_at.is_(None),
+            match(Conversation.title, against=_boolean_query(terms)).in_boolean_mode(),
+        )
+        .order_by(Conversation.last_message_at.desc())
+        .limit(limit)
+    )
+    result = await db_session.execute(stmt)
+    hits = []
+    for conversation_id, title in result.all():
+        _, highlights = _highlight(title, terms)
+        hits.append(
+            ConversationSearchHit(
+                conversation_id=conversation_id, title=title, highlights=highlights
+            )
+        )
+    return hits
+
+
+async def search_messages(
+    db_session: AsyncSession,
+    user_id: int,
+    query: str,
+    before_id: int | None = None,
+    limit: int = 20,
+) -> tuple[list[MessageSearchHit], bool]:
+    """
+    按内容检索消息，按 id 倒序游标分页
+
+    消息表分区后不支持全文索引，在 message_search 表中检索，
+    再按完整主键读取命中的消息
+    """
+    terms = _split_terms(query)
+    if not terms:
+        return [], False
+    stmt = (
+        select(Message, Conversation.title)
+        .select_from(MessageSearch)
+        .join(
+            Message,
+            and_(
+                Message.id == MessageSearch.message_id,
+                Message.timestamp == MessageSearch.timestamp,
+            ),
+        )
+        .join(Conversation, Conversation.id == MessageSearch.conversation_id)
+        .where(
+            MessageSearch.user_id == user_id,
+            Conversation.deleted_at.is_(None),
+            match(
+                MessageSearch.content, against=_boolean_query(terms)
+            ).in_boolean_mode(),
+        )
+    )
+    if before_id is not None:
+        stmt = stmt.where(MessageSearch.message_id < before_id)
+    stmt = stmt.order_by(MessageSearch.message_id.desc()).limit(
+        limit + 1
+    )  # 多取一条判断是否还有更多
+    result = await db_session.execute(stmt)
+    rows = result.all()
+
+    hits = []
+    for message, title in rows[:limit]:
+        content = decode_content(
+            message.content, message.content_format, message.content_compressed
+        )
+        snippet, highlights = _highlight(_plain_text(content), terms)
+        hits.append(
+            MessageSearchHit(
+                message_id=message.id,
+                conversation_id=message.conversation_id,
+                conversation_title=title,
+                role=message.role,
+                snippet=snippet,
+                highlights=highlights,
+                timestamp=message.timestamp,
+            )
+        )
+    return hits, len(rows) > limit
@@ -0,0 +1,314 @@
+"""
+对话导入导出
+
+数据格式为 NDJSON，每行一条记录，消息行紧跟在所属对话行之后:
+- {"type": "conversation", "title": ..., "create_at": ...}
+- {"type": "message", "role": ..., "content": ..., "timestamp": ...,
+   "prompt_tokens": ..., "completion_tokens": ...}
+"""
+
+import gzip
+import json
+import zlib
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.entities.chat import Conversation, Message
+from app.exceptions.conversation import InvalidImportDataError
+from app.services.image_ref import add_image_refs, content_image_keys
+from app.services.partition import message_partition_lock
+from app.utils.cos import get_object
+from app.utils.message_codec import content_preview, decode_content, encode_content
+
+FLUSH_BYTES = 64 * 1024  # 导出时累积到该大小再发送
+MAX_LINE_BYTES = 16 * 1024 * 1024  # 单行最大字节数，与 MEDIUMTEXT 上限一致
+ROLES = {"user", "assistant", "system"}
+
+
+def _line(item: dict) -> bytes:
+    return json.dumps(item, ensure_ascii=False).encode() + b"\n"
+
+
+async def _archived_lines(key: str) -> AsyncIterator[bytes]:
+    """读取已归档对话的消息"""
+    body = await get_object(key)
+    for line in gzip.decompress(body).splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        yield _line(
+            {
+                "type": "message",
+                "role": item["role"],
+                "content": item["content"],
+                "timestamp": item["timestamp"],
+                "prompt_tokens": item.get("prompt_tokens", 0),
+                "completion_tokens": item.get("completion_tokens", 0),
+            }
+        )
+
+
+async def _export_lines(db_session: AsyncSession, user_id: int) -> AsyncIterator[bytes]:
+    stmt = (
+        select(
+            Conversation.id,
+            Conversation.title,
+            Conversation.create_at,
+            Conversation.archived_key,
+        )
+        .where(Conversation.user_id == user_id, Conversation.deleted_at.is_(None))
+        .order_by(Conversation.id.asc())
+    )
+    conversations = (await db_session.execute(stmt)).all()
+    for conversation in conversations:
+        yield _line(
+            {
+                "type": "conversation",
+                "title": conversation.title,
+                "create_at": conversation.create_at.isoformat(),
+            }
+        )
+        if conversation.archived_key:
+            async for line in _archived_lines(conversation.archived_key):
+                yield line
+            continue
+        # 服务端游标逐批读取，内存占用与消息总数无关
+        stmt = (
+            select(
+                Message.role,
+                Message.content,
+                Message.content_format,
+                Message.content_compressed,
+                Message.timestamp,
+                Message.prompt_tokens,
+                Message.completion_tokens,
+            )
+            .where(Message.conversation_id == conversation.id)
+            .order_by(Message.id.asc())
+            .execution_options(yield_per=CFG.transfer.batch_size)
+        )
+        async for row in await db_session.stream(stmt):
+            yield _line(
+                {
+                    "type": "message",
+                    "role": row.role,
+                    "content": decode_content(
+                        row.content, row.content_format, row.content_compressed
+                    ),
+                    "timestamp": row.timestamp.isoformat(),
+                    "prompt_tokens": row.prompt_tokens,
+                    "completion_tokens": row.completion_tokens,
+                }
+            )
+    await db_session.commit()  # 结束读事务
+
+
+async def export_conversations(
+    db_session: AsyncSession, user_id: int, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """以 NDJSON 流式导出用户的所有对话，可选 gzip 压缩"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    buffer = bytearray()
+    async for line in _export_lines(db_session, user_id):
+        buffer += line
+        if len(buffer) < FLUSH_BYTES:
+            continue
+        chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+        buffer.clear()
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.compress(bytes(buffer)) + compressor.flush()
+    elif buffer:
+        yield bytes(buffer)
+
+
+class _LineReader:
+    """将上传的数据流切分为行，自动识别 gzip 压缩"""
+
+    def __init__(self):
+        self._decompressor = None
+        self._buffer = b""
+        self._started = False
+        self.total_bytes = 0
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        if not self._started:
+            self._started = True
+            if chunk[:2] == b"\x1f\x8b":
+                self._decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        if self._decompressor:
+            chunk = self._decompressor.decompress(chunk)
+        self.total_bytes += len(chunk)
+        if self.total_bytes > CFG.transfer.max_import_bytes:
+            raise InvalidImportDataError("导入数据超出大小限制")
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        if len(self._buffer) > MAX_LINE_BYTES:
+            raise InvalidImportDataError("导入数据单行过长")
+        yield from lines
+
+    def close(self) -> Iterator[bytes]:
+        if self._decompressor:
+            self._buffer += self._decompressor.flush()
+        if self._buffer:
+            yield self._buffer
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+class _Importer:
+    """逐行导入对话，消息按批插入"""
+
+    def __init__(self, db_session: AsyncSession, user_id: int):
+        self.db_session = db_session
+        self.user_id = user_id
+        self.conversation_id: int | None = None
+        self.create_at: datetime | None = None
+        self.pending: list[dict] = []
+        self.image_keys: set[str] = set()
+        self.message_count = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.last_message_at: datetime | None = None
+        self.last_preview: str | None = None
+        self.conversations = 0
+        self.messages = 0
+
+    async def add(self, item: dict) -> None:
+        if item.get("type") == "conversation":
+            await self.finish_conversation()
+            title = item.get("title")
+            self.create_at = _parse_time(item.get("create_at")) or datetime.now()
+            result = await self.db_session.execute(
+                insert(Conversation).values(
+                    user_id=self.user_id,
+                    title=title[:200] if isinstance(title, str) else None,
+                    create_at=self.create_at,
+                )
+            )
+            self.conversation_id = result.inserted_primary_key[0]
+            self.conversations += 1
+        elif item.get("type") == "message":
+            role, content = item.get("role"), item.get("content")
+            if self.conversation_id is None or role not in ROLES:
+                raise ValueError
+            if not isinstance(content, (str, list)):
+                raise ValueError
+            prompt_tokens = item.get("prompt_tokens", 0)
+            completion_tokens = item.get("completion_tokens", 0)
+            for tokens in (prompt_tokens, completion_tokens):
+                if not isinstance(tokens, int) or tokens < 0:
+                    raise ValueError
+            encoded, content_format, content_compressed = encode_content(content)
+            timestamp = _parse_time(item.get("timestamp")) or datetime.now()
+            # 消息时间不早于对话创建时间，读取消息时依赖该约束裁剪分区
+            timestamp = max(timestamp, self.create_at)
+            self.pending.append(
+                {
+                    "user_id": self.user_id,
+                    "conversation_id": self.conversation_id,
+                    "role": role,
+                    "content": encoded,
+                    "content_format": content_format,
+                    "content_compressed": content_compressed,
+                    "timestamp": timestamp,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                }
+            )
+            self.message_count += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.last_message_at = timestamp
+            self.last_preview = content_preview(content)
+            self.image_keys |= content_image_keys(self.user_id, [content])
+            if len(self.pending) >= CFG.transfer.batch_size:
+                await self.flush()
+        else:
+            raise ValueError
+
+    async def flush(self) -> None:
+        """插入一批消息并提交"""
+        async with message_partition_lock(self.db_session):  # 消息时间可能是历史时间
+            if self.pending:
+                await self.db_session.execute(insert(Message), self.pending)
+                self.messages += len(self.pending)
+                self.pending = []
+            await add_image_refs(
+                self.db_session, self.user_id, self.conversation_id, self.image_keys
+            )
+            self.image_keys = set()
+            await self.db_session.commit()
+
+    async def finish_conversation(self) -> None:
+        """写入剩余消息并更新对话的活跃信息"""
+        if self.conversation_id is None:
+            return
+        await self.flush()
+        if self.message_count:
+            await self.db_session.execute(
+                update(Conversation)
+                .where(Conversation.id == self.conversation_id)
+                .values(
+                    message_count=self.message_count,
+                    total_prompt_tokens=self.prompt_tokens,
+                    total_completion_tokens=self.completion_tokens,
+                    last_message_at=self.last_message_at,
+                    last_message_preview=self.last_preview,
+                )
+            )
+            await self.db_session.commit()
+        self.conversation_id = None
+        self.message_count = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.last_message_at = None
+        self.last_preview = None
+
+
+async def import_conversations(
+    db_session: AsyncSession, user_id: int, chunks: AsyncIterator[bytes]
+) -> tuple[int, int]:
+    """
+    从 NDJSON 数据流导入对话，返回导入的对话数和消息数
+
+    消息按批插入并提交，数据格式错误时已导入的对话保留
+    """
+    reader = _LineReader()
+    importer = _Importer(db_session, user_id)
+    line_no = 0
+
+    async def _add(line: bytes) -> None:
+        nonlocal line_no
+        line_no += 1
+        if not line.strip():
+            return
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise ValueError
+            await importer.add(item)
+        except (ValueError, TypeError) as e:
+            raise InvalidImportDataError(f"第 {line_no} 行格式错误") from e
+
+    try:
+        async for chunk in chunks:
+            for line in reader.feed(chunk):
+                await _add(line)
+        for line in reader.close():
+            await _add(line)
+        await importer.finish_conversation()
+    except zlib.error as e:
+        await db_session.rollback()
+        raise InvalidImportDataError("gzip 数据损坏") from e
+    except Exception:
+        await db_session.rollback()
+        raise
+    return importer.conversations, importer.messages
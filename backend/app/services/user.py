@@ -1,12 +1,19 @@
+import asyncio
+from dataclasses import dataclass
 from typing import Literal
 
 from fastapi import Response
-from pwdlib._hash import PasswordHash
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.entities.auth import Group, Scope, User
+from app.entities.auth import (
+    AclVersion,
+    Group,
+    Scope,
+    User,
+    t_group_scope_rel,
+    t_group_user_rel,
+)
 from app.exceptions.user import (
     EmailAlreadyExistsError,
     InvalidCredentialsError,
@@ -17,9 +24,8 @@ from app.exceptions.user import (
     UserPasswordSameError,
 )
 from app.services.auth import create_token
-
-passwd_hash = PasswordHash.recommended()
-HASHED_DUMMY_PASSWORD = passwd_hash.hash("dummy_password")
+from app.utils.log import auth_logger
+from app.utils.password import password_hasher
 
 
 async def verify_email_exists(db_session: AsyncSession, email: str) -> None:
@@ -30,13 +36,27 @@ async def verify_email_exists(db_session: AsyncSession, email: str) -> None:
         raise EmailAlreadyExistsError
 
 
-def verify_password(user: User, password: str) -> None:
-    """验证密码"""
+async def verify_password(db_session: AsyncSession, user: User, password: str) -> None:
+    """
+    验证密码
+
+    哈希参数已过时则替换为按当前参数计算的哈希，随调用方的事务一起提交
+    """
     # 使用 dummy_password 避免时序攻击
-    target_hash = user.password_hash if user else HASHED_DUMMY_PASSWORD
-    password_correct = passwd_hash.verify(password, target_hash)
+    target_hash = user.password_hash if user else await password_hasher.dummy_hash()
+    password_correct, new_hash = await password_hasher.verify_and_update(
+        password, target_hash
+    )
     if not password_correct:
         raise InvalidCredentialsError  # 邮箱或密码错误
+    if user and new_hash:
+        # 只替换校验时读到的哈希，不覆盖并发修改的密码
+        await db_session.execute(
+            update(User)
+            .where(User.id == user.id, User.password_hash == target_hash)
+            .values(password_hash=new_hash)
+        )
+        auth_logger.info(f"User {user.id} password rehashed")
 
 
 async def get_default_group(db_session: AsyncSession) -> list[Group]:
@@ -47,43 +67,112 @@ async def get_default_group(db_session: AsyncSession) -> list[Group]:
     return [group] if group else []
 
 
+@dataclass
+class GroupInfo:
+    name: str
+    enabled: bool
+    scopes: list[str]  # 已启用的权限范围
+
+
+class GroupScopeCache:
+    """
+    组 -> 权限范围的进程内缓存
+
+    组和权限范围很少变化，相关表变更时触发器递增 acl_version，
+    查询用户时一并读取版本号，版本号变化时整体重新加载
+    """
+
+    def __init__(self):
+        self.version: int | None = None
+        self.groups: dict[int, GroupInfo] = {}
+        self.reloads = 0
+        self._lock = asyncio.Lock()
+
+    async def _load(self, db_session: AsyncSession) -> dict[int, GroupInfo]:
+        result = await db_session.execute(select(Group.id, Group.name, Group.yn))
+        groups = {
+            group_id: GroupInfo(name=name, enabled=bool(yn), scopes=[])
+            for group_id, name, yn in result.all()
+        }
+        stmt = (
+            select(t_group_scope_rel.c.group_id, Scope.name)
+            .join(Scope, Scope.id == t_group_scope_rel.c.scope_id)
+            .where(Scope.yn == 1)
+        )
+        for group_id, scope_name in (await db_session.execute(stmt)).all():
+            if group_id in groups:
+                groups[group_id].scopes.append(scope_name)
+        return groups
+
+    async def get(self, db_session: AsyncSession, version: int) -> dict[int, GroupInfo]:
+        """获取指定版本的组信息，与缓存版本不一致时重新加载"""
+        if self.version != version:
+            async with self._lock:
+                if self.version != version:
+                    self.groups = await self._load(db_session)
+                    self.version = version
+                    self.reloads += 1
+        return self.groups
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        return {
+            "version": self.version,
+            "groups": len(self.groups),
+            "reloads": self.reloads,
+        }
+
+
+group_scope_cache = GroupScopeCache()
+
+
 async def get_user(
     db_session: AsyncSession,
     user_id: int | None = None,
     email: str | None = None,
     options: Literal["group", "scope"] | None = None,
 ) -> tuple[User, list[str], list[str]]:
-    """通过 user_id 或 email 获取用户信息，可添加组信息和权限范围信息"""
-    stmt = select(User)
+    """
+    通过 user_id 或 email 获取用户信息，可添加组信息和权限范围信息
 
+    组和权限范围从缓存中获取，只需一次查询用户及其所属组 id 和当前版本号
+    """
     if user_id:
-        stmt = stmt.where(User.id == user_id)
+        condition = User.id == user_id
     elif email:
-        stmt = stmt.where(User.email == email)
+        condition = User.email == email
     else:
         raise ValueError("user_id or email must be provided")
 
-    if options == "group":
-        stmt = stmt.options(selectinload(User.group.and_(Group.yn == 1)))
-    elif options == "scope":
-        stmt = stmt.options(
-            selectinload(User.group.and_(Group.yn == 1)).selectinload(
-                Group.scope.and_(Scope.yn == 1)
-            )
+    if options is None:
+        result = await db_session.execute(select(User).where(condition))
+        rows = [(user, None, None) for user in result.scalars().all()]
+    else:
+        version = select(AclVersion.version).where(AclVersion.id == 1).scalar_subquery()
+        stmt = (
+            select(User, t_group_user_rel.c.group_id, func.coalesce(version, 0))
+            .outerjoin(t_group_user_rel, t_group_user_rel.c.user_id == User.id)
+            .where(condition)
         )
+        rows = (await db_session.execute(stmt)).all()
 
-    result = await db_session.execute(stmt)
-    user = result.unique().scalar_one_or_none()
-    if not user:
+    if not rows:
         raise UserNotFoundError  # 用户不存在
-    elif not user.yn:
+    user = rows[0][0]
+    if not user.yn:
         raise UserDisabledError  # 用户被禁用
+    if options is None:
+        return user, [], []
 
-    groups = [g.name for g in user.group] if options in ["group", "scope"] else []
+    all_groups = await group_scope_cache.get(db_session, rows[0][2])
+    user_groups = [
+        all_groups[group_id]
+        for _, group_id, _ in rows
+        if group_id in all_groups and all_groups[group_id].enabled
+    ]
+    groups = [g.name for g in user_groups]
     scopes = (
-        list(set([s.name for g in user.group for s in g.scope]))
-        if options == "scope"
-        else []
+        list({s for g in user_groups for s in g.scopes}) if options == "scope" else []
     )
 
     return user, groups, scopes
@@ -102,7 +191,7 @@ async def add_user_in_db(
         user = User(
             email=email,
             name=username,
-            password_hash=passwd_hash.hash(password),
+            password_hash=await password_hasher.hash(password),
             group=groups,
         )
         # 添加用户
@@ -158,10 +247,10 @@ async def update_password(
     """修改密码"""
     try:
         user, _, _ = await get_user(db_session, user_id)
-        if passwd_hash.verify(password, user.password_hash):
+        if await password_hasher.verify(password, user.password_hash):
             raise UserPasswordSameError  # 密码与原密码相同
         # 更新密码
-        user.password_hash = passwd_hash.hash(password)
+        user.password_hash = await password_hasher.hash(password)
         await db_session.commit()
     except Exception:
         await db_session.rollback()
@@ -174,12 +263,16 @@ async def login_by_user_id(db_session: AsyncSession, user_id: int, response: Res
     user, _, scopes = await get_user(db_session, user_id, options="scope")
     # 创建访问令牌和刷新令牌
     tokens = await create_token(db_session, user.id, scopes)
-    # 在 Cookie 中设置 refresh_token
+    set_refresh_token_cookie(response, tokens["refresh_token"])
+    return user, tokens
+
+
+def set_refresh_token_cookie(response: Response, refresh_token: str) -> None:
+    """在 Cookie 中设置 refresh_token"""
     response.set_cookie(
         key="refresh_token",
-        value=tokens["refresh_token"],
+        value=refresh_token,
         httponly=True,  # 防止 JavaScript 访问 Cookie
         secure=False,
         samesite="lax",
     )
-    return user, tokens
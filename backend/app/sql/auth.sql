@@ -4,6 +4,8 @@ SET SESSION time_zone = '+08:00';
 
 DROP TABLE IF EXISTS `refresh_token`;
 
+DROP TABLE IF EXISTS `acl_version`;
+
 DROP TABLE IF EXISTS `group_user_rel`;
 
 DROP TABLE IF EXISTS `group_scope_rel`;
@@ -65,9 +67,46 @@ CREATE TABLE `refresh_token` (
     `expires_at` DATETIME NOT NULL COMMENT '过期时间',
     `yn` TINYINT NOT NULL DEFAULT 1 COMMENT '是否启用',
     FOREIGN KEY (`user_id`) REFERENCES `user` (`id`) ON DELETE CASCADE,
-    INDEX idx_refresh_token_user_id (user_id)
+    INDEX idx_refresh_token_user_id (user_id),
+    INDEX idx_refresh_token_yn_expires_at (yn, expires_at)
 ) COMMENT '刷新令牌';
 
+CREATE TABLE `acl_version` (
+    `id` INT NOT NULL COMMENT '固定为 1',
+    `version` BIGINT NOT NULL DEFAULT 0 COMMENT '版本号',
+    PRIMARY KEY (`id`)
+) COMMENT '组和权限范围的版本号，相关表变更时由触发器递增，用于失效进程内缓存';
+
+INSERT INTO `acl_version` (`id`, `version`) VALUES (1, 0);
+
+-- 组、权限范围及其关系变更时递增版本号
+CREATE TRIGGER `trg_scope_insert` AFTER INSERT ON `scope` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
+CREATE TRIGGER `trg_scope_update` AFTER UPDATE ON `scope` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
+CREATE TRIGGER `trg_scope_delete` AFTER DELETE ON `scope` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
+CREATE TRIGGER `trg_group_insert` AFTER INSERT ON `group` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
+CREATE TRIGGER `trg_group_update` AFTER UPDATE ON `group` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
+CREATE TRIGGER `trg_group_delete` AFTER DELETE ON `group` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
+CREATE TRIGGER `trg_group_scope_rel_insert` AFTER INSERT ON `group_scope_rel` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
+CREATE TRIGGER `trg_group_scope_rel_update` AFTER UPDATE ON `group_scope_rel` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
+CREATE TRIGGER `trg_group_scope_rel_delete` AFTER DELETE ON `group_scope_rel` FOR EACH ROW
+    UPDATE `acl_version` SET `version` = `version` + 1 WHERE `id` = 1;
+
 INSERT INTO
     `scope` (`name`, `description`)
 VALUES (
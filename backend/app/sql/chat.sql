@@ -2,6 +2,10 @@ SET GLOBAL time_zone = '+08:00';
 
 SET SESSION time_zone = '+08:00';
 
+DROP TABLE IF EXISTS `image_ref`;
+
+DROP TABLE IF EXISTS `message_search`;
+
 DROP TABLE IF EXISTS `message`;
 
 DROP TABLE IF EXISTS `conversation`;
@@ -27,11 +31,21 @@ CREATE TABLE `conversation` (
     `user_id` BIGINT NOT NULL COMMENT '用户ID',
     `title` VARCHAR(200) DEFAULT NULL COMMENT '对话标题',
     `model_config_id` BIGINT NULL COMMENT '模型配置ID',
+    `message_count` INT NOT NULL DEFAULT 0 COMMENT '消息数量',
+    `total_prompt_tokens` BIGINT NOT NULL DEFAULT 0 COMMENT '累计输入 token 数',
+    `total_completion_tokens` BIGINT NOT NULL DEFAULT 0 COMMENT '累计输出 token 数',
+    `last_message_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '最后一条消息时间',
+    `last_message_preview` VARCHAR(200) DEFAULT NULL COMMENT '最后一条消息预览',
+    `archived_key` VARCHAR(200) DEFAULT NULL COMMENT '归档对象 cos_key，非空表示消息已归档',
+    `deleted_at` DATETIME DEFAULT NULL COMMENT '删除时间，非空表示已删除等待后台清理',
     `create_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     `update_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     PRIMARY KEY (`id`),
     FOREIGN KEY (`model_config_id`) REFERENCES `model_config` (`id`),
-    INDEX idx_conversation_user_id (user_id)
+    INDEX idx_conversation_user_id_deleted_at_last_message_at (`user_id`, `deleted_at`, `last_message_at`),
+    INDEX idx_conversation_last_message_at (`last_message_at`),
+    INDEX idx_conversation_deleted_at (`deleted_at`),
+    FULLTEXT INDEX ft_conversation_title (`title`) WITH PARSER ngram
 ) COMMENT '对话';
 
 CREATE TABLE `message` (
@@ -39,9 +53,48 @@ CREATE TABLE `message` (
     `user_id` BIGINT NOT NULL COMMENT '用户ID',
     `conversation_id` BIGINT NOT NULL COMMENT '对话ID',
     `role` VARCHAR(20) NOT NULL COMMENT '发送者 (user/assistant)',
-    `content` TEXT NOT NULL COMMENT '消息内容 (JSON 字符串)',
+    `content` MEDIUMTEXT NOT NULL COMMENT '消息内容 (纯文本或 JSON 字符串，压缩时为检索用前缀)',
+    `content_format` TINYINT NOT NULL DEFAULT 1 COMMENT '内容格式 (0:纯文本 1:JSON 2:压缩纯文本 3:压缩JSON)',
+    `content_compressed` MEDIUMBLOB DEFAULT NULL COMMENT 'zlib 压缩后的消息内容',
+    `prompt_tokens` INT NOT NULL DEFAULT 0 COMMENT '生成该回复的输入 token 数',
+    `completion_tokens` INT NOT NULL DEFAULT 0 COMMENT '该回复的输出 token 数',
     `timestamp` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '发送时间',
-    PRIMARY KEY (`id`),
-    FOREIGN KEY (`conversation_id`) REFERENCES `conversation` (`id`) ON DELETE CASCADE,
-    INDEX idx_message_conversation_id (`conversation_id`)
-) COMMENT '消息';
\ No newline at end of file
+    PRIMARY KEY (`id`, `timestamp`),
+    INDEX idx_message_conversation_id_id (`conversation_id`, `id`)
+) COMMENT '消息'
+-- 按月分区，分区表不支持外键和全文索引，全文索引由 message_search 表承担
+-- 后续月份的分区由后台任务从 pmax 中拆分预建，过期分区由后台任务删除
+PARTITION BY RANGE COLUMNS (`timestamp`) (
+    PARTITION pmin VALUES LESS THAN ('2000-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE `message_search` (
+    `message_id` BIGINT NOT NULL COMMENT '消息ID',
+    `user_id` BIGINT NOT NULL COMMENT '用户ID',
+    `conversation_id` BIGINT NOT NULL COMMENT '对话ID',
+    `timestamp` DATETIME NOT NULL COMMENT '发送时间',
+    `content` MEDIUMTEXT NOT NULL COMMENT '检索内容，与 message.content 相同',
+    PRIMARY KEY (`message_id`),
+    FULLTEXT INDEX ft_message_search_content (`content`) WITH PARSER ngram
+) COMMENT '消息全文检索';
+
+-- 删除分区不会触发触发器，删除分区前需先清理对应的检索行
+CREATE TRIGGER `trg_message_insert` AFTER INSERT ON `message` FOR EACH ROW
+    INSERT INTO `message_search` (`message_id`, `user_id`, `conversation_id`, `timestamp`, `content`)
+    VALUES (NEW.`id`, NEW.`user_id`, NEW.`conversation_id`, NEW.`timestamp`, NEW.`content`);
+
+CREATE TRIGGER `trg_message_delete` AFTER DELETE ON `message` FOR EACH ROW
+    DELETE FROM `message_search` WHERE `message_id` = OLD.`id`;
+
+-- 按内容寻址的图片({user_id}/images/<sha256>.ext)在同一用户的多个对话间共享，
+-- 清理对话时只删除不再被其他对话引用的图片对象
+CREATE TABLE `image_ref` (
+    `cos_key` VARCHAR(200) NOT NULL COMMENT '图片 cos_key',
+    `conversation_id` BIGINT NOT NULL COMMENT '引用图片的对话ID',
+    `user_id` BIGINT NOT NULL COMMENT '用户ID',
+    `create_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    PRIMARY KEY (`cos_key`, `conversation_id`),
+    INDEX idx_image_ref_conversation_id (`conversation_id`),
+    INDEX idx_image_ref_user_id (`user_id`)
+) COMMENT '图片引用';
@@ -0,0 +1,121 @@
+"""
+Argon2id 哈希参数校准
+
+固定内存占用和并行度，逐步增加迭代次数，选出单次哈希耗时不超过目标耗时的最大迭代次数，
+并写入 config.yml 的 password 段:
+    uv run -m app.utils._calibrate_password --target-ms 200 [--memory-cost 65536]
+        [--parallelism 4] [--rounds 5] [--dry-run]
+
+应在部署环境的机器上执行，修改参数后已有用户的哈希在下次登录时按新参数重新计算
+"""
+
+import argparse
+import logging
+import re
+import statistics
+import sys
+import time
+
+from app.config import CFG, CONFIG_DIR
+from app.utils.password import create_password_hash
+
+MAX_TIME_COST = 32
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+logger = logging.getLogger(__name__)
+
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, rounds: int) -> float:
+    """返回单次哈希耗时的中位数(毫秒)"""
+    passwd_hash = create_password_hash(time_cost, memory_cost, parallelism)
+    passwd_hash.hash("calibrate")  # 预热
+    elapsed = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        passwd_hash.hash("calibrate")
+        elapsed.append((time.perf_counter() - start) * 1000)
+    return statistics.median(elapsed)
+
+
+def calibrate(target_ms: float, memory_cost: int, parallelism: int, rounds: int) -> int:
+    """选出耗时不超过目标的最大迭代次数，迭代次数为 1 仍超过目标时返回 1"""
+    best = 0
+    for time_cost in range(1, MAX_TIME_COST + 1):
+        elapsed = measure(time_cost, memory_cost, parallelism, rounds)
+        logger.info(f"time_cost={time_cost}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = time_cost
+    if not best:
+        logger.warning(
+            "time_cost=1 already exceeds the target, consider lower memory_cost"
+        )
+    return max(best, 1)
+
+
+def write_config(time_cost: int, memory_cost: int, parallelism: int) -> None:
+    """替换 config.yml 中 password 段的参数值，保留注释和格式"""
+    path = CONFIG_DIR / "config.yml"
+    content = path.read_text(encoding="utf-8")
+    section = re.search(r"^password:.*?(?=^\S|\Z)", content, re.MULTILINE | re.DOTALL)
+    if section is None:
+        raise ValueError("config.yml 中缺少 password 段")
+    body = section.group(0)
+    for key, value in (
+        ("time_cost", time_cost),
+        ("memory_cost", memory_cost),
+        ("parallelism", parallelism),
+    ):
+        body, count = re.subn(
+            rf"^(  {key}: )\d+", rf"\g<1>{value}", body, flags=re.MULTILINE
+        )
+        if not count:
+            raise ValueError(f"config.yml 的 password 段中缺少 {key}")
+    path.write_text(
+        content[: section.start()] + body + content[section.end() :], encoding="utf-8"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Argon2id 哈希参数校准")
+    parser.add_argument(
+        "--target-ms", type=float, default=200, help="单次哈希的目标耗时(毫秒)"
+    )
+    parser.add_argument(
+        "--memory-cost",
+        type=int,
+        default=CFG.password.memory_cost,
+        help="内存占用(KiB)",
+    )
+    parser.add_argument(
+        "--parallelism", type=int, default=CFG.password.parallelism, help="并行度"
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="每组参数的测量次数")
+    parser.add_argument("--dry-run", action="store_true", help="只测量，不写入配置")
+    args = parser.parse_args()
+
+    logger.info(
+        f"Calibrating: target={args.target_ms} ms, "
+        f"memory_cost={args.memory_cost}, parallelism={args.parallelism}"
+    )
+    time_cost = calibrate(
+        args.target_ms, args.memory_cost, args.parallelism, args.rounds
+    )
+    logger.info(
+        f"Selected time_cost={time_cost} "
+        f"(current: time_cost={CFG.password.time_cost}, "
+        f"memory_cost={CFG.password.memory_cost}, "
+        f"parallelism={CFG.password.parallelism})"
+    )
+    if args.dry_run:
+        return
+    write_config(time_cost, args.memory_cost, args.parallelism)
+    logger.info("config.yml updated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+应用数据库分片再平衡
+
+增加分片的步骤:
+1. 在 config.yml 的 db.app_shards 中加入新分片，并执行 app/sql/chat.sql 建表
+2. 初始化各分片的自增 id 区间，保证迁移时保留原 id 不冲突:
+    uv run -m app.utils._rebalance_shards --init-ranges
+3. 停止写入后，将归属发生变化的用户数据迁移到新分片（N 为扩容前的分片数）:
+    uv run -m app.utils._rebalance_shards --from-shards N [--dry-run]
+
+迁移按用户执行，先以 INSERT IGNORE 复制到目标分片再从源分片删除，中断后可重新执行
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from rich.console import Console
+from rich.progress import BarColumn, Progress, TextColumn
+from sqlalchemy import delete, insert, select, text, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.entities.chat import Conversation, ImageRef, Message, ModelConfig
+from app.services.database import db_manager
+from app.services.purge import delete_messages_in_chunks
+from app.utils.sharding import jump_hash, shard_id_start
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+logger = logging.getLogger(__name__)
+
+TABLES = [ModelConfig.__table__, Conversation.__table__, Message.__table__]
+
+
+async def init_ranges() -> None:
+    """为分片 1..N 设置自增 id 起始值，已超过起始值的表不受影响"""
+    for index, shard in enumerate(db_manager.shard_names("app")):
+        if index == 0:
+            continue
+        start = shard_id_start(index)
+        async with db_manager.get_engine(shard).begin() as conn:
+            for table in TABLES:
+                await conn.execute(
+                    text(f"ALTER TABLE {table.name} AUTO_INCREMENT = {start}")
+                )
+        logger.info(f"{shard}: AUTO_INCREMENT = {start}")
+
+
+async def _copy_rows(src: AsyncSession, dst: AsyncSession, stmt, table) -> int:
+    """流式读取源分片的行，分批写入目标分片"""
+    copied = 0
+    result = await src.stream(stmt.execution_options(yield_per=CFG.transfer.batch_size))
+    async for rows in result.mappings().partitions():
+        await dst.execute(insert(table).prefix_with("IGNORE"), [dict(r) for r in rows])
+        await dst.commit()
+        copied += len(rows)
+    return copied
+
+
+async def migrate_user(source: str, target: str, user_id: int) -> int:
+    """将用户数据从源分片迁移到目标分片，返回迁移的消息数"""
+    src_engine = db_manager.get_engine(source)
+    dst_engine = db_manager.get_engine(target)
+    async with AsyncSession(src_engine) as src, AsyncSession(dst_engine) as dst:
+        model_configs = ModelConfig.__table__
+        conversations = Conversation.__table__
+        messages = Message.__table__
+        image_refs = ImageRef.__table__
+        await _copy_rows(
+            src,
+            dst,
+            select(model_configs).where(model_configs.c.user_id == user_id),
+            model_configs,
+        )
+        await _copy_rows(
+            src,
+            dst,
+            select(conversations).where(conversations.c.user_id == user_id),
+            conversations,
+        )
+        stmt = select(Conversation.id).where(Conversation.user_id == user_id)
+        conversation_ids = (await src.execute(stmt)).scalars().all()
+        copied = 0
+        for conversation_id in conversation_ids:
+            copied += await _copy_rows(
+                src,
+                dst,
+                select(messages)
+                .where(messages.c.conversation_id == conversation_id)
+                .order_by(messages.c.id),
+                messages,
+            )
+
+        await _copy_rows(
+            src,
+            dst,
+            select(image_refs).where(image_refs.c.user_id == user_id),
+            image_refs,
+        )
+
+        # 复制完成后从源分片删除
+        for conversation_id in conversation_ids:
+            await delete_messages_in_chunks(src, conversation_id)
+        await src.execute(delete(ImageRef).where(ImageRef.user_id == user_id))
+        await src.execute(delete(Conversation).where(Conversation.user_id == user_id))
+        await src.execute(delete(ModelConfig).where(ModelConfig.user_id == user_id))
+        await src.commit()
+    return copied
+
+
+async def rebalance(from_shards: int, dry_run: bool) -> None:
+    """迁移扩容前各分片中归属发生变化的用户"""
+    shards = db_manager.shard_names("app")
+    if not 0 < from_shards <= len(shards):
+        raise ValueError(f"--from-shards must be in [1, {len(shards)}]")
+
+    moves: list[tuple[str, str, int]] = []
+    for index, source in enumerate(shards[:from_shards]):
+        async with AsyncSession(db_manager.get_engine(source)) as session:
+            stmt = union(select(Conversation.user_id), select(ModelConfig.user_id))
+            user_ids = (await session.execute(stmt)).scalars().all()
+        for user_id in user_ids:
+            target = jump_hash(user_id, len(shards))
+            if target != index:
+                moves.append((source, shards[target], user_id))
+        logger.info(f"{source}: {len(user_ids)} users")
+    logger.info(f"Users to move: {len(moves)}")
+    if dry_run or not moves:
+        return
+
+    with Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("[cyan]{task.completed}/{task.total}"),
+        console=Console(),
+    ) as progress:
+        task_id = progress.add_task("Rebalance", total=len(moves))
+        for source, target, user_id in moves:
+            copied = await migrate_user(source, target, user_id)
+            progress.update(
+                task_id, advance=1, description=f"{user_id}: {copied} messages"
+            )
+    logger.info("Rebalance complete")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="应用数据库分片再平衡")
+    parser.add_argument("--init-ranges", action="store_true", help="初始化自增 id 区间")
+    parser.add_argument("--from-shards", type=int, help="扩容前的分片数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计需要迁移的用户")
+    args = parser.parse_args()
+    try:
+        if args.init_ranges:
+            await init_ranges()
+        if args.from_shards is not None:
+            await rebalance(args.from_shards, args.dry_run)
+    finally:
+        await db_manager.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
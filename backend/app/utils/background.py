@@ -0,0 +1,87 @@
+"""
+后台周期任务
+
+多 worker 部署时每个 worker 都会启动任务，执行前通过 MySQL GET_LOCK 获取命名锁，
+同一时刻只有一个 worker 真正执行；start_interval 启动的任务不加锁，用于维护
+每个 worker 自身的状态
+"""
+
+import asyncio
+import random
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.database import db_manager
+from app.utils.log import app_logger
+
+Job = Callable[[AsyncSession], Awaitable[None]]
+
+_tasks: set[asyncio.Task] = set()
+
+
+async def run_with_lock(name: str, job: Job, db_name: str = "app") -> bool:
+    """在命名锁保护下执行任务，未获取到锁时跳过并返回 False"""
+    engine = db_manager.get_engine(db_name)
+    async with engine.connect() as conn:
+        # 锁与连接绑定，任务的会话必须使用同一个连接
+        acquired = await conn.scalar(text("SELECT GET_LOCK(:name, 0)"), {"name": name})
+        await conn.commit()
+        if not acquired:
+            return False
+        try:
+            async with AsyncSession(bind=conn, expire_on_commit=False) as db_session:
+                await job(db_session)
+        finally:
+            await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+            await conn.commit()
+    return True
+
+
+async def _run_periodic(name: str, interval: float, job: Job, db_name: str) -> None:
+    # 随机延迟启动，避免多个 worker 同时争抢
+    await asyncio.sleep(random.uniform(0, min(interval, 60)))
+    while True:
+        try:
+            if await run_with_lock(name, job, db_name):
+                app_logger.info(f"Background job finished: {name}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            app_logger.error(f"Background job {name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_periodic(name: str, interval: float, job: Job, db_name: str = "app") -> None:
+    """启动周期任务"""
+    _tasks.add(asyncio.create_task(_run_periodic(name, interval, job, db_name)))
+
+
+async def _run_interval(
+    name: str, interval: float, func: Callable[[], Awaitable[None]]
+) -> None:
+    while True:
+        try:
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            app_logger.error(f"Background job {name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_interval(
+    name: str, interval: float, func: Callable[[], Awaitable[None]]
+) -> None:
+    """启动每个 worker 各自执行的周期任务，不加锁"""
+    _tasks.add(asyncio.create_task(_run_interval(name, interval, func)))
+
+
+async def stop_all() -> None:
+    """停止所有周期任务"""
+    tasks = list(_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _tasks.clear()
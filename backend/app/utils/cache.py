@@ -0,0 +1,271 @@
+"""
+缓存抽象
+
+- CacheBackend: 键值存储 + 失效广播，提供进程内实现（LocalBackend）和
+  Redis 协议实现（RedisBackend），多 worker 部署时使用 Redis 共享缓存
+- TieredCache: 进程内 LRU（L1）+ 共享后端（L2），写入/删除时通过 pub/sub
+  通知其他 worker 清除各自的 L1
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+from app.config import CFG
+from app.utils.log import app_logger
+from app.utils.lru_cache import LRUCache
+
+V = TypeVar("V")
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+InvalidationCallback = Callable[[str], Awaitable[None] | None]
+
+
+class CacheBackend:
+    """缓存后端"""
+
+    shared = False  # 是否在多个 worker 之间共享
+
+    async def get(self, key: str) -> str | None:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message: str) -> None:
+        """广播消息"""
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, callback: InvalidationCallback) -> None:
+        """订阅广播消息"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """释放连接和后台任务"""
+
+
+class LocalBackend(CacheBackend):
+    """进程内缓存后端，单 worker 部署或测试时使用"""
+
+    def __init__(self):
+        self._data: dict[str, tuple[str, float | None]] = {}
+        self._subscribers: dict[str, list[InvalidationCallback]] = {}
+
+    async def get(self, key: str) -> str | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expire_at = item
+        if expire_at is not None and expire_at <= time.monotonic():  # 已过期
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        expire_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expire_at)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for callback in self._subscribers.get(channel, []):
+            result = callback(message)
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def subscribe(self, channel: str, callback: InvalidationCallback) -> None:
+        self._subscribers.setdefault(channel, []).append(callback)
+
+
+class RedisBackend(CacheBackend):
+    """Redis 协议缓存后端，多 worker 共享"""
+
+    shared = True
+
+    def __init__(self, client):
+        self.client = client  # redis.asyncio.Redis 或兼容客户端
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+        self._subscribers: dict[str, list[InvalidationCallback]] = {}
+
+    async def get(self, key: str) -> str | None:
+        value = await self.client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    async def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        if ttl:
+            await self.client.set(key, value, px=int(ttl * 1000))
+        else:
+            await self.client.set(key, value)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str, callback: InvalidationCallback) -> None:
+        if self._pubsub is None:
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        if channel not in self._subscribers:
+            await self._pubsub.subscribe(channel)
+        self._subscribers.setdefault(channel, []).append(callback)
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """接收广播消息并分发给订阅者"""
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                app_logger.error(f"Cache pubsub error: {e}")
+                await asyncio.sleep(1)
+                continue
+            if not message or message["type"] != "message":
+                continue
+            channel, data = message["channel"], message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            if isinstance(data, bytes):
+                data = data.decode()
+            for callback in self._subscribers.get(channel, []):
+                try:
+                    result = callback(data)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    app_logger.error(f"Cache invalidation callback error: {e}")
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self.client.aclose()
+
+
+class TieredCache(Generic[V]):
+    """进程内 LRU + 共享后端的两级缓存"""
+
+    def __init__(
+        self,
+        namespace: str,
+        local: LRUCache[str, V],
+        backend: CacheBackend,
+        encode: Callable[[V], Any],
+        decode: Callable[[Any], V],
+        ttl: float | None = None,
+    ):
+        self.namespace = namespace
+        self._instance_id = uuid.uuid4().hex  # 用于忽略自己发出的失效广播
+        self.local = local
+        self.backend = backend
+        self._encode = encode
+        self._decode = decode
+        self.ttl = ttl
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self._subscribed = False
+
+    def _key(self, key: Any) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def _ensure_subscribed(self) -> None:
+        if not self._subscribed and self.backend.shared:
+            self._subscribed = True
+            await self.backend.subscribe(INVALIDATION_CHANNEL, self._on_invalidate)
+
+    def _on_invalidate(self, message: str) -> None:
+        """收到其他 worker 的失效广播，清除本地副本"""
+        origin, _, key = message.partition("|")
+        if origin != self._instance_id and key.startswith(self.namespace + ":"):
+            self.local.delete(key)
+
+    async def get(self, key: Any) -> V | None:
+        """依次从 L1、L2 获取缓存"""
+        await self._ensure_subscribed()
+        full_key = self._key(key)
+        value = self.local.get(full_key)
+        if value is not None or not self.backend.shared:
+            return value
+        raw = await self.backend.get(full_key)
+        if raw is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        value = self._decode(json.loads(raw))
+        self.local.set(full_key, value)
+        return value
+
+    async def peek(self, key: Any) -> V | None:
+        """获取缓存，不记录命中统计"""
+        full_key = self._key(key)
+        value = self.local.peek(full_key)
+        if value is not None or not self.backend.shared:
+            return value
+        raw = await self.backend.get(full_key)
+        return self._decode(json.loads(raw)) if raw is not None else None
+
+    async def set(self, key: Any, value: V) -> None:
+        """写入缓存并通知其他 worker 清除旧副本"""
+        await self._ensure_subscribed()
+        full_key = self._key(key)
+        self.local.set(full_key, value)
+        if self.backend.shared:
+            raw = json.dumps(self._encode(value), ensure_ascii=False)
+            await self.backend.set(full_key, raw, self.ttl)
+            await self._broadcast(full_key)
+
+    async def delete(self, key: Any) -> None:
+        """删除缓存并通知其他 worker"""
+        full_key = self._key(key)
+        self.local.delete(full_key)
+        if self.backend.shared:
+            await self.backend.delete(full_key)
+            await self._broadcast(full_key)
+
+    async def _broadcast(self, full_key: str) -> None:
+        await self.backend.publish(
+            INVALIDATION_CHANNEL, f"{self._instance_id}|{full_key}"
+        )
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        stats = self.local.stats()
+        if self.backend.shared:
+            stats["shared_hits"] = self.shared_hits
+            stats["shared_misses"] = self.shared_misses
+        return stats
+
+
+def create_cache_backend() -> CacheBackend:
+    """根据配置创建缓存后端"""
+    if CFG.cache.backend == "redis":
+        from redis.asyncio import Redis
+
+        return RedisBackend(Redis.from_url(CFG.cache.redis_url))
+    return LocalBackend()
+
+
+cache_backend = create_cache_backend()
@@ -57,10 +57,12 @@ async def stream_model(
     model_name: str | None,
     api_key: str | None,
     params: dict[str, Any] | None,
+    usage: dict[str, int] | None = None,
 ):
-    """流式调用模型"""
-    if params is None:
-        params = {}
+    """流式调用模型，传入 usage 时写入本次调用的 token 用量"""
+    params = dict(params or {})
+    if usage is not None:
+        params.setdefault("stream_options", {"include_usage": True})
 
     client = AsyncOpenAI(
         base_url=base_url,
@@ -76,5 +78,8 @@ async def stream_model(
     )
 
     async for chunk in stream:
+        if usage is not None and chunk.usage:  # 最后一个分块携带用量
+            usage["prompt_tokens"] = chunk.usage.prompt_tokens
+            usage["completion_tokens"] = chunk.usage.completion_tokens
         if chunk.choices and chunk.choices[0].delta.content:
             yield chunk.choices[0].delta.content
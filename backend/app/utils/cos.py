@@ -1,11 +1,20 @@
+import asyncio
 import uuid
+from functools import cache
 from urllib.parse import urlparse
 
 from app.config import CFG
-from qcloud_cos import CosConfig, CosS3Client
+from app.utils.cache import TieredCache, cache_backend
+from app.utils.lru_cache import LRUCache
+
+
+@cache
+def _get_client():
+    """创建 COS 客户端，配置不完整时返回 None；SDK 导入较慢，首次使用时再导入"""
+    if not (CFG.cos.secret_id and CFG.cos.secret_key):
+        return None
+    from qcloud_cos import CosConfig, CosS3Client
 
-# 检查COS配置是否完整
-if CFG.cos.secret_id and CFG.cos.secret_key:
     config = CosConfig(
         Region=CFG.cos.region,
         SecretId=CFG.cos.secret_id,
@@ -13,7 +22,13 @@ if CFG.cos.secret_id and CFG.cos.secret_key:
         Token=CFG.cos.token,
         Scheme=CFG.cos.scheme,
     )
-    client = CosS3Client(config)
+    return CosS3Client(config)
+
+
+def _ensure_bucket() -> None:
+    client = _get_client()
+    if client is None:
+        return
 
     # 如果存储桶不存在则创建
     if not (client.bucket_exists(CFG.cos.bucket)):
@@ -32,12 +47,30 @@ if CFG.cos.secret_id and CFG.cos.secret_key:
             ]
         }
         client.put_bucket_cors(Bucket=CFG.cos.bucket, CORSConfiguration=cors_config)
-else:
-    client = None
+
+
+async def ensure_bucket() -> None:
+    """存储桶不存在时创建并配置 CORS，在应用启动时执行而不是导入时"""
+    await asyncio.to_thread(_ensure_bucket)
+
+
+EXISTS_ENTRY_BYTES = 200  # 单个存在标记的估算内存占用(键 + 值)
+
+# 已确认存在的 cos_key，避免重复向 COS 发起 HEAD 请求；
+# 使用两级缓存，删除对象时广播给其他 worker 清除各自的副本
+exists_cache: TieredCache[bool] = TieredCache(
+    "cos_exists",
+    LRUCache(CFG.cache.cos_exists_max_bytes, lambda _: EXISTS_ENTRY_BYTES),
+    cache_backend,
+    encode=lambda v: v,
+    decode=lambda v: v,
+    ttl=24 * 3600,
+)
 
 
 async def get_upload_presigned_url(key: str) -> str:
     """获取带预签名的上传 url"""
+    client = _get_client()
     if client is None:
         return ""
     return client.get_presigned_url(
@@ -50,6 +83,7 @@ async def get_upload_presigned_url(key: str) -> str:
 
 async def get_get_presigned_url(key: str) -> str:
     """获取带预签名的下载 url"""
+    client = _get_client()
     if client is None:
         return ""
     return client.get_presigned_url(
@@ -60,6 +94,80 @@ async def get_get_presigned_url(key: str) -> str:
     )
 
 
+async def object_exists(key: str) -> bool:
+    """检查对象是否已存在于存储桶"""
+    client = _get_client()
+    if client is None:
+        return False
+    if await exists_cache.get(key):
+        return True
+    exists = await asyncio.to_thread(
+        client.object_exists, Bucket=CFG.cos.bucket, Key=key
+    )
+    if exists:
+        await exists_cache.set(key, True)
+    return exists
+
+
+async def put_object(key: str, body: bytes) -> None:
+    """上传对象"""
+    client = _get_client()
+    if client is None:
+        raise RuntimeError("COS is not configured")
+    await asyncio.to_thread(
+        client.put_object, Bucket=CFG.cos.bucket, Body=body, Key=key
+    )
+
+
+async def get_object(key: str) -> bytes:
+    """下载对象"""
+    client = _get_client()
+    if client is None:
+        raise RuntimeError("COS is not configured")
+
+    def _read() -> bytes:
+        response = client.get_object(Bucket=CFG.cos.bucket, Key=key)
+        return response["Body"].get_raw_stream().read()
+
+    return await asyncio.to_thread(_read)
+
+
+async def delete_object(key: str) -> None:
+    """删除对象"""
+    client = _get_client()
+    if client is None:
+        return
+    # 先清除存在标记，其他 worker 在删除期间即可收到广播
+    await exists_cache.delete(key)
+    await asyncio.to_thread(client.delete_object, Bucket=CFG.cos.bucket, Key=key)
+
+
+async def delete_prefix(prefix: str) -> int:
+    """删除指定前缀下的所有对象，返回删除数量"""
+    client = _get_client()
+    if client is None:
+        return 0
+
+    def _delete() -> int:
+        deleted = 0
+        marker = ""
+        while True:
+            response = client.list_objects(
+                Bucket=CFG.cos.bucket, Prefix=prefix, Marker=marker, MaxKeys=1000
+            )
+            keys = [{"Key": item["Key"]} for item in response.get("Contents", [])]
+            if keys:
+                client.delete_objects(
+                    Bucket=CFG.cos.bucket, Delete={"Object": keys, "Quiet": "true"}
+                )
+                deleted += len(keys)
+            if response.get("IsTruncated") != "true":
+                return deleted
+            marker = response["NextMarker"]
+
+    return await asyncio.to_thread(_delete)
+
+
 def extract_cos_key(url: str) -> str:
     """
     从 url 中提取 cos_key
@@ -67,6 +175,7 @@ def extract_cos_key(url: str) -> str:
     支持两种格式：
     - 数据库中存储的 cos_url:
         cos://user_id/conversation_id/images/abc.jpg
+        cos://user_id/images/<sha256>.jpg
     - 前端返回的预签名 url:
         https://cos.xxx.com/user_id/conversation_id/images/abc.jpg?signature=xxx
     """
@@ -78,6 +187,26 @@ def extract_cos_key(url: str) -> str:
         return parsed.path.lstrip("/")
 
 
+def conversation_image_prefix(user_id: int, conversation_id: int) -> str:
+    """对话图片的 cos_key 前缀"""
+    return f"{user_id}/{conversation_id}/images/"
+
+
 def generate_image_cos_key(user_id: int, conversation_id: int, suffix: str) -> str:
     """生成图片的 cos_key"""
     return f"{user_id}/{conversation_id}/images/{uuid.uuid4()}.{suffix}"
+
+
+def content_image_prefix(user_id: int) -> str:
+    """按内容寻址的图片的 cos_key 前缀"""
+    return f"{user_id}/images/"
+
+
+def generate_content_cos_key(user_id: int, content_hash: str, suffix: str) -> str:
+    """
+    生成按内容寻址的图片 cos_key
+
+    同一用户上传的相同图片（sha256 相同）映射到同一个 cos_key，
+    跨对话复用，不再重复上传
+    """
+    return f"{content_image_prefix(user_id)}{content_hash.lower()}.{suffix.lstrip('.')}"
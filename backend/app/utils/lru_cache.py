@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """按内存占用限制容量的 LRU 缓存（单事件循环内使用，无需加锁）"""
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[V], int]):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> V | None:
+        """获取缓存值并记录命中情况"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return item[0]
+
+    def peek(self, key: K) -> V | None:
+        """获取缓存值，不影响淘汰顺序和命中统计"""
+        item = self._data.get(key)
+        return item[0] if item else None
+
+    def set(self, key: K, value: V) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        self.delete(key)
+        size = self._sizeof(value)
+        if size > self.max_bytes:  # 单个条目超过总容量，不缓存
+            return
+        self._data[key] = (value, size)
+        self.bytes_used += size
+        while self.bytes_used > self.max_bytes:
+            _, (_, evicted_size) = self._data.popitem(last=False)
+            self.bytes_used -= evicted_size
+
+    def delete(self, key: K) -> None:
+        """删除缓存"""
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.bytes_used -= item[1]
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._data.clear()
+        self.bytes_used = 0
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes_used": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,52 @@
+import json
+import zlib
+
+from app.config import CFG
+
+CONTENT_FORMAT_TEXT = 0  # 纯文本，原样存储
+CONTENT_FORMAT_JSON = 1  # 多模态内容列表，JSON 字符串存储
+CONTENT_FORMAT_COMPRESSED = 2  # 压缩标记位，内容存储在 content_compressed
+
+
+def encode_content(content: str | list[dict]) -> tuple[str, int, bytes | None]:
+    """
+    将消息内容编码为存储格式
+
+    纯文本不做 JSON 序列化，超过阈值的内容压缩后存入 content_compressed，
+    content 只保留用于全文索引的前缀；前缀按字节截取，前缀与压缩数据之和不小于原文时不压缩
+    """
+    if isinstance(content, str):
+        raw, content_format = content, CONTENT_FORMAT_TEXT
+    else:
+        raw, content_format = (
+            json.dumps(content, ensure_ascii=False),
+            CONTENT_FORMAT_JSON,
+        )
+    raw_bytes = raw.encode()
+    if len(raw_bytes) < CFG.message.compress_threshold:
+        return raw, content_format, None
+    compressed = zlib.compress(raw_bytes, CFG.message.compress_level)
+    # content 保留前缀供全文索引使用，解码时忽略；忽略截断在末尾的不完整字符
+    prefix_bytes = raw_bytes[: CFG.message.index_prefix_bytes]
+    prefix = prefix_bytes.decode(errors="ignore")
+    if len(prefix_bytes) + len(compressed) >= len(raw_bytes):
+        return raw, content_format, None
+    return prefix, content_format | CONTENT_FORMAT_COMPRESSED, compressed
+
+
+def decode_content(
+    content: str, content_format: int, content_compressed: bytes | None = None
+) -> str | list[dict]:
+    """将存储格式解码为消息内容，纯文本无需解析"""
+    if content_format & CONTENT_FORMAT_COMPRESSED:
+        content = zlib.decompress(content_compressed).decode()
+    if content_format & CONTENT_FORMAT_JSON:
+        return json.loads(content)
+    return content
+
+
+def content_preview(content: str | list[dict], max_length: int = 100) -> str:
+    """生成消息预览文本"""
+    if isinstance(content, list):
+        content = " ".join(c.get("text", "") for c in content if "text" in c)
+    return content[:max_length]
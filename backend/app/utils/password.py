@@ -0,0 +1,145 @@
+"""
+密码哈希
+
+Argon2id 哈希和校验是 CPU 密集的操作，单次耗时数十毫秒，在事件循环中执行会阻塞
+所有进行中的请求和流式响应，因此放到进程池中执行；排队的任务数达到上限时直接拒绝，
+避免登录高峰时请求无限堆积
+
+哈希参数来自配置，参数变化后校验时返回按新参数计算的哈希，由调用方替换旧哈希
+"""
+
+import asyncio
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+
+from pwdlib._hash import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from app.config import CFG
+from app.exceptions.user import PasswordHashBusyError
+
+
+def create_password_hash(
+    time_cost: int, memory_cost: int, parallelism: int
+) -> PasswordHash:
+    """按指定参数创建 Argon2id 哈希"""
+    return PasswordHash(
+        (
+            Argon2Hasher(
+                time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+            ),
+        )
+    )
+
+
+# 子进程以 spawn 启动时重新导入本模块，与主进程使用相同的配置
+passwd_hash = create_password_hash(
+    CFG.password.time_cost, CFG.password.memory_cost, CFG.password.parallelism
+)
+
+
+def _hash(password: str) -> str:
+    return passwd_hash.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    return passwd_hash.verify(password, password_hash)
+
+
+def _verify_and_update(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return passwd_hash.verify_and_update(password, password_hash)
+
+
+def _ping() -> None: ...
+
+
+class PasswordHasher:
+    """在进程池中执行密码哈希和校验，并统计排队情况"""
+
+    def __init__(self):
+        self._executor: ProcessPoolExecutor | None = None
+        self.pending = 0  # 排队和执行中的任务数
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._total_seconds = 0.0
+        self._dummy_hash: str | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn 启动的子进程不继承事件循环、连接池等父进程状态
+            self._executor = ProcessPoolExecutor(
+                max_workers=CFG.password.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, func: Callable, *args):
+        if self.pending >= CFG.password.max_pending:
+            self.rejected += 1
+            raise PasswordHashBusyError
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            self._total_seconds += time.perf_counter() - start
+
+    async def hash(self, password: str) -> str:
+        """计算密码哈希"""
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """校验密码"""
+        return await self._run(_verify, password, password_hash)
+
+    async def verify_and_update(
+        self, password: str, password_hash: str
+    ) -> tuple[bool, str | None]:
+        """校验密码，哈希参数已过时则同时返回按当前参数计算的新哈希"""
+        return await self._run(_verify_and_update, password, password_hash)
+
+    async def dummy_hash(self) -> str:
+        """用户不存在时用于校验的哈希，避免时序攻击；首次使用时计算，不占用启动时间"""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash("dummy_password")
+        return self._dummy_hash
+
+    async def start(self) -> None:
+        """预先启动所有工作进程，避免首批请求等待进程启动"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(
+            *[
+                loop.run_in_executor(executor, _ping)
+                for _ in range(CFG.password.workers)
+            ]
+        )
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """统计信息"""
+        return {
+            "workers": CFG.password.workers,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": self._total_seconds / self.completed * 1000
+            if self.completed
+            else 0.0,
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,156 @@
+"""
+令牌桶限流
+
+每个键一个令牌桶，容量为 capacity，每秒补充 rate 个令牌，每次请求消耗 cost 个令牌
+(cost 为 0 时只检查)，令牌不足时拒绝并返回需要等待的秒数:
+- LocalBucketStore: 进程内存储，按内存占用淘汰最久未使用的桶，被淘汰的桶视为满桶
+- RedisBucketStore: Lua 脚本原子地更新共享的桶，多 worker 共用同一限额
+
+登录和注册按客户端 IP 和邮箱各限流一次，在查询数据库和计算密码哈希之前拒绝；
+每次请求消耗客户端 IP 的令牌，邮箱的令牌只在登录凭据校验失败后消耗，
+他人无法用错误密码之外的请求耗尽某个邮箱的限额，正确的登录也不受影响
+"""
+
+import time
+
+from app.config import CFG
+from app.exceptions.user import TooManyAttemptsError
+from app.utils.cache import CacheBackend, RedisBackend, cache_backend
+from app.utils.context import client_ip_ctx
+from app.utils.log import app_logger
+from app.utils.lru_cache import LRUCache
+
+ENTRY_BYTES = 200  # 单个令牌桶的估算内存占用(键 + 元组)
+
+# 返回需要等待的秒数，Lua 数字转为 Redis 整数时会截断小数，以字符串返回
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate
+else
+    tokens = tokens - cost
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class BucketStore:
+    """令牌桶存储"""
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        """消耗 cost 个令牌，成功时返回 0，令牌不足一个时返回需要等待的秒数"""
+        raise NotImplementedError
+
+
+class LocalBucketStore(BucketStore):
+    """进程内令牌桶存储"""
+
+    def __init__(self, max_bytes: int):
+        # 键 -> (剩余令牌数, 更新时间)
+        self.buckets: LRUCache[str, tuple[float, float]] = LRUCache(
+            max_bytes, lambda _: ENTRY_BYTES
+        )
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        now = time.monotonic()
+        tokens, updated = self.buckets.peek(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self.buckets.set(key, (tokens, now))
+            return (1 - tokens) / rate
+        self.buckets.set(key, (tokens - cost, now))
+        return 0.0
+
+
+class RedisBucketStore(BucketStore):
+    """Redis 令牌桶存储，Redis 不可用时放行"""
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        try:
+            wait = await self._script(keys=[key], args=[capacity, rate, cost])
+        except Exception as e:
+            app_logger.error(f"Rate limit store error: {e}")
+            return 0.0
+        return float(wait.decode() if isinstance(wait, bytes) else wait)
+
+
+def create_bucket_store(backend: CacheBackend) -> BucketStore:
+    """共享缓存后端为 Redis 时使用 Redis 存储，否则使用进程内存储"""
+    if isinstance(backend, RedisBackend):
+        return RedisBucketStore(backend.client)
+    return LocalBucketStore(CFG.throttle.max_bytes)
+
+
+class LoginThrottle:
+    """登录和注册限流，并统计放行和拒绝的次数"""
+
+    def __init__(self, store: BucketStore):
+        self.store = store
+        self.allowed = 0
+        self.rejected = {"ip": 0, "email": 0}
+
+    async def check(self, email: str) -> None:
+        """
+        消耗客户端 IP 的令牌并检查邮箱的剩余令牌，任一不足时抛出 TooManyAttemptsError
+
+        客户端 IP 取日志中间件按可信代理解析的地址
+        """
+        cfg = CFG.throttle
+        if not cfg.enabled:
+            return
+        for scope, key, capacity, per_minute, cost in (
+            ("ip", client_ip_ctx.get(), cfg.ip_capacity, cfg.ip_refill_per_minute, 1),
+            # 邮箱只检查不消耗，由 record_failure 消耗
+            (
+                "email",
+                email.lower(),
+                cfg.email_capacity,
+                cfg.email_refill_per_minute,
+                0,
+            ),
+        ):
+            wait = await self.store.take(
+                f"throttle:{scope}:{key}", capacity, per_minute / 60, cost
+            )
+            if wait:
+                self.rejected[scope] += 1
+                raise TooManyAttemptsError(wait)
+        self.allowed += 1
+
+    async def record_failure(self, email: str) -> None:
+        """登录凭据校验失败后消耗邮箱的令牌"""
+        cfg = CFG.throttle
+        if not cfg.enabled:
+            return
+        await self.store.take(
+            f"throttle:email:{email.lower()}",
+            cfg.email_capacity,
+            cfg.email_refill_per_minute / 60,
+        )
+
+    def stats(self) -> dict:
+        """统计信息"""
+        stats = {"allowed": self.allowed, "rejected": self.rejected}
+        if isinstance(self.store, LocalBucketStore):
+            buckets = self.store.buckets.stats()
+            stats["buckets"] = buckets["entries"]
+            stats["bytes_used"] = buckets["bytes_used"]
+        return stats
+
+
+login_throttle = LoginThrottle(create_bucket_store(cache_backend))
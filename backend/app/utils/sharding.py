@@ -0,0 +1,26 @@
+"""
+分片
+
+使用 Jump Consistent Hash 将 user_id 映射到分片，分片数从 N 增加到 N+1 时
+只有约 1/(N+1) 的用户需要迁移
+
+各分片的自增 id 使用互不重叠的区间（分片 i 从 i << SHARD_ID_BITS 开始），
+迁移数据时保留原 id 不会冲突
+"""
+
+SHARD_ID_BITS = 40
+
+
+def jump_hash(key: int, num_buckets: int) -> int:
+    """Jump Consistent Hash，返回 [0, num_buckets) 内的分片序号"""
+    b, j = -1, 0
+    while j < num_buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_id_start(index: int) -> int:
+    """分片自增 id 的起始值"""
+    return index << SHARD_ID_BITS
@@ -0,0 +1,91 @@
+"""
+刷新令牌校验缓存
+
+- 有效令牌缓存: 数据库校验通过的 jti，在较短的有效期内再次校验无需查询数据库
+- 撤销集合: 已撤销的 jti，保留到令牌过期为止
+
+撤销令牌时广播通知所有 worker 删除有效令牌缓存并加入撤销集合；两者都按内存占用淘汰，
+被淘汰的令牌回退到数据库校验，广播丢失时最多在有效令牌缓存的有效期内仍接受已撤销的令牌
+"""
+
+import time
+
+from app.config import CFG
+from app.utils.cache import CacheBackend
+from app.utils.lru_cache import LRUCache
+
+REVOKE_CHANNEL = "auth:revoke"
+ENTRY_BYTES = 160  # 单个条目的估算内存占用(jti 字符串 + 元组)
+
+
+class RefreshTokenCache:
+    """刷新令牌校验缓存"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        # jti -> (user_id, 缓存截止时间)
+        self.valid: LRUCache[str, tuple[int, float]] = LRUCache(
+            CFG.cache.refresh_token_max_bytes, lambda _: ENTRY_BYTES
+        )
+        # jti -> 令牌过期时间
+        self.revoked: LRUCache[str, float] = LRUCache(
+            CFG.cache.refresh_token_max_bytes, lambda _: ENTRY_BYTES
+        )
+        self._subscribed = False
+
+    async def _ensure_subscribed(self) -> None:
+        if not self._subscribed and self.backend.shared:
+            self._subscribed = True
+            await self.backend.subscribe(REVOKE_CHANNEL, self._on_revoke)
+
+    def _on_revoke(self, message: str) -> None:
+        """收到其他 worker 的撤销广播"""
+        jti, _, expires_at = message.partition("|")
+        self._add_revoked(jti, float(expires_at))
+
+    def _add_revoked(self, jti: str, expires_at: float) -> None:
+        self.valid.delete(jti)
+        if expires_at > time.time():
+            self.revoked.set(jti, expires_at)
+
+    async def check(self, jti: str, user_id: int) -> bool | None:
+        """
+        校验刷新令牌
+
+        返回 True 表示有效，False 表示已撤销，None 表示缓存未命中需要查询数据库
+        """
+        await self._ensure_subscribed()
+        now = time.time()
+        expires_at = self.revoked.get(jti)
+        if expires_at is not None:
+            if expires_at > now:
+                return False
+            self.revoked.delete(jti)
+        entry = self.valid.get(jti)
+        if entry is None:
+            return None
+        cached_user_id, until = entry
+        if cached_user_id != user_id or until <= now:
+            self.valid.delete(jti)
+            return None
+        return True
+
+    def add_valid(self, jti: str, user_id: int, expires_at: float) -> None:
+        """缓存数据库校验通过的令牌，缓存时间不超过令牌过期时间"""
+        if self.revoked.peek(jti) is not None:  # 校验期间收到了撤销广播
+            return
+        until = min(expires_at, time.time() + CFG.cache.refresh_token_ttl)
+        self.valid.set(jti, (user_id, until))
+
+    async def revoke(self, tokens: list[tuple[str, float]]) -> None:
+        """撤销令牌并通知其他 worker，tokens 为 (jti, 过期时间) 列表"""
+        await self._ensure_subscribed()
+        for jti, expires_at in tokens:
+            self._add_revoked(jti, expires_at)
+        if self.backend.shared:
+            for jti, expires_at in tokens:
+                await self.backend.publish(REVOKE_CHANNEL, f"{jti}|{expires_at}")
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        return {"valid": self.valid.stats(), "revoked": self.revoked.stats()}
@@ -0,0 +1,79 @@
+"""
+访问令牌校验开销测试
+
+对比访问令牌解析缓存开启和关闭时:
+- 单独调用 _decode_access_token 的耗时
+- 只依赖 authenticate_access_token 的空接口经完整 ASGI 调用链的每请求耗时
+
+运行: uv run -m benchmarks.access_token
+"""
+
+import asyncio
+import time
+from typing import Annotated
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.schemas.user import AccessTokenPayload
+from app.services.auth import (
+    _decode_access_token,
+    _generate_access_token,
+    access_token_cache,
+    authenticate_access_token,
+)
+
+DECODE_ROUNDS = 20000
+REQUESTS = 5000
+
+app = FastAPI()
+
+
+@app.get("/ping")
+async def ping(
+    payload: Annotated[AccessTokenPayload, Depends(authenticate_access_token)],
+):
+    return {"user_id": payload.sub}
+
+
+def bench_decode(token: str) -> float:
+    """返回单次解析的平均耗时(微秒)"""
+    start = time.perf_counter()
+    for _ in range(DECODE_ROUNDS):
+        _decode_access_token(token)
+    return (time.perf_counter() - start) / DECODE_ROUNDS * 1e6
+
+
+async def bench_requests(token: str) -> float:
+    """返回单个请求的平均耗时(微秒)"""
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        for _ in range(100):  # 预热
+            await client.get("/ping", headers=headers)
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await client.get("/ping", headers=headers)
+        return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+async def main():
+    token = _generate_access_token("jti", 1, ["user", "vip"])
+    max_bytes = access_token_cache.max_bytes
+    print(f"{'cache':>6} {'decode us':>10} {'request us':>11}")
+    try:
+        for enabled in (False, True):
+            # 容量为 0 时任何条目都超过容量，不会被缓存
+            access_token_cache.max_bytes = max_bytes if enabled else 0
+            access_token_cache.clear()
+            decode_us = bench_decode(token)
+            request_us = await bench_requests(token)
+            print(
+                f"{'on' if enabled else 'off':>6} {decode_us:>10.2f} {request_us:>11.1f}"
+            )
+    finally:
+        access_token_cache.max_bytes = max_bytes
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+启动导入耗时测试
+
+在新进程中用 -X importtime 多次导入 app.main，统计:
+- 总耗时: 从解释器启动到导入完成的墙钟时间
+- 每个 app 模块自身的耗时(不含其导入的模块)，超过预算的通常是模块级的计算或网络请求，
+  应推迟到首次使用时执行
+- 耗时最多的第三方顶层包(含其导入的模块)
+
+运行: uv run -m benchmarks.import_time
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROUNDS = 5
+MODULE_BUDGET_MS = 60  # app 模块自身导入耗时预算(毫秒)
+TOP_PACKAGES = 10
+
+
+def import_once() -> tuple[float, list[tuple[str, int, int]]]:
+    """导入一次 app.main，返回墙钟耗时(毫秒)和 (模块, 自身耗时, 累计耗时) 列表(微秒)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return elapsed, modules
+
+
+def main():
+    totals = []
+    self_times: dict[str, list[int]] = defaultdict(list)
+    package_times: dict[str, list[int]] = defaultdict(list)
+    for _ in range(ROUNDS):
+        elapsed, modules = import_once()
+        totals.append(elapsed)
+        for name, self_us, cumulative_us in modules:
+            if name == "app" or name.startswith("app."):
+                self_times[name].append(self_us)
+            elif "." not in name:
+                package_times[name].append(cumulative_us)
+
+    print(
+        f"import app.main: median {statistics.median(totals):.0f} ms ({ROUNDS} rounds)"
+    )
+
+    print(f"\n{'app module':<48} {'self ms':>8}")
+    medians = {k: statistics.median(v) / 1000 for k, v in self_times.items()}
+    for name, ms in sorted(medians.items(), key=lambda i: -i[1]):
+        if ms < 1:
+            break
+        over = "  over budget" if ms > MODULE_BUDGET_MS else ""
+        print(f"{name:<48} {ms:>8.1f}{over}")
+
+    print(f"\n{'package':<48} {'cumulative ms':>14}")
+    medians = {k: statistics.median(v) / 1000 for k, v in package_times.items()}
+    for name, ms in sorted(medians.items(), key=lambda i: -i[1])[:TOP_PACKAGES]:
+        print(f"{name:<48} {ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
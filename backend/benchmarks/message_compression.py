@@ -0,0 +1,86 @@
+"""
+消息压缩存储基准测试
+
+对比不同大小的消息在压缩前后的存储字节数(含检索前缀)以及编码/解码耗时
+
+运行: uv run -m benchmarks.message_compression
+"""
+
+import random
+import statistics
+import time
+
+from app.config import CFG
+from app.utils.message_codec import decode_content, encode_content
+
+CODE_SNIPPET = '''
+def quick_sort(arr: list[int]) -> list[int]:
+    """快速排序"""
+    if len(arr) <= 1:
+        return arr
+    pivot = arr[len(arr) // 2]
+    left = [x for x in arr if x < pivot]
+    middle = [x for x in arr if x == pivot]
+    right = [x for x in arr if x > pivot]
+    return quick_sort(left) + middle + quick_sort(right)
+'''
+
+PROSE = "这段代码使用分治思想，先选取基准值，再将数组划分为三部分递归排序。"
+
+
+def make_answer(target_bytes: int) -> str:
+    """生成接近目标大小的代码密集型回答"""
+    parts = []
+    size = 0
+    while size < target_bytes:
+        part = random.choice(
+            [f"```python{CODE_SNIPPET}```\n", PROSE + "\n", f"- 第 {size} 步\n"]
+        )
+        parts.append(part)
+        size += len(part.encode())
+    return "".join(parts)
+
+
+def measure(content: str, rounds: int = 200) -> dict:
+    """测量存储字节数和编码/解码耗时"""
+    encode_times, decode_times = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        encoded = encode_content(content)
+        encode_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        decode_content(*encoded)
+        decode_times.append(time.perf_counter() - start)
+
+    text, _, compressed = encoded
+    # 压缩时 content 中仍保留检索用的前缀
+    stored = len(text.encode()) + (len(compressed) if compressed is not None else 0)
+    return {
+        "raw": len(content.encode()),
+        "stored": stored,
+        "encode_us": statistics.median(encode_times) * 1e6,
+        "decode_us": statistics.median(decode_times) * 1e6,
+    }
+
+
+def main():
+    random.seed(0)
+    print(
+        f"compress_threshold={CFG.message.compress_threshold} "
+        f"compress_level={CFG.message.compress_level}"
+    )
+    print(
+        f"{'raw bytes':>10} {'stored':>10} {'ratio':>7} "
+        f"{'encode us':>10} {'decode us':>10}"
+    )
+    for target in [200, 2_000, 8_000, 32_000, 128_000]:
+        r = measure(make_answer(target))
+        print(
+            f"{r['raw']:>10} {r['stored']:>10} {r['stored'] / r['raw']:>7.2f} "
+            f"{r['encode_us']:>10.1f} {r['decode_us']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
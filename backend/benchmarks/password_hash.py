@@ -0,0 +1,79 @@
+"""
+密码哈希负载测试
+
+模拟登录高峰: 并发执行大量密码校验，同时用一个定时任务测量事件循环的调度延迟，
+对比在事件循环中直接执行与在进程池中执行的差异
+
+运行: uv run -m benchmarks.password_hash
+"""
+
+import asyncio
+import statistics
+import time
+
+from app.config import CFG
+from app.utils.password import passwd_hash, password_hasher
+
+TICK = 0.005  # 探测任务的间隔(秒)
+
+
+async def probe(lags: list[float], stop: asyncio.Event) -> None:
+    """记录每次 sleep 超出预期的时间，即事件循环被阻塞的时长"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def inline_verify(password: str, password_hash: str) -> bool:
+    return passwd_hash.verify(password, password_hash)
+
+
+async def storm(verify, password_hash: str, logins: int) -> dict:
+    """并发执行 logins 次校验，返回耗时和事件循环延迟"""
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(TICK * 4)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[verify("password", password_hash) for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    lags.sort()
+    return {
+        "elapsed": elapsed,
+        "p50_ms": statistics.median(lags) * 1000,
+        "p99_ms": lags[int(len(lags) * 0.99)] * 1000,
+        "max_ms": lags[-1] * 1000,
+    }
+
+
+async def main():
+    password_hash = passwd_hash.hash("password")
+    await password_hasher.start()
+    print(f"workers={CFG.password.workers} max_pending={CFG.password.max_pending}")
+    print(
+        f"{'mode':>8} {'logins':>7} {'elapsed s':>10} {'login/s':>8} "
+        f"{'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}"
+    )
+    try:
+        for logins in [8, 32, CFG.password.max_pending]:
+            for mode, verify in [
+                ("inline", inline_verify),
+                ("pool", password_hasher.verify),
+            ]:
+                r = await storm(verify, password_hash, logins)
+                print(
+                    f"{mode:>8} {logins:>7} {r['elapsed']:>10.2f} "
+                    f"{logins / r['elapsed']:>8.1f} {r['p50_ms']:>11.2f} "
+                    f"{r['p99_ms']:>11.2f} {r['max_ms']:>11.2f}"
+                )
+    finally:
+        password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -17,6 +17,7 @@ fake = Faker("zh_CN")
 @pytest.fixture(scope="session")
 def client():
     """Synchronous test client for FastAPI."""
+    CFG.throttle.enabled = False  # 测试从同一地址注册大量用户，关闭限流
     with TestClient(app) as tc:
         yield tc
 
@@ -0,0 +1,194 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+from app.utils.cache import LocalBackend, RedisBackend, TieredCache
+from app.utils.lru_cache import LRUCache
+from app.utils.token_cache import RefreshTokenCache
+from fakeredis.aioredis import FakeRedis
+
+
+def _make_cache(backend) -> TieredCache[dict]:
+    return TieredCache(
+        "test",
+        LRUCache(1024, lambda v: len(str(v))),
+        backend,
+        encode=lambda v: v,
+        decode=lambda v: v,
+        ttl=60,
+    )
+
+
+@pytest.mark.asyncio
+async def test_local_backend_ttl():
+    """测试进程内后端过期"""
+    backend = LocalBackend()
+    await backend.set("k", "v", ttl=0.01)
+    assert await backend.get("k") == "v"
+    await asyncio.sleep(0.02)
+    assert await backend.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_local_backend():
+    """测试仅使用进程内缓存"""
+    cache = _make_cache(LocalBackend())
+    await cache.set(1, {"a": 1})
+    assert await cache.get(1) == {"a": 1}
+    await cache.delete(1)
+    assert await cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_shared_between_workers():
+    """测试多个 worker 通过 Redis 共享缓存并广播失效"""
+    server = fakeredis.FakeServer()
+    backend_a = RedisBackend(FakeRedis(server=server))
+    backend_b = RedisBackend(FakeRedis(server=server))
+    cache_a, cache_b = _make_cache(backend_a), _make_cache(backend_b)
+    try:
+        await cache_a.set(1, {"v": 1})
+        # worker B 从共享层读取并填充本地缓存
+        assert await cache_b.get(1) == {"v": 1}
+        assert cache_b.shared_hits == 1
+        assert cache_b.local.peek("test:1") == {"v": 1}
+
+        # worker A 更新后，worker B 的本地副本被清除
+        await cache_a.set(1, {"v": 2})
+        for _ in range(50):
+            if cache_b.local.peek("test:1") is None:
+                break
+            await asyncio.sleep(0.02)
+        assert cache_b.local.peek("test:1") is None
+        assert await cache_b.get(1) == {"v": 2}
+
+        # worker A 删除后，worker B 读不到
+        await cache_a.delete(1)
+        for _ in range(50):
+            if cache_b.local.peek("test:1") is None:
+                break
+            await asyncio.sleep(0.02)
+        assert await cache_b.get(1) is None
+    finally:
+        await backend_a.close()
+        await backend_b.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_cache():
+    """测试刷新令牌校验缓存和撤销广播"""
+    backend = RedisBackend(FakeRedis())
+    worker_a, worker_b = RefreshTokenCache(backend), RefreshTokenCache(backend)
+    expires_at = time.time() + 3600
+
+    assert await worker_a.check("jti", 1) is None  # 未缓存
+    worker_a.add_valid("jti", 1, expires_at)
+    worker_b.add_valid("jti", 1, expires_at)
+    assert await worker_a.check("jti", 1) is True
+    assert await worker_a.check("jti", 2) is None  # 用户不匹配
+
+    # worker_b 撤销后 worker_a 收到广播
+    await worker_b.revoke([("jti", expires_at)])
+    assert await worker_b.check("jti", 1) is False
+    for _ in range(50):
+        if await worker_a.check("jti", 1) is False:
+            break
+        await asyncio.sleep(0.02)
+    assert await worker_a.check("jti", 1) is False
+
+    # 撤销后不再缓存为有效
+    worker_a.add_valid("jti", 1, expires_at)
+    assert await worker_a.check("jti", 1) is False
+    await backend.close()
+
+
+def test_access_token_cache():
+    """测试访问令牌解析缓存"""
+    from app.exceptions.auth import ExpiredAccessTokenError
+    from app.services.auth import (
+        _decode_access_token,
+        _generate_access_token,
+        access_token_cache,
+    )
+
+    token = _generate_access_token("jti", 1, ["user"])
+    payload = _decode_access_token(token)
+    hits = access_token_cache.hits
+    assert _decode_access_token(token) is payload  # 命中缓存，不再解析
+    assert access_token_cache.hits == hits + 1
+
+    # 缓存的令牌过期后不再接受
+    access_token_cache.set(token, payload.model_copy(update={"exp": time.time()}))
+    with pytest.raises(ExpiredAccessTokenError):
+        _decode_access_token(token)
+    assert access_token_cache.peek(token) is None
+
+
+@pytest.mark.asyncio
+async def test_local_bucket_store():
+    """测试进程内令牌桶"""
+    from app.utils.rate_limit import LocalBucketStore
+
+    store = LocalBucketStore(1024)
+    assert await store.take("k", 2, 10) == 0
+    assert await store.take("k", 2, 10) == 0
+    wait = await store.take("k", 2, 10)  # 令牌耗尽
+    assert 0 < wait <= 0.1
+    assert await store.take("other", 2, 10) == 0  # 各键独立
+    await asyncio.sleep(wait)
+    assert await store.take("k", 2, 10) == 0  # 补充后放行
+    assert await store.take("other", 2, 10, cost=0) == 0  # 只检查不消耗
+    assert await store.take("other", 2, 10, cost=0) == 0
+    assert await store.take("other", 2, 10) == 0
+
+
+@pytest.mark.asyncio
+async def test_history_cache_fill_stale(monkeypatch):
+    """测试回填的消息已被新写入的消息淘汰时不保留缓存"""
+    from datetime import datetime
+
+    from app.schemas.chat import MessageItem
+    from app.services import chat
+
+    messages = [
+        MessageItem(message_id=1, role="user", content="hi", timestamp=datetime.now())
+    ]
+
+    async def latest_message_id(conversation_id):
+        return latest
+
+    monkeypatch.setattr(chat, "_latest_message_id", latest_message_id)
+
+    latest = 1
+    await chat._fill_history_cache(-1, messages, False)
+    assert await chat.history_cache.peek(-1) is not None
+
+    latest = 2  # 回填期间写入了新消息
+    await chat._fill_history_cache(-1, messages, False)
+    assert await chat.history_cache.peek(-1) is None
+
+
+@pytest.mark.asyncio
+async def test_cos_exists_cache(monkeypatch):
+    """测试删除对象后不再返回缓存的存在标记"""
+    from app.utils import cos
+
+    class FakeClient:
+        def __init__(self):
+            self.objects = {"1/images/a.png"}
+
+        def object_exists(self, **kwargs):
+            return kwargs["Key"] in self.objects
+
+        def delete_object(self, **kwargs):
+            self.objects.discard(kwargs["Key"])
+
+    client = FakeClient()
+    monkeypatch.setattr(cos, "_get_client", lambda: client)
+    assert await cos.object_exists("1/images/a.png") is True
+    assert await cos.exists_cache.peek("1/images/a.png") is True
+
+    await cos.delete_object("1/images/a.png")
+    assert await cos.exists_cache.peek("1/images/a.png") is None
+    assert await cos.object_exists("1/images/a.png") is False
@@ -1,9 +1,13 @@
+import hashlib
+
 from conftest import (
     create_conversation,
     create_model_config,
     get_token,
 )
 
+from app.services.image_ref import content_image_keys
+
 # 测试专用的模型配置
 TEST_MODEL_CONFIG = {
     "name": "Test Model Config",
@@ -35,6 +39,71 @@ def test_get_upload_presigned_url_success(client):
     assert all(isinstance(url, str) for url in data["urls"])
 
 
+def test_get_upload_presigned_url_with_hashes(client):
+    """测试按内容哈希获取上传预签名URL"""
+    token = get_token(client)
+    model_config_id = create_model_config(client, token)
+    conversation_id = create_conversation(client, token, model_config_id)
+    content_hash = hashlib.sha256(b"test image").hexdigest()
+
+    response = client.post(
+        "/api/v1/chat/get_upload_presigned_url",
+        json={
+            "conversation_id": conversation_id,
+            "suffixes": ["png"],
+            "hashes": [content_hash],
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["urls"]) == 1
+    assert data["cos_urls"][0].startswith("cos://")
+    assert data["cos_urls"][0].endswith(f"{content_hash}.png")
+    assert len(data["exists"]) == 1
+
+
+def test_get_upload_presigned_url_with_hashes_not_found(client):
+    """测试按内容哈希获取上传预签名URL时对话不存在"""
+    token = get_token(client)
+
+    response = client.post(
+        "/api/v1/chat/get_upload_presigned_url",
+        json={"conversation_id": 0, "suffixes": ["png"], "hashes": ["a" * 64]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 404
+
+
+def test_get_upload_presigned_url_invalid_hash(client):
+    """测试哈希格式错误"""
+    token = get_token(client)
+
+    response = client.post(
+        "/api/v1/chat/get_upload_presigned_url",
+        json={"conversation_id": 1, "suffixes": ["png"], "hashes": ["abc"]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 422
+
+
+def test_content_image_keys():
+    """测试提取按内容寻址图片的引用"""
+    content_hash = "a" * 64
+    contents = [
+        "纯文本消息",
+        [
+            {"type": "text", "text": "看图"},
+            {"type": "image_url", "image_url": f"cos://1/images/{content_hash}.png"},
+            {"type": "image_url", "image_url": "cos://1/5/images/abc.png"},
+            {"type": "image_url", "image_url": f"cos://2/images/{content_hash}.png"},
+        ],
+        [{"type": "image_url", "image_url": f"cos://1/images/{content_hash}.png"}],
+    ]
+
+    assert content_image_keys(1, contents) == {f"1/images/{content_hash}.png"}
+
+
 # ============ 测试 get_messages ============
 
 
@@ -53,6 +122,32 @@ def test_get_messages_empty(client):
     assert data["messages"] == []
 
 
+def test_get_messages_pagination_params(client):
+    """测试消息分页参数"""
+    token = get_token(client)
+    model_config_id = create_model_config(client, token)
+    conversation_id = create_conversation(client, token, model_config_id)
+
+    response = client.get(
+        f"/api/v1/chat/{conversation_id}",
+        params={"before_id": 1, "limit": 10},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["messages"] == []
+    assert data["has_more"] is False
+    assert data["next_before_id"] is None
+
+    # limit 超出范围
+    response = client.get(
+        f"/api/v1/chat/{conversation_id}",
+        params={"limit": 0},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 422
+
+
 def test_get_messages_not_found(client):
     """测试获取不存在的对话消息记录"""
     token = get_token(client)
@@ -124,6 +219,50 @@ def test_send_message_with_extra_params(client):
     assert ai_message_id > 0
 
 
+def test_send_message_context_beyond_one_page(client, monkeypatch):
+    """测试超过一页的对话发送消息时，模型上下文包含完整的历史"""
+    from app.services import chat
+
+    contexts = []
+
+    async def fake_stream_model(messages, *args, **kwargs):
+        contexts.append([m.content for m in messages])
+        yield "ok"
+
+    monkeypatch.setattr(chat, "stream_model", fake_stream_model)
+    monkeypatch.setattr(chat, "CONTEXT_PAGE_SIZE", 20)  # 上下文分多页读取
+    token = get_token(client)
+    model_config_id = create_model_config(client, token)
+    conversation_id = create_conversation(client, token, model_config_id)
+
+    for i in range(31):
+        response = client.post(
+            "/api/v1/chat/send",
+            json={
+                "conversation_id": conversation_id,
+                # 客户端只发送新消息
+                "messages": [{"role": "user", "content": f"消息 {i}"}],
+                "base_url": TEST_MODEL_CONFIG["base_url"],
+                "model_name": TEST_MODEL_CONFIG["model_name"],
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200
+        assert '"type": "complete"' in response.text
+
+    # 显示只取最近一页
+    response = client.get(
+        f"/api/v1/chat/{conversation_id}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.json()["has_more"] is True
+
+    # 第 31 次发送时上下文为之前的 30 轮对话加新消息
+    assert len(contexts[-1]) == 61
+    assert contexts[-1][0] == "消息 0"
+    assert contexts[-1][-1] == "消息 30"
+
+
 # ============ 测试生成对话标题 ============
 
 
@@ -36,6 +36,49 @@ def test_create_conversation_multiple(client):
     assert len(data["conversations"]) == 3
 
 
+def test_get_conversations_pagination(client):
+    """测试对话列表游标分页"""
+    token = get_token(client)
+    model_config_id = create_model_config(client, token)
+
+    conversation_ids = []
+    for _ in range(3):
+        conversation_id = create_conversation(client, token, model_config_id)
+        conversation_ids.append(conversation_id)
+
+    # 第一页
+    response = client.get(
+        "/api/v1/conversation",
+        params={"limit": 2},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["conversations"]) == 2
+    assert data["has_more"] is True
+
+    # 第二页
+    response = client.get(
+        "/api/v1/conversation",
+        params={
+            "limit": 2,
+            "before_at": data["next_before_at"],
+            "before_id": data["next_before_id"],
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    next_data = response.json()
+    assert len(next_data["conversations"]) == 1
+    assert next_data["has_more"] is False
+
+    # 两页合起来覆盖全部对话且不重复
+    returned_ids = [
+        i["conversation_id"] for i in data["conversations"] + next_data["conversations"]
+    ]
+    assert sorted(returned_ids) == sorted(conversation_ids)
+
+
 def test_delete_conversations_success(client):
     """测试成功批量删除对话"""
     token = get_token(client)
@@ -76,6 +119,64 @@ def test_delete_conversations_not_found(client):
     assert "不存在" in response.json()["detail"]
 
 
+def test_delete_conversations_twice(client):
+    """测试已删除的对话不可再次删除或修改"""
+    token = get_token(client)
+    model_config_id = create_model_config(client, token)
+    conversation_id = create_conversation(client, token, model_config_id)
+
+    response = client.post(
+        "/api/v1/conversation/delete",
+        json={"ids": [conversation_id]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 204
+
+    response = client.post(
+        "/api/v1/conversation/delete",
+        json={"ids": [conversation_id]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 404
+
+    response = client.post(
+        "/api/v1/conversation/update",
+        json={"conversation_id": conversation_id, "title": "已删除"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 404
+
+    # 消息不可见
+    response = client.get(
+        f"/api/v1/chat/{conversation_id}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["messages"] == []
+
+
+def test_delete_conversations_other_user(client):
+    """测试不能删除其他用户的对话"""
+    token = get_token(client)
+    model_config_id = create_model_config(client, token)
+    conversation_id = create_conversation(client, token, model_config_id)
+
+    other_token = get_token(client)
+    response = client.post(
+        "/api/v1/conversation/delete",
+        json={"ids": [conversation_id]},
+        headers={"Authorization": f"Bearer {other_token}"},
+    )
+    assert response.status_code == 404
+
+    # 对话仍然存在
+    response = client.get(
+        "/api/v1/conversation", headers={"Authorization": f"Bearer {token}"}
+    )
+    data = response.json()
+    assert [i["conversation_id"] for i in data["conversations"]] == [conversation_id]
+
+
 def test_conversation_crud_full_flow(client):
     """测试对话的完整CRUD流程"""
     token = get_token(client)
@@ -119,3 +220,93 @@ def test_conversation_crud_full_flow(client):
         "/api/v1/conversation", headers={"Authorization": f"Bearer {token}"}
     )
     assert final_response.json()["conversations"] == []
+
+
+def test_search_conversations(client):
+    """测试按标题检索对话"""
+    token = get_token(client)
+    model_config_id = create_model_config(client, token)
+    conversation_id = create_conversation(client, token, model_config_id)
+
+    client.post(
+        "/api/v1/conversation/update",
+        json={"conversation_id": conversation_id, "title": "快速排序算法讨论"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    response = client.get(
+        "/api/v1/conversation/search",
+        params={"q": "排序"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [i["conversation_id"] for i in data["conversations"]] == [conversation_id]
+    assert data["conversations"][0]["highlights"] == [[2, 4]]
+    assert data["messages"] == []
+    assert data["has_more"] is False
+
+    # 检索词为空
+    response = client.get(
+        "/api/v1/conversation/search",
+        params={"q": ""},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 422
+
+
+def test_import_export_conversations(client):
+    """测试对话导入导出"""
+    import gzip
+    import json
+
+    token = get_token(client)
+    lines = [
+        {"type": "conversation", "title": "导入的对话"},
+        {"type": "message", "role": "user", "content": "你好"},
+        {
+            "type": "message",
+            "role": "assistant",
+            "content": "你好，有什么可以帮你？",
+            "prompt_tokens": 12,
+            "completion_tokens": 8,
+        },
+    ]
+    body = "".join(json.dumps(i, ensure_ascii=False) + "\n" for i in lines)
+
+    # 导入 gzip 压缩的数据
+    response = client.post(
+        "/api/v1/conversation/import",
+        content=gzip.compress(body.encode()),
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"conversations": 1, "messages": 2}
+
+    response = client.get(
+        "/api/v1/conversation", headers={"Authorization": f"Bearer {token}"}
+    )
+    conversation = response.json()["conversations"][0]
+    assert conversation["title"] == "导入的对话"
+    assert conversation["message_count"] == 2
+    assert conversation["total_prompt_tokens"] == 12
+    assert conversation["total_completion_tokens"] == 8
+
+    # 导出
+    response = client.get(
+        "/api/v1/conversation/export",
+        params={"compress": True},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    exported = [json.loads(i) for i in gzip.decompress(response.content).splitlines()]
+    assert [i["type"] for i in exported] == ["conversation", "message", "message"]
+    assert exported[2]["content"] == "你好，有什么可以帮你？"
+
+    # 格式错误
+    response = client.post(
+        "/api/v1/conversation/import",
+        content=b'{"type": "message", "role": "user", "content": "x"}\n',
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 400
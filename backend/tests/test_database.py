@@ -0,0 +1,62 @@
+from app.config import CFG, DBReplicaCfg
+from app.services.database import DatabaseManager
+from app.utils.context import user_id_ctx
+from app.utils.sharding import jump_hash
+
+
+def test_pick_read_engine(monkeypatch):
+    """测试只读请求路由到副本，写入后粘滞到主库"""
+    monkeypatch.setattr(
+        CFG.db.app, "replicas", [DBReplicaCfg(host="10.0.0.2", port=3306)]
+    )
+    manager = DatabaseManager()
+    primary = manager.get_engine("app")
+    [(key, replica)] = manager.get_replica_engines("app")
+
+    # 延迟未知时使用主库
+    assert manager.pick_read_engine("app") is primary
+
+    manager.replica_lag[key] = 0.0
+    assert manager.pick_read_engine("app") is replica
+
+    # 延迟超过阈值
+    manager.replica_lag[key] = CFG.db.max_replica_lag_seconds + 1
+    assert manager.pick_read_engine("app") is primary
+
+    # 写入后的读请求走主库，其他用户不受影响
+    manager.replica_lag[key] = 0.0
+    token = user_id_ctx.set("1")
+    try:
+        manager.mark_written("1")
+        assert manager.pick_read_engine("app") is primary
+        user_id_ctx.set("2")
+        assert manager.pick_read_engine("app") is replica
+    finally:
+        user_id_ctx.reset(token)
+
+
+def test_jump_hash_minimal_movement():
+    """测试增加分片时用户只会迁移到新分片"""
+    for user_id in range(1, 2000):
+        old, new = jump_hash(user_id, 3), jump_hash(user_id, 4)
+        assert 0 <= old < 3
+        assert new in (old, 3)
+    moved = sum(jump_hash(i, 3) != jump_hash(i, 4) for i in range(1, 2000))
+    assert 300 < moved < 700  # 约 1/4 的用户迁移
+
+
+def test_resolve_shard(monkeypatch):
+    """测试按 user_id 选择分片"""
+    manager = DatabaseManager()
+    assert manager.resolve("app", 42) == "app"
+
+    monkeypatch.setattr(CFG.db, "app_shards", [CFG.db.app, CFG.db.app])
+    assert manager.shard_names("app") == ["app", "app:1", "app:2"]
+    assert manager.resolve("app", 42) == manager.shard_names("app")[jump_hash(42, 3)]
+    assert manager.resolve("auth", 42) == "auth"
+
+    token = user_id_ctx.set("42")
+    try:
+        assert manager.resolve("app") == manager.resolve("app", 42)
+    finally:
+        user_id_ctx.reset(token)
@@ -0,0 +1,33 @@
+from app.utils.lru_cache import LRUCache
+
+
+def test_lru_cache_evicts_by_bytes():
+    """测试按内存占用淘汰最久未使用的条目"""
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.get("a")  # a 变为最近使用
+    cache.set("c", "xxxx")  # 超出容量，淘汰 b
+    assert cache.peek("b") is None
+    assert cache.peek("a") == "xxxx"
+    assert cache.bytes_used == 8
+
+
+def test_lru_cache_stats():
+    """测试命中统计"""
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.set("a", "x")
+    cache.get("a")
+    cache.get("b")
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_lru_cache_skips_oversized_value():
+    """测试超过总容量的条目不缓存"""
+    cache = LRUCache(max_bytes=3, sizeof=len)
+    cache.set("a", "xxxx")
+    assert cache.peek("a") is None
+    assert cache.bytes_used == 0
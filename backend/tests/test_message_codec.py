@@ -0,0 +1,30 @@
+import random
+import string
+
+from app.config import CFG
+from app.utils.message_codec import (
+    CONTENT_FORMAT_COMPRESSED,
+    decode_content,
+    encode_content,
+)
+
+
+def test_encode_content_cjk_prefix():
+    """测试压缩消息的检索前缀按字节截取且不截断字符"""
+    content = "中" * 1400  # 4200 字节
+    text, content_format, compressed = encode_content(content)
+    assert content_format & CONTENT_FORMAT_COMPRESSED
+    assert len(text.encode()) <= CFG.message.index_prefix_bytes
+    assert content.startswith(text)
+    assert len(text.encode()) + len(compressed) < len(content.encode())
+    assert decode_content(text, content_format, compressed) == content
+
+
+def test_encode_content_incompressible():
+    """测试压缩后不比原文小的内容原样存储"""
+    random.seed(0)
+    content = "".join(random.choices(string.printable, k=5000))
+    text, content_format, compressed = encode_content(content)
+    assert compressed is None
+    assert text == content
+    assert decode_content(text, content_format, compressed) == content
@@ -0,0 +1,27 @@
+from app.middleware.log import _get_client_ip
+from fastapi import Request
+
+
+def _request(host: str, headers: dict) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "client": (host, 12345),
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+def test_get_client_ip():
+    """测试按可信代理解析客户端 IP"""
+    # 可信代理转发: 取最右侧的非可信地址，客户端伪造的左侧地址被忽略
+    request = _request("172.28.0.10", {"X-Forwarded-For": "1.1.1.1, 8.8.8.8"})
+    assert _get_client_ip(request) == "8.8.8.8"
+    request = _request("172.28.0.10", {"X-Real-IP": "8.8.8.8"})
+    assert _get_client_ip(request) == "8.8.8.8"
+    # 直连请求: 不采用请求头
+    request = _request("8.8.4.4", {"X-Forwarded-For": "1.1.1.1"})
+    assert _get_client_ip(request) == "8.8.4.4"
+    # 经 docker 网关直连已发布的端口: 不是 nginx，不采用请求头
+    request = _request("172.28.0.1", {"X-Forwarded-For": "1.1.1.1"})
+    assert _get_client_ip(request) == "172.28.0.1"
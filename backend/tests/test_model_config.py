@@ -284,6 +284,45 @@ def test_delete_model_configs_single(client):
     assert response.status_code == 204
 
 
+def test_delete_model_configs_in_use(client):
+    """测试删除对话正在使用的模型配置"""
+    token = get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    config_id = create_model_config(
+        client,
+        token,
+        name="in_use_config",
+        base_url=fake.url(),
+        model_name=fake.word(),
+        api_key=fake.password(),
+    )
+    conversation_ids = []
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/conversation/create",
+            json={"model_config_id": config_id},
+            headers=headers,
+        )
+        conversation_ids.append(response.json()["conversation_id"])
+    # 已删除待清理的对话同样引用该配置
+    client.post(
+        "/api/v1/conversation/delete",
+        json={"ids": conversation_ids[1:]},
+        headers=headers,
+    )
+
+    response = client.post(
+        "/api/v1/model_config/delete", json={"ids": [config_id]}, headers=headers
+    )
+    assert response.status_code == 204
+
+    # 对话保留，不再引用已删除的配置
+    response = client.get("/api/v1/conversation", headers=headers)
+    conversations = response.json()["conversations"]
+    assert [i["conversation_id"] for i in conversations] == conversation_ids[:1]
+    assert conversations[0]["model_config_id"] is None
+
+
 def test_delete_model_configs_not_found(client):
     """测试批量删除不存在的模型配置"""
     token = get_token(client)
@@ -0,0 +1,18 @@
+from datetime import date
+
+from app.services.partition import _month_start, _partition_month
+
+
+def test_month_start():
+    """测试按月偏移计算分区边界"""
+    assert _month_start(date(2026, 10, 19)) == date(2026, 10, 1)
+    assert _month_start(date(2026, 10, 19), 3) == date(2027, 1, 1)
+    assert _month_start(date(2026, 1, 31), -1) == date(2025, 12, 1)
+    assert _month_start(date(2026, 10, 19), -22) == date(2024, 12, 1)
+
+
+def test_partition_month():
+    """测试解析分区名，边界分区不参与预建和删除"""
+    assert _partition_month("p202612") == date(2026, 12, 1)
+    assert _partition_month("pmin") is None
+    assert _partition_month("pmax") is None
@@ -0,0 +1,90 @@
+import pytest
+from app.config import CFG
+from app.exceptions.user import PasswordHashBusyError
+from app.utils.password import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_password_hasher():
+    """测试在进程池中哈希和校验密码"""
+    hasher = PasswordHasher()
+    try:
+        password_hash = await hasher.hash("password")
+        assert await hasher.verify("password", password_hash)
+        assert not await hasher.verify("wrong", password_hash)
+    finally:
+        hasher.shutdown()
+    stats = hasher.stats()
+    assert stats["completed"] == 3
+    assert stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_dummy_hash():
+    """测试 dummy 哈希在首次使用时计算并缓存"""
+    hasher = PasswordHasher()
+    try:
+        dummy_hash = await hasher.dummy_hash()
+        assert await hasher.dummy_hash() == dummy_hash
+        assert hasher.stats()["completed"] == 1
+        assert not await hasher.verify("password", dummy_hash)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_busy(monkeypatch):
+    """测试排队任务数达到上限时拒绝"""
+    monkeypatch.setattr(CFG.password, "max_pending", 0)
+    hasher = PasswordHasher()
+    with pytest.raises(PasswordHashBusyError):
+        await hasher.hash("password")
+    assert hasher.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_password_rehash():
+    """测试哈希参数过时时返回新哈希"""
+    from app.utils.password import create_password_hash
+
+    old_hash = create_password_hash(1, 8192, 1).hash("password")
+    hasher = PasswordHasher()
+    try:
+        valid, new_hash = await hasher.verify_and_update("password", old_hash)
+        assert valid
+        assert new_hash and f"t={CFG.password.time_cost}" in new_hash
+        # 新哈希无需再次更新
+        assert await hasher.verify_and_update("password", new_hash) == (True, None)
+        assert await hasher.verify_and_update("wrong", old_hash) == (False, None)
+    finally:
+        hasher.shutdown()
+
+
+def test_calibrate_write_config(tmp_path, monkeypatch):
+    """测试校准结果写入配置文件"""
+    from app.utils import _calibrate_password
+
+    config = tmp_path / "config.yml"
+    config.write_text(
+        "password: # 密码哈希\n"
+        "  workers: 2\n"
+        "  time_cost: 3 # 迭代次数\n"
+        "  memory_cost: 65536\n"
+        "  parallelism: 4\n"
+        "\n"
+        "cache:\n"
+        "  time_cost: 3\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(_calibrate_password, "CONFIG_DIR", tmp_path)
+    _calibrate_password.write_config(5, 32768, 2)
+    assert config.read_text(encoding="utf-8") == (
+        "password: # 密码哈希\n"
+        "  workers: 2\n"
+        "  time_cost: 5 # 迭代次数\n"
+        "  memory_cost: 32768\n"
+        "  parallelism: 2\n"
+        "\n"
+        "cache:\n"
+        "  time_cost: 3\n"
+    )
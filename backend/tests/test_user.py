@@ -1,3 +1,6 @@
+from app.services.database import db_manager
+from app.services.reaper import reap_refresh_tokens
+from app.services.user import group_scope_cache
 from faker import Faker
 
 fake = Faker("zh_CN")
@@ -184,6 +187,14 @@ def test_get_me_success(client):
     assert "groups" in data
     assert "normal" in data["groups"]
 
+    # 组信息未变化时不重新加载缓存
+    reloads = group_scope_cache.reloads
+    response = client.get(
+        "/api/v1/user/me", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.json()["groups"] == data["groups"]
+    assert group_scope_cache.reloads == reloads
+
 
 def test_get_me_no_token(client):
     """测试获取用户信息时未提供token"""
@@ -395,6 +406,33 @@ def test_logout_success(client):
     assert response.status_code == 200
 
 
+def test_reap_refresh_tokens(client):
+    """测试清理已撤销的刷新令牌"""
+    register_response = client.post(
+        "/api/v1/user/register",
+        json={
+            "email": generate_test_email(),
+            "username": fake.user_name(),
+            "password": fake.password(),
+        },
+    )
+    refresh_token = register_response.json()["refresh_token"]
+    client.cookies.set("refresh_token", refresh_token)
+    response = client.post("/api/v1/user/logout")
+    assert response.status_code == 200
+
+    async def _reap():
+        async with db_manager.get_session_maker("auth")() as db_session:
+            return await reap_refresh_tokens(db_session)
+
+    _, revoked = client.portal.call(_reap)
+    assert revoked >= 1
+
+    # 已删除的令牌仍然无效
+    response = client.post("/api/v1/user/refresh")
+    assert response.status_code == 401
+
+
 def test_refresh_token_success(client):
     """测试成功刷新令牌"""
     email = generate_test_email()
@@ -433,3 +471,73 @@ def test_refresh_token_invalid_token(client):
     client.cookies.set("refresh_token", "invalid_refresh_token")
     response = client.post("/api/v1/user/refresh")
     assert response.status_code == 401
+
+
+def test_refresh_token_rotation(client):
+    """测试刷新令牌轮换后旧令牌失效"""
+    register_response = client.post(
+        "/api/v1/user/register",
+        json={
+            "email": generate_test_email(),
+            "username": fake.user_name(),
+            "password": fake.password(),
+        },
+    )
+    old_refresh_token = register_response.json()["refresh_token"]
+
+    client.cookies.set("refresh_token", old_refresh_token)
+    response = client.post("/api/v1/user/refresh")
+    assert response.status_code == 200
+    new_refresh_token = response.json()["refresh_token"]
+    assert response.cookies.get("refresh_token") == new_refresh_token
+
+    # 旧令牌不能再次使用
+    client.cookies.set("refresh_token", old_refresh_token)
+    response = client.post("/api/v1/user/refresh")
+    assert response.status_code == 401
+
+    # 新令牌可以继续刷新
+    client.cookies.set("refresh_token", new_refresh_token)
+    response = client.post("/api/v1/user/refresh")
+    assert response.status_code == 200
+
+
+def test_login_throttle(client, monkeypatch):
+    """测试登录限流"""
+    from app.config import CFG
+
+    monkeypatch.setattr(CFG.throttle, "enabled", True)
+    monkeypatch.setattr(CFG.throttle, "email_capacity", 2)
+    email = generate_test_email()
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/user/login", json={"email": email, "password": "wrong"}
+        )
+        assert response.status_code != 429
+
+    # 同一邮箱超过限额后直接拒绝
+    response = client.post(
+        "/api/v1/user/login", json={"email": email, "password": "wrong"}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_login_throttle_success_not_charged(client, monkeypatch):
+    """测试正确的登录不消耗邮箱限额"""
+    from app.config import CFG
+
+    email = generate_test_email()
+    response = client.post(
+        "/api/v1/user/register",
+        json={"email": email, "username": "throttle", "password": "password123"},
+    )
+    assert response.status_code == 200
+
+    monkeypatch.setattr(CFG.throttle, "enabled", True)
+    monkeypatch.setattr(CFG.throttle, "email_capacity", 2)
+    for _ in range(3):
+        response = client.post(
+            "/api/v1/user/login", json={"email": email, "password": "password123"}
+        )
+        assert response.status_code == 200
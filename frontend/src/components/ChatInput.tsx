@@ -4,7 +4,7 @@ import { useChatStore } from '../stores/chatStore'
 import { useConversationStore } from '../stores/conversationStore'
 import { useModelConfigStore } from '../stores/modelConfigStore'
 import { useAuthStore } from '../stores/authStore'
-import { sendMessage, getUploadPresignedUrl, generateTitle, Message } from '../services/chat'
+import { sendMessage, getUploadPresignedUrl, generateTitle, hashBlob, Message } from '../services/chat'
 import { createConversation, updateConversation } from '../services/conversation'
 import { deleteModelConfigs } from '../services/modelConfig'
 import { showToast } from './Toast'
@@ -56,23 +56,27 @@ async function convertImagesToCos(messages: any[], conversationId: number) {
           
           try {
             // 获取预签名上传 URL
-            const uploadUrls = await getUploadPresignedUrl({ conversation_id: conversationId, suffixes: [suffix] })
-            const uploadUrl = uploadUrls[0]
-            const cosUrl = uploadUrl.split('?')[0]
-            
-            // 上传图片
             const base64Data = item.image_url.split(',')[1]
             const blob = base64ToBlob(base64Data, mimeType)
-            
-            await fetch(uploadUrl, {
-              method: 'PUT',
-              body: blob,
-              headers: {
-                'Content-Type': blob.type,
-              },
+            const hash = await hashBlob(blob)
+            const { urls, cos_urls, exists } = await getUploadPresignedUrl({
+              conversation_id: conversationId,
+              suffixes: [suffix],
+              hashes: [hash],
             })
-            
-            items.push({ type: 'image_url', image_url: cosUrl })
+
+            // 上传图片（已存在的相同图片跳过上传）
+            if (!exists[0]) {
+              await fetch(urls[0], {
+                method: 'PUT',
+                body: blob,
+                headers: {
+                  'Content-Type': blob.type,
+                },
+              })
+            }
+
+            items.push({ type: 'image_url', image_url: cos_urls[0] })
           } catch (error) {
             console.error('Failed to upload image:', error)
             // 上传失败，保留原始图片 URL
@@ -219,24 +223,30 @@ export default function ChatInput({ onShowLogin }: ChatInputProps) {
           return match ? match[1] : 'png'
         })
         
-        const uploadUrls = await getUploadPresignedUrl({ conversation_id: conversationId!, suffixes })
+        // 从base64 URL中提取原始数据并计算内容哈希
+        const blobs = attachedImages.map((img) => base64ToBlob(img.displayUrl.split(',')[1]))
+        const hashes = await Promise.all(blobs.map(hashBlob))
+
+        const { urls, cos_urls, exists } = await getUploadPresignedUrl({
+          conversation_id: conversationId!,
+          suffixes,
+          hashes,
+        })
         
-        // 上传每个图片
+        // 上传每个图片（已存在的相同图片跳过上传）
         for (let i = 0; i < attachedImages.length; i++) {
-          const uploadUrl = uploadUrls[i]
-          const cosUrl = uploadUrl.split('?')[0]
+          const cosUrl = cos_urls[i]
+          const blob = blobs[i]
           
-          // 从base64 URL中提取原始数据
-          const base64Data = attachedImages[i].displayUrl.split(',')[1]
-          const blob = base64ToBlob(base64Data)
-          
-          await fetch(uploadUrl, {
-            method: 'PUT',
-            body: blob,
-            headers: {
-              'Content-Type': blob.type,
-            },
-          })
+          if (!exists[i]) {
+            await fetch(urls[i], {
+              method: 'PUT',
+              body: blob,
+              headers: {
+                'Content-Type': blob.type,
+              },
+            })
+          }
           
           // 更新attachedImages中的cosUrl
           attachedImages[i].cosUrl = cosUrl
@@ -295,7 +305,7 @@ export default function ChatInput({ onShowLogin }: ChatInputProps) {
             sendMessage(
               {
                 conversation_id: conversationId!,
-                messages: [...messagesWithoutTimestamp, userMessageForBackend], // 使用后端版本的消息
+                messages: [userMessageForBackend], // 只发送新消息（后端版本），模型上下文由后端从数据库读取
                 base_url: currentConfig.base_url || '',
                 model_name: currentConfig.model_name,
                 api_key: currentConfig.api_key ?? null,
@@ -379,7 +389,7 @@ export default function ChatInput({ onShowLogin }: ChatInputProps) {
             sendMessage(
               {
                 conversation_id: conversationId!,
-                messages: [...messagesWithoutTimestamp, userMessageForBackend], // 使用后端版本的消息
+                messages: [userMessageForBackend], // 只发送新消息（后端版本），模型上下文由后端从数据库读取
                 base_url: currentConfig.base_url || '',
                 model_name: currentConfig.model_name,
                 api_key: currentConfig.api_key ?? null,
@@ -551,8 +561,9 @@ export default function ChatInput({ onShowLogin }: ChatInputProps) {
       // 更新消息列表，移除无效消息
       setMessages(messagesWithoutLastAI)
 
+      // 只重新发送最后一条用户消息，模型上下文由后端从数据库读取
       // 将消息中的 base64 图片转换为 COS URL
-      const messagesWithCosUrls = await convertImagesToCos(messagesWithoutLastAI, currentConversationId)
+      const messagesWithCosUrls = await convertImagesToCos(messagesWithoutLastAI.slice(-1), currentConversationId)
 
       const messagesWithoutTimestamp = messagesWithCosUrls.map((m) => ({
         message_id: m.message_id,
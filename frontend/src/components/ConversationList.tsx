@@ -8,12 +8,14 @@ interface ConversationListProps {
   onNewConversation: () => void
   onProfileClick: () => void
   onShowLogin: () => void
+  onLoadMore?: () => void
 }
 
 export default function ConversationList({
   onNewConversation,
   onProfileClick,
   onShowLogin,
+  onLoadMore,
 }: ConversationListProps) {
   const { conversations, setCurrentConversationId, setIsNewConversation, removeConversations } = useConversationStore()
   const { accessToken, userInfo } = useAuthStore()
@@ -77,6 +79,13 @@ export default function ConversationList({
             </button>
           </div>
         ))}
+        {onLoadMore && (
+          <div className="p-2 flex justify-center">
+            <button onClick={onLoadMore} className="text-sm opacity-60">
+              加载更多
+            </button>
+          </div>
+        )}
       </div>
 
       <div className="flex flex-col items-center">
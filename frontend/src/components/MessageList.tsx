@@ -1,4 +1,4 @@
-import { useEffect, useRef } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { useChatStore } from '../stores/chatStore'
 import { useConversationStore } from '../stores/conversationStore'
 import { useAuthStore } from '../stores/authStore'
@@ -25,6 +25,7 @@ export default function MessageList() {
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const messagesContainerRef = useRef<HTMLDivElement>(null)
   const previousConversationId = useRef<number | null>(null)
+  const [nextBeforeId, setNextBeforeId] = useState<number | null>(null)
 
   useEffect(() => {
     // 检测对话是否切换
@@ -56,7 +57,8 @@ export default function MessageList() {
     try {
       const data = await getMessages(currentConversationId!)
       // 确保 data 是数组
-      useChatStore.getState().setMessages(Array.isArray(data) ? data : [])
+      useChatStore.getState().setMessages(Array.isArray(data.messages) ? data.messages : [])
+      setNextBeforeId(data.has_more ? data.next_before_id : null)
       // 延迟滚动，确保图片和其他资源已加载
       setTimeout(() => {
         scrollToBottom()
@@ -66,6 +68,18 @@ export default function MessageList() {
     }
   }
 
+  // 加载更早的消息
+  const loadEarlierMessages = async () => {
+    if (!currentConversationId || nextBeforeId === null) return
+    try {
+      const data = await getMessages(currentConversationId, nextBeforeId)
+      useChatStore.getState().setMessages((prev) => [...data.messages, ...prev])
+      setNextBeforeId(data.has_more ? data.next_before_id : null)
+    } catch (err) {
+      console.error('Failed to load earlier messages:', err)
+    }
+  }
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
   }
@@ -174,6 +188,14 @@ export default function MessageList() {
         </div>
       )}
 
+      {nextBeforeId !== null && (
+        <div className="flex justify-center mb-4">
+          <button onClick={loadEarlierMessages} className="text-sm opacity-60">
+            加载更早的消息
+          </button>
+        </div>
+      )}
+
       {Array.isArray(messages) && messages.map((message, index) => {
         const hasImage = Array.isArray(message.content) && message.content.some(item => item.type === 'image_url')
         const isLastUserMessage = message.role === 'user' && index === messages.length - 1
@@ -5,13 +5,21 @@ import MessageList from '../components/MessageList'
 import ChatInput from '../components/ChatInput'
 import AuthModal from '../components/AuthModal'
 import UserProfileModal from '../components/UserProfileModal'
-import { getConversations } from '../services/conversation'
+import { ConversationCursor, ConversationListResponse, getConversations } from '../services/conversation'
 import { getModelConfigs } from '../services/modelConfig'
 import { useConversationStore } from '../stores/conversationStore'
 import { useModelConfigStore } from '../stores/modelConfigStore'
 import { useAuthStore } from '../stores/authStore'
 import { useChatStore } from '../stores/chatStore'
 
+/**
+ * Build the cursor for the next conversation page, or null when exhausted
+ */
+const toCursor = (data: ConversationListResponse): ConversationCursor | null =>
+  data.has_more && data.next_before_at && data.next_before_id
+    ? { before_at: data.next_before_at, before_id: data.next_before_id }
+    : null
+
 /**
  * Main chat page component
  * Manages chat interface layout and state
@@ -27,6 +35,7 @@ export default function ChatPage() {
   // Modal display states
   const [showProfile, setShowProfile] = useState(false)
   const [showLogin, setShowLogin] = useState(false)
+  const [conversationCursor, setConversationCursor] = useState<ConversationCursor | null>(null)
 
   /**
    * Handle returning from ModelConfigPage using global event
@@ -113,12 +122,27 @@ export default function ChatPage() {
   const loadConversations = async () => {
     try {
       const data = await getConversations()
-      setConversations(data)
+      setConversations(data.conversations)
+      setConversationCursor(toCursor(data))
     } catch (err) {
       console.error('Failed to load conversations:', err)
     }
   }
 
+  /**
+   * Load next page of conversation list
+   */
+  const loadMoreConversations = async () => {
+    if (!conversationCursor) return
+    try {
+      const data = await getConversations(conversationCursor)
+      setConversations([...useConversationStore.getState().conversations, ...data.conversations])
+      setConversationCursor(toCursor(data))
+    } catch (err) {
+      console.error('Failed to load more conversations:', err)
+    }
+  }
+
   /**
    * Load model config list
    */
@@ -174,6 +198,7 @@ export default function ChatPage() {
           onNewConversation={handleNewConversation}
           onProfileClick={handleProfileClick}
           onShowLogin={() => setShowLogin(true)}
+          onLoadMore={conversationCursor ? loadMoreConversations : undefined}
         />
 
         {/* Right side: message list and input */}
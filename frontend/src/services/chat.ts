@@ -5,10 +5,13 @@ import { useAuthStore } from '../stores/authStore'
 export interface GetUploadPresignedUrlRequest {
   conversation_id: number
   suffixes: string[]
+  hashes?: string[]
 }
 
 export interface GetUploadPresignedUrlResponse {
   urls: string[]
+  cos_urls: string[]
+  exists: boolean[]
 }
 
 export interface Message {
@@ -20,6 +23,8 @@ export interface Message {
 
 export interface MessageListResponse {
   messages: Message[]
+  has_more: boolean
+  next_before_id: number | null
 }
 
 export interface SendMessageRequest {
@@ -58,12 +63,20 @@ export interface ChatWebSocketRequest {
 // Get image upload presigned URL
 export const getUploadPresignedUrl = async (
   data: GetUploadPresignedUrlRequest,
-): Promise<string[]> => {
+): Promise<GetUploadPresignedUrlResponse> => {
   const response = await api.post<GetUploadPresignedUrlResponse>(
     '/api/v1/chat/get_upload_presigned_url',
     data,
   )
-  return response.data.urls
+  return response.data
+}
+
+// Compute sha256 hex digest of a blob (used for content-addressed uploads)
+export const hashBlob = async (blob: Blob): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer())
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, '0'))
+    .join('')
 }
 
 // Upload image to presigned URL
@@ -75,10 +88,16 @@ export const uploadImage = async (url: string, file: File): Promise<void> => {
   })
 }
 
-// Get message history
-export const getMessages = async (conversationId: number): Promise<Message[]> => {
-  const response = await api.get<MessageListResponse>(`/api/v1/chat/${conversationId}`)
-  return response.data.messages
+// Get message history (keyset paginated, newest page first)
+export const getMessages = async (
+  conversationId: number,
+  beforeId?: number | null,
+  limit = 50,
+): Promise<MessageListResponse> => {
+  const response = await api.get<MessageListResponse>(`/api/v1/chat/${conversationId}`, {
+    params: { before_id: beforeId ?? undefined, limit },
+  })
+  return response.data
 }
 
 // Send message (streaming response)
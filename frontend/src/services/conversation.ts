@@ -5,10 +5,23 @@ export interface Conversation {
   title: string | null
   update_at: string
   model_config_id: number | null
+  message_count?: number
+  total_prompt_tokens?: number
+  total_completion_tokens?: number
+  last_message_at?: string | null
+  last_message_preview?: string | null
 }
 
 export interface ConversationListResponse {
   conversations: Conversation[]
+  has_more: boolean
+  next_before_at: string | null
+  next_before_id: number | null
+}
+
+export interface ConversationCursor {
+  before_at: string
+  before_id: number
 }
 
 export interface CreateConversationRequest {
@@ -47,10 +60,38 @@ export interface Message {
   timestamp?: string | null
 }
 
-// Get conversation list
-export const getConversations = async (): Promise<Conversation[]> => {
-  const response = await api.get<ConversationListResponse>('/api/v1/conversation')
-  return response.data.conversations
+export interface ConversationSearchHit {
+  conversation_id: number
+  title: string
+  highlights: [number, number][]
+}
+
+export interface MessageSearchHit {
+  message_id: number
+  conversation_id: number
+  conversation_title: string | null
+  role: string
+  snippet: string
+  highlights: [number, number][]
+  timestamp: string
+}
+
+export interface SearchResponse {
+  conversations: ConversationSearchHit[]
+  messages: MessageSearchHit[]
+  has_more: boolean
+  next_before_id: number | null
+}
+
+// Get conversation list (ordered by recent activity, keyset paginated)
+export const getConversations = async (
+  cursor?: ConversationCursor | null,
+  limit = 50,
+): Promise<ConversationListResponse> => {
+  const response = await api.get<ConversationListResponse>('/api/v1/conversation', {
+    params: { ...(cursor ?? {}), limit },
+  })
+  return response.data
 }
 
 // Create new conversation
@@ -80,4 +121,42 @@ export const updateConversation = async (
 // Batch delete conversations
 export const deleteConversations = async (data: DeleteConversationsRequest): Promise<void> => {
   await api.post('/api/v1/conversation/delete', data)
-}
\ No newline at end of file
+}
+
+// Full-text search over conversation titles and message content
+export const searchConversations = async (
+  q: string,
+  beforeId?: number | null,
+  limit = 20,
+): Promise<SearchResponse> => {
+  const response = await api.get<SearchResponse>('/api/v1/conversation/search', {
+    params: { q, before_id: beforeId ?? undefined, limit },
+  })
+  return response.data
+}
+
+export interface ImportConversationsResponse {
+  conversations: number
+  messages: number
+}
+
+// Export all conversations as an NDJSON (optionally gzip) file
+export const exportConversations = async (compress = true): Promise<Blob> => {
+  const response = await api.get<Blob>('/api/v1/conversation/export', {
+    params: { compress },
+    responseType: 'blob',
+  })
+  return response.data
+}
+
+// Import conversations from an NDJSON (optionally gzip) file
+export const importConversations = async (
+  file: Blob,
+): Promise<ImportConversationsResponse> => {
+  const response = await api.post<ImportConversationsResponse>(
+    '/api/v1/conversation/import',
+    file,
+    { headers: { 'Content-Type': 'application/octet-stream' } },
+  )
+  return response.data
+}
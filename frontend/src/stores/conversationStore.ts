@@ -24,7 +24,7 @@ export const useConversationStore = create<ConversationState>()(
   setConversations: (conversations) => set({ conversations }),
   addConversation: (conversation) =>
     set((state) => ({
-      conversations: [...state.conversations, conversation],
+      conversations: [conversation, ...state.conversations],
       currentConversationId: conversation.conversation_id,
       isNewConversation: false,
     })),